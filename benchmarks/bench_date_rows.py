@@ -0,0 +1,105 @@
+"""
+Извлечение дат из строк акта сверки (extract_date_from_text на каждую строку таблицы)
+и поиск организаций в тексте акта:
+- новый процессор Pullenti на каждый вызов (create_specific_processor, весь NER-стек);
+- пул процессоров с тем же стеком;
+- пул минимальных процессоров (анализатор и его зависимости, create_minimal_processor);
+- даты всех строк одним анализом (extract_dates_from_texts);
+- доля строк, разобранных без Pullenti (parse_numeric_date);
+- повторная обработка того же акта с кэшем результатов (get_date_cache, get_organization_cache).
+
+    PYTHONPATH=. python benchmarks/bench_date_rows.py [строк]
+"""
+import logging
+import sys
+import time
+
+import benchmarks.common_bench  # noqa: F401 - путь к корню проекта
+from pullenti.Sdk import Sdk
+from pullenti.ner.ProcessorService import ProcessorService
+from pullenti.ner.SourceOfAnalysis import SourceOfAnalysis
+from pullenti.ner.date.DateAnalyzer import DateAnalyzer
+from pullenti.ner.org.OrganizationAnalyzer import OrganizationAnalyzer
+
+from src.NER.organization_processor import OrganizationProcessor, get_organization_cache
+from src.NER.processor_pool import get_processor_pool
+from src.NER.utils import extract_date_from_text, extract_dates_from_texts, get_date_cache, parse_numeric_date
+
+RECORDS = [
+    "Продажа ({day:02d}.{month:02d}.2024 № {n})",
+    "Оплата ({day:02d}.{month:02d}.24 № {n})",
+    "Реализация товаров и услуг {n} от {day} мая 2024 г.",
+    "Сальдо на {day:02d}.{month:02d}.2024",
+    "Корректировка долга {n} за {month} месяц",
+]
+
+ACT_HEADER = (
+    "Акт сверки взаимных расчетов за период: 2 квартал 2024 г. между АО «РУСАЛ Новокузнецкий "
+    "алюминиевый завод» и ООО «Сибирская Дорожная Компания» по договору № 15 от 01.02.2023. "
+    "Мы, нижеподписавшиеся, ООО «Сибирская Дорожная Компания», именуемое в дальнейшем Продавец, "
+    "с одной стороны, и АО «РУСАЛ Новокузнецкий алюминиевый завод», г. Новокузнецк, ул. Ленина, д. 5, "
+    "именуемое Покупатель, с другой стороны, составили настоящий акт сверки. "
+)
+
+
+def make_rows(n_rows: int) -> list:
+    return [RECORDS[i % len(RECORDS)].format(day=1 + i % 28, month=1 + i % 12, n=1000 + i) for i in range(n_rows)]
+
+
+def run_fresh(texts: list, analyzer: str) -> None:
+    for text in texts:
+        with ProcessorService.create_specific_processor(analyzer) as proc:
+            proc.process(SourceOfAnalysis(text))
+
+
+def run_pooled(texts: list, analyzer: str, minimal: bool) -> None:
+    pool = get_processor_pool()
+    for text in texts:
+        with pool.acquire(analyzer, minimal=minimal) as proc:
+            proc.process(SourceOfAnalysis(text))
+
+
+def measure(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def report(name: str, seconds: float, n: int) -> None:
+    print(f"  {name:28s} {seconds * 1000:8.1f} мс  ({seconds / n * 1000:.2f} мс/вызов)")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    Sdk.initialize_all()
+    rows = make_rows(n_rows)
+    headers = [ACT_HEADER] * 5
+
+    for title, texts, analyzer in ((f"Даты: {n_rows} строк", rows, DateAnalyzer.ANALYZER_NAME),
+                                   (f"Организации: {len(headers)} шапок акта", headers,
+                                    OrganizationAnalyzer.ANALYZER_NAME)):
+        print(title)
+        report("процессор на вызов", measure(lambda: run_fresh(texts, analyzer)), len(texts))
+        report("пул, весь стек", measure(lambda: run_pooled(texts, analyzer, False)), len(texts))
+        report("пул, минимальный процессор", measure(lambda: run_pooled(texts, analyzer, True)), len(texts))
+
+    logger = logging.getLogger("bench")
+    date_cache = get_date_cache()
+    date_cache.clear()
+    report("extract_date_from_text", measure(lambda: [extract_date_from_text(r, logger) for r in rows]), n_rows)
+    date_cache.clear()
+    report("extract_dates_from_texts", measure(lambda: extract_dates_from_texts(rows, logger)), n_rows)
+    report("повторный акт (кэш)", measure(lambda: extract_dates_from_texts(rows, logger)), n_rows)
+    hits = sum(parse_numeric_date(r) is not None for r in rows)
+    print(f"  числовые даты без Pullenti: {hits} из {n_rows} строк ({hits / n_rows:.0%})")
+    print(f"  кэш дат: {date_cache.stats}")
+
+    org_processor = OrganizationProcessor(logger)
+    get_organization_cache().clear()
+    report("process_text, шапки акта", measure(lambda: [org_processor.process_text(h) for h in headers]), len(headers))
+    print(f"  кэш организаций: {get_organization_cache().stats}")
+    print(f"  пул: {get_processor_pool().stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Микробенчмарк восстановления сетки таблицы: прежний разбор с проверкой полос маски
+для каждой ячейки (has_line на каждый кандидат-разделитель) против индекса разделителей
+ScanExtractor._grid_table. Плотная таблица 50x10 в 300 DPI, span_mode=0.
+
+    PYTHONPATH=. python benchmarks/bench_grid_table.py [путь_к_pdf]
+"""
+import sys
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from benchmarks.common_bench import has_line_loop, load_gray_pages, timeit
+from tests.pdf_fixtures import make_table_pdf
+from src.PDFExtractor.image_processing import find_lines, find_max_contours
+from src.PDFExtractor.scan_extractor import ScanExtractor
+from src.PDFExtractor.utils import find_line_positions, has_line
+
+LINE_FRAC = 0.2
+THICKNESS = 3
+
+
+def grid_spans_per_cell(pure_v: np.ndarray, pure_h: np.ndarray, span_mode: int = 0,
+                        has_line_fn: Callable = has_line) -> List[Tuple[int, int, int, int]]:
+    """Прежний алгоритм _grid_table: (row, col, colspan, rowspan) для каждой ячейки."""
+    xs = list(find_line_positions(pure_v, axis=0))
+    ys = list(find_line_positions(pure_h, axis=1))
+    if len(xs) < 2 or not ys:
+        return []
+    if ys[-1] < pure_h.shape[0] - 10:
+        ys.append(pure_h.shape[0])
+    if len(ys) < 2:
+        return []
+    n_rows, n_cols = len(ys) - 1, len(xs) - 1
+    used = [[False] * n_cols for _ in range(n_rows)]
+    spans = []
+    for r in range(n_rows):
+        for c in range(n_cols):
+            if used[r][c]:
+                continue
+            x1 = xs[c + 1]
+            col_span = row_span = 1
+            if span_mode in (0, 1):
+                for next_c in range(c + 1, n_cols):
+                    xs_, xe_ = max(0, xs[next_c] - THICKNESS), min(pure_v.shape[1], xs[next_c] + THICKNESS + 1)
+                    if ys[r + 1] <= ys[r] or xe_ <= xs_:
+                        break
+                    if has_line_fn(pure_v[ys[r]:ys[r + 1], xs_:xe_], int((ys[r + 1] - ys[r]) * LINE_FRAC), axis=0):
+                        break
+                    x1 = xs[next_c + 1]
+                    col_span += 1
+            if span_mode in (0, 2):
+                for next_r in range(r + 1, n_rows):
+                    ys_, ye_ = max(0, ys[next_r] - THICKNESS), min(pure_h.shape[0], ys[next_r] + THICKNESS + 1)
+                    if x1 <= xs[c] or ye_ <= ys_:
+                        break
+                    if has_line_fn(pure_h[ys_:ye_, xs[c]:x1], int((x1 - xs[c]) * LINE_FRAC), axis=1):
+                        break
+                    row_span += 1
+            for rr in range(r, min(r + row_span, n_rows)):
+                for cc in range(c, min(c + col_span, n_cols)):
+                    used[rr][cc] = True
+            spans.append((r, c, col_span, row_span))
+    return spans
+
+
+def table_masks(pdf_path=None):
+    """Маски вертикальных и горизонтальных линий для каждой найденной таблицы."""
+    masks = []
+    for gray in load_gray_pages(pdf_path, pdf_bytes=make_table_pdf(pages=1, rows=50, cols=10)):
+        h_lines, v_lines = find_lines(gray)
+        for x, y, w, h in find_max_contours(h_lines + v_lines, max=5):
+            masks.append((v_lines[y:y+h, x:x+w], h_lines[y:y+h, x:x+w]))
+    return masks
+
+
+def main():
+    masks = table_masks(sys.argv[1] if len(sys.argv) > 1 else None)
+    extractor = ScanExtractor.__new__(ScanExtractor)
+
+    for pure_v, pure_h in masks:
+        cells = extractor._grid_table(0, 0, pure_v, pure_h, span_mode=0)
+        expected = grid_spans_per_cell(pure_v, pure_h, span_mode=0)
+        assert [(c.row, c.col, c.colspan, c.rowspan) for c in cells] == expected, "Результаты расходятся"
+        print(f"Таблица {pure_v.shape[1]}x{pure_v.shape[0]} px, ячеек: {len(cells)}")
+
+        per_cell_loop = timeit(lambda: grid_spans_per_cell(pure_v, pure_h, 0, has_line_loop), repeat=1)
+        per_cell = timeit(lambda: grid_spans_per_cell(pure_v, pure_h, 0), repeat=3)
+        indexed = timeit(lambda: extractor._grid_table(0, 0, pure_v, pure_h, span_mode=0), repeat=3)
+        lines = timeit(lambda: (find_line_positions(pure_v, 0), find_line_positions(pure_h, 1)), repeat=3)
+        print(f"  полосы, циклы Python:      {per_cell_loop * 1000:9.2f} мс")
+        print(f"  полосы, has_line NumPy:    {per_cell * 1000:9.2f} мс")
+        print(f"  индекс разделителей:       {indexed * 1000:9.2f} мс "
+              f"(из них поиск линий сетки {lines * 1000:.2f} мс)")
+
+
+if __name__ == '__main__':
+    main()
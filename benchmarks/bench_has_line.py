@@ -0,0 +1,49 @@
+"""
+Микробенчмарк has_line: циклы Python по пикселям против векторизованного подсчёта сегментов.
+
+Набор проверок собирается прежним поячеечным разбором сетки (см. bench_grid_table) на масках
+линий страниц в 300 DPI (span_mode=0 - проверяются и colspan, и rowspan).
+
+    PYTHONPATH=. python benchmarks/bench_has_line.py [путь_к_pdf]
+"""
+import sys
+
+from benchmarks.bench_grid_table import grid_spans_per_cell
+from benchmarks.common_bench import has_line_loop, load_gray_pages, timeit
+from src.PDFExtractor.image_processing import find_lines, find_max_contours
+from src.PDFExtractor.utils import has_line
+
+
+def collect_calls(pdf_path=None):
+    """Аргументы всех вызовов has_line при разборе сеток таблиц прежним алгоритмом."""
+    calls = []
+
+    def recording_has_line(region, min_length, axis=0):
+        calls.append((region, min_length, axis))
+        return has_line(region, min_length, axis)
+
+    for gray in load_gray_pages(pdf_path):
+        h_lines, v_lines = find_lines(gray)
+        for x, y, w, h in find_max_contours(h_lines + v_lines, max=5):
+            grid_spans_per_cell(v_lines[y:y+h, x:x+w], h_lines[y:y+h, x:x+w], 0, recording_has_line)
+    return calls
+
+
+def main():
+    calls = collect_calls(sys.argv[1] if len(sys.argv) > 1 else None)
+    pixels = sum(region.size for region, _, _ in calls)
+    print(f"Вызовов has_line: {len(calls)}, пикселей в полосах: {pixels}")
+
+    expected = [has_line_loop(*call) for call in calls]
+    actual = [has_line(*call) for call in calls]
+    assert expected == actual, "Результаты реализаций расходятся"
+
+    loop_time = timeit(lambda: [has_line_loop(*call) for call in calls], repeat=3)
+    vec_time = timeit(lambda: [has_line(*call) for call in calls], repeat=3)
+    print(f"циклы Python:     {loop_time * 1000:9.2f} мс")
+    print(f"векторизованная:  {vec_time * 1000:9.2f} мс")
+    print(f"ускорение:        {loop_time / vec_time:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
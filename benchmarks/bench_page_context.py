@@ -0,0 +1,93 @@
+"""
+Микробенчмарк подготовки страницы скана без самого распознавания (tesseract одинаков в обоих
+вариантах): процессорное время на страницу при повторных размытиях/бинаризациях
+(поиск линий, абзацы, удаление линий, preprocess и бинаризация каждого ROI) против
+общего PageContext, из которого все этапы берут срезы.
+
+    PYTHONPATH=. python benchmarks/bench_page_context.py [путь_к_pdf]
+"""
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common_bench import add_scan_noise, load_gray_pages
+from src.PDFExtractor.image_processing import (detected_text, find_lines, find_max_contours,
+                                               remove_lines_by_mask)
+from src.PDFExtractor.ocr_engine import TesseractEngine
+from src.PDFExtractor.page_context import PageContext
+from src.PDFExtractor.scan_extractor import ScanExtractor
+
+
+def cell_rois(extractor, tables):
+    """Границы ROI ячеек (с отступом 2, как в ScanExtractor._process)."""
+    return [c.bbox.padding(2) for x, y, w, h, v, hl in tables
+            for c in extractor._grid_table(x, y, v, hl, span_mode=1)]
+
+
+def legacy_page(gray, extractor, engine):
+    """Подготовка страницы до PageContext: каждый этап бинаризует пиксели сам."""
+    h_lines, v_lines = find_lines(gray)
+    contours = find_max_contours(h_lines + v_lines, max=5)
+
+    masked = gray.copy()
+    for x, y, w, h in contours:
+        cv2.rectangle(masked, (x, y), (x + w, y + h), 255, -1)
+    cv2.findContours(detected_text(masked, 50, 30), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    tables = []
+    for x, y, w, h in contours:
+        roi_v, roi_h = v_lines[y:y+h, x:x+w], h_lines[y:y+h, x:x+w]
+        gray[y:y+h, x:x+w] = remove_lines_by_mask(gray[y:y+h, x:x+w], cv2.bitwise_or(roi_v, roi_h))
+        tables.append((x, y, w, h, roi_v, roi_h))
+    cleaned = cv2.medianBlur(gray, 3)
+    for box in cell_rois(extractor, tables):
+        engine.detected_text(engine.preprocess(cleaned[box.y1:box.y2, box.x1:box.x2]))
+
+
+def context_page(gray, extractor, engine):
+    """Подготовка страницы через PageContext, как в ScanExtractor._process."""
+    ctx = PageContext(gray)
+    h_lines, v_lines = find_lines(gray, binary_inv=ctx.binary_inv)
+    contours = find_max_contours(h_lines + v_lines, max=5)
+    extractor._extract_paragraph_blocks(ctx, contours, margin=2)
+
+    tables = []
+    for x, y, w, h in contours:
+        roi_v, roi_h = v_lines[y:y+h, x:x+w], h_lines[y:y+h, x:x+w]
+        ctx.remove_lines(x, y, w, h, cv2.bitwise_or(roi_v, roi_h))
+        tables.append((x, y, w, h, roi_v, roi_h))
+    cleaned, binary = ctx.cleaned, ctx.cleaned_binary_inv
+    for box in cell_rois(extractor, tables):
+        engine.detected_text(cleaned[box.y1:box.y2, box.x1:box.x2], binary[box.y1:box.y2, box.x1:box.x2])
+
+
+def cpu_per_page(fn, pages, extractor, engine, repeat: int = 3) -> float:
+    """Лучшее из repeat процессорное время на страницу."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for gray in pages:
+            fn(gray.copy(), extractor, engine)
+        best = min(best, (time.process_time() - start) / len(pages))
+    return best
+
+
+def main():
+    # один поток OpenCV, чтобы процессорное время не зависело от планирования потоков
+    cv2.setNumThreads(1)
+    pages = load_gray_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    pages += [add_scan_noise(gray, 0.002, seed=i) for i, gray in enumerate(pages)]
+    extractor = ScanExtractor.__new__(ScanExtractor)
+    engine = TesseractEngine()
+
+    legacy = cpu_per_page(legacy_page, pages, extractor, engine)
+    shared = cpu_per_page(context_page, pages, extractor, engine)
+    print(f"Страниц: {len(pages)} (половина с шумом скана), CPU на страницу без распознавания:")
+    print(f"  отдельные бинаризации: {legacy * 1000:8.1f} мс")
+    print(f"  PageContext:           {shared * 1000:8.1f} мс ({(1 - shared / legacy) * 100:.0f}% меньше)")
+
+
+if __name__ == '__main__':
+    main()
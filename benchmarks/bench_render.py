@@ -0,0 +1,38 @@
+"""
+Микробенчмарк рендеринга страницы для скан-конвейера: RGB-пиксмап -> PIL -> NumPy -> cvtColor
+(три полностраничные копии) против полутонового пиксмапа csGRAY, обёрнутого без копирования.
+
+    PYTHONPATH=. python benchmarks/bench_render.py [путь_к_pdf]
+"""
+import sys
+
+import cv2
+import numpy as np
+import pymupdf
+
+from benchmarks.common_bench import timeit
+from tests.pdf_fixtures import make_table_pdf
+from src.PDFExtractor.utils import DEFAULT_DPI, page_to_image, render_gray
+
+
+def main():
+    if len(sys.argv) > 1:
+        doc = pymupdf.open(sys.argv[1])
+    else:
+        doc = pymupdf.open(stream=make_table_pdf(pages=1), filetype="pdf")
+    page = doc[0]
+
+    rgb = page_to_image(page, dpi=DEFAULT_DPI)
+    gray = render_gray(page, dpi=DEFAULT_DPI)
+    diff = np.abs(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY).astype(np.int16) - gray).max()
+    print(f"Страница {gray.shape[1]}x{gray.shape[0]} px, расхождение яркости не более {diff}")
+    print(f"  RGB + PIL + NumPy + cvtColor: ~{3 * rgb.nbytes / 2**20:.0f} МБ копий + {gray.nbytes / 2**20:.0f} МБ gray")
+    print(f"  csGRAY без копирования:        {gray.nbytes / 2**20:.0f} МБ")
+
+    rgb_time = timeit(lambda: cv2.cvtColor(page_to_image(page, dpi=DEFAULT_DPI), cv2.COLOR_RGB2GRAY))
+    gray_time = timeit(lambda: render_gray(page, dpi=DEFAULT_DPI))
+    print(f"  время: {rgb_time * 1000:.1f} мс -> {gray_time * 1000:.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Пропускная способность сериализации документа: pickle против двоичного формата
+(src/PDFExtractor/serialization.py) и сжатого JSON (прежний формат кэшей).
+Документ - синтетика из bench_table_memory: 60 страниц, таблица 40x7, 4 blobs на ячейку.
+
+    PYTHONPATH=. python benchmarks/bench_serialization.py [страниц]
+"""
+import gzip
+import json
+import pickle
+import sys
+import zlib
+
+from benchmarks.bench_table_memory import make_document
+from benchmarks.common_bench import timeit
+from src.PDFExtractor.base_extractor import Document
+from src.PDFExtractor.serialization import dumps_document, loads_document
+
+
+def report(name: str, dump, load, payload: bytes) -> None:
+    dump_time = timeit(dump, repeat=5)
+    load_time = timeit(load, repeat=5)
+    print(f"  {name:26s} {len(payload) / 2**20:6.2f} МБ  запись {dump_time * 1000:7.1f} мс  "
+          f"чтение {load_time * 1000:7.1f} мс")
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    doc = make_document(n_pages)
+    doc.pdf_bytes = b"%PDF" + bytes(2 * 2**20)
+    print(f"{n_pages} страниц, pdf_bytes {len(doc.pdf_bytes) / 2**20:.0f} МБ")
+
+    pickled = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+    report("pickle (с pdf_bytes)", lambda: pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL),
+           lambda: pickle.loads(pickled), pickled)
+
+    doc_no_pdf = Document(pages=doc.pages, page_count=doc.page_count)
+    pickled = pickle.dumps(doc_no_pdf, protocol=pickle.HIGHEST_PROTOCOL)
+    report("pickle (без pdf_bytes)", lambda: pickle.dumps(doc_no_pdf, protocol=pickle.HIGHEST_PROTOCOL),
+           lambda: pickle.loads(pickled), pickled)
+
+    packed = dumps_document(doc)
+    assert loads_document(packed).pages == doc.pages
+    report("PDXB -> Cell", lambda: dumps_document(doc), lambda: loads_document(packed), packed)
+    report("PDXB -> ColumnarCells", lambda: dumps_document(doc),
+           lambda: loads_document(packed, columnar=True), packed)
+
+    doc.compact()
+    packed = dumps_document(doc)
+    report("PDXB из колоночных таблиц", lambda: dumps_document(doc),
+           lambda: loads_document(packed, columnar=True), packed)
+
+    compressed = zlib.compress(packed, 1)
+    report("PDXB + zlib(1)", lambda: zlib.compress(dumps_document(doc), 1),
+           lambda: loads_document(zlib.decompress(compressed), columnar=True), compressed)
+
+    as_json = gzip.compress(json.dumps(doc.to_dict(), ensure_ascii=False).encode("utf-8"))
+    report("JSON + gzip", lambda: gzip.compress(json.dumps(doc.to_dict(), ensure_ascii=False).encode("utf-8")),
+           lambda: Document.from_dict(json.loads(gzip.decompress(as_json))), as_json)
+
+
+if __name__ == '__main__':
+    main()
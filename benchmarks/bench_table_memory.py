@@ -0,0 +1,106 @@
+"""
+Память структуры большого распознанного документа: прежние dataclass с __dict__,
+слотовые BBox/Cell/Table/Paragraph и колоночное хранение ячеек (Document.compact).
+Синтетика: 60 страниц, таблица 40x7 на странице, у каждой ячейки 4 blobs (слова OCR).
+
+    PYTHONPATH=. python benchmarks/bench_table_memory.py [страниц]
+"""
+from dataclasses import dataclass, field
+import gc
+import sys
+import tracemalloc
+from typing import Callable, List, Optional
+
+import benchmarks.common_bench  # noqa: F401 - путь к корню проекта
+from src.PDFExtractor.base_extractor import BBox, Cell, Document, Page, Paragraph, ParagraphType, Table
+
+ROWS, COLS, BLOBS = 40, 7, 4
+
+
+@dataclass
+class DictBBox:
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+@dataclass
+class DictCell:
+    bbox: DictBBox
+    row: int
+    col: int
+    colspan: int
+    rowspan: int
+    text: str = None
+    blobs: List[DictBBox] = field(default_factory=list)
+    original_page_num: Optional[int] = None
+
+
+@dataclass
+class DictTable:
+    bbox: DictBBox
+    cells: List[DictCell] = field(default_factory=list)
+    start_page_num: Optional[int] = None
+
+
+def make_pages(n_pages: int, bbox_cls: type, cell_cls: type, table_cls: type) -> list:
+    pages = []
+    for p in range(n_pages):
+        cells = []
+        for r in range(ROWS):
+            for c in range(COLS):
+                x, y = 100 + 300 * c, 200 + 70 * r
+                blobs = [bbox_cls(x + 5 + 60 * b, y + 10, x + 60 + 60 * b, y + 40) for b in range(BLOBS)]
+                cells.append(cell_cls(bbox=bbox_cls(x, y, x + 300, y + 70), row=r, col=c, colspan=1, rowspan=1,
+                                      text=f"{p:02d}.{r:02d}.2024 реализация {c}", blobs=blobs))
+        pages.append(table_cls(bbox=bbox_cls(100, 200, 100 + 300 * COLS, 200 + 70 * ROWS), cells=cells))
+    return pages
+
+
+def make_document(n_pages: int) -> Document:
+    tables = make_pages(n_pages, BBox, Cell, Table)
+    return Document(pages=[
+        Page(tables=[t], paragraphs=[Paragraph(bbox=BBox(0, 0, 2000, 100), type=ParagraphType.HEADER, text="Акт сверки")],
+             num_page=i)
+        for i, t in enumerate(tables)
+    ], page_count=n_pages)
+
+
+def retained(build: Callable[[], object]) -> tuple:
+    """(объект, удерживаемая им память в байтах) по tracemalloc после сборки мусора."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    n_cells = n_pages * ROWS * COLS
+    print(f"{n_pages} страниц, {n_cells} ячеек, {n_cells * BLOBS} blobs")
+
+    _, dict_size = retained(lambda: make_pages(n_pages, DictBBox, DictCell, DictTable))
+    _, slots_size = retained(lambda: make_document(n_pages))
+
+    def build_compact() -> Document:
+        doc = make_document(n_pages)
+        doc.compact()
+        return doc
+    compact_doc, compact_size = retained(build_compact)
+
+    for name, size in (("dataclass с __dict__", dict_size), ("слотовые dataclass", slots_size),
+                       ("колоночные таблицы", compact_size)):
+        print(f"  {name:22s} {size / 2**20:7.1f} МБ  ({size / n_cells:6.0f} Б/ячейку)")
+    arrays = sum(t.cells.nbytes for p in compact_doc.pages for t in p.tables)
+    print(f"  из них массивы NumPy   {arrays / 2**20:7.1f} МБ (остальное - строки текста)")
+    # чтение через представления даёт те же данные
+    cell = compact_doc.pages[-1].tables[0].cells[-1]
+    assert cell == make_document(n_pages).pages[-1].tables[0].cells[-1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Общие помощники микробенчмарков: синтетические страницы акта сверки в 300 DPI
+(PDF строит tests/pdf_fixtures.make_table_pdf) и простой замер времени.
+Вместо синтетики можно передать путь к реальному PDF.
+"""
+import os
+import sys
+import time
+from typing import Callable, List, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pymupdf
+
+from src.PDFExtractor.utils import DEFAULT_DPI, render_gray
+from tests.pdf_fixtures import make_table_pdf
+
+
+def load_gray_pages(pdf_path: Optional[str] = None, dpi: int = DEFAULT_DPI,
+                    pdf_bytes: Optional[bytes] = None) -> List[np.ndarray]:
+    """Полутоновые страницы PDF (файл, байты или по умолчанию синтетический акт) в заданном DPI."""
+    if pdf_path:
+        doc = pymupdf.open(pdf_path)
+    else:
+        doc = pymupdf.open(stream=pdf_bytes or make_table_pdf(), filetype="pdf")
+    with doc:
+        return [np.array(render_gray(page, dpi=dpi)) for page in doc]
+
+
+def add_scan_noise(gray: np.ndarray, density: float = 0.002, seed: int = 0) -> np.ndarray:
+    """Имитация шума скана: случайные тёмные точки и короткие штрихи."""
+    rng = np.random.default_rng(seed)
+    noisy = gray.copy()
+    n = int(gray.size * density)
+    ys = rng.integers(0, gray.shape[0], n)
+    xs = rng.integers(0, gray.shape[1], n)
+    noisy[ys, xs] = 0
+    for y, x in zip(ys[: n // 20], xs[: n // 20]):
+        if rng.random() < 0.5:
+            noisy[y:y + 2, x:x + rng.integers(5, 60)] = 0
+        else:
+            noisy[y:y + rng.integers(5, 60), x:x + 2] = 0
+    return noisy
+
+
+def timeit(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Лучшее время выполнения fn за repeat запусков, в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def has_line_loop(region: np.ndarray, min_length: int, axis: int = 0) -> bool:
+    """Прежняя реализация: вложенные циклы по пикселям."""
+    if region.size == 0 or min_length <= 0 or region.shape[axis] < min_length:
+        return False
+    lines = region.T if axis == 0 else region
+    for line in lines:
+        run = max_run = 0
+        for value in line:
+            if value:
+                run += 1
+            else:
+                max_run = max(max_run, run)
+                run = 0
+        if max(max_run, run) >= min_length:
+            return True
+    return False
@@ -1,18 +1,19 @@
 
 import logging
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Tuple
 
 from .reconc_act_extractor import ReconciliationActExtractor
 from .organization_processor import OrganizationProcessor
-from src.PDFExtractor.base_extractor import Document
+from src.PDFExtractor.base_extractor import Document, Page, iter_logical_tables
 
 
 class NERService: # Переименованный NER
     """
     Сервис для извлечения именованных сущностей и обработки специфичных документов.
     """
-    def __init__(self, doc_structure: Document):
-        self.doc = doc_structure
+    def __init__(self, doc_structure: Optional[Document] = None):
+        # Без документа сервис наполняется страницами через process_pages
+        self.doc = doc_structure if doc_structure is not None else Document()
         self.logger = logging.getLogger('app.' + self.__class__.__name__)
         self.organization_processor = OrganizationProcessor(self.logger)
         self.reconciliation_extractor = ReconciliationActExtractor(self.doc, self.logger)
@@ -38,4 +39,69 @@ class NERService: # Переименованный NER
             self.logger.warning("Информация о покупателе не предоставлена для определения структуры таблицы.")
             return None
 
-        return self.reconciliation_extractor.extract_for_buyer(buyer_info)
\ No newline at end of file
+        return self.reconciliation_extractor.extract_for_buyer(buyer_info)
+
+    def extract_reconciliation_details(self, seller_info: Optional[dict],
+                                       buyer_info: Optional[dict]) -> Tuple[list[dict], list[dict]]:
+        """
+        Данные акта сверки для продавца и структура таблицы покупателя за один проход
+        по логическим таблицам документа.
+        """
+        if not seller_info and not buyer_info:
+            self.logger.warning("Информация о продавце и покупателе не предоставлена.")
+            return [], []
+        return self.reconciliation_extractor.extract_for_parties(seller_info or None, buyer_info or None)
+
+    def process_pages(self, pages: Iterable[Page], org_search_pages: int = 2) -> Tuple[list[dict], list[dict]]:
+        """
+        Потоковая обработка страниц (например, из BaseExtractor.iter_pages).
+        Организации ищутся один раз - по тексту параграфов первых org_search_pages страниц;
+        после определения продавца логические таблицы разбираются по мере их завершения,
+        пока следующие страницы ещё распознаются.
+        Если продавец в первых страницах не найден, поиск повторяется один раз по тексту
+        всего документа (роли зависят от всех найденных организаций, см. OrganizationProcessor).
+        Все полученные страницы добавляются в self.doc.
+
+        Returns:
+            (организации, транзакции продавца)
+        """
+        pages_iter = iter(pages)
+        received: list[Page] = []
+        for page in pages_iter:
+            self._add_page(page)
+            received.append(page)
+            if len(received) >= org_search_pages:
+                break
+
+        organizations = self.find_document_organizations()
+        seller = self._find_seller(organizations)
+        if not seller:
+            late_text = False
+            for page in pages_iter:
+                self._add_page(page)
+                received.append(page)
+                late_text = late_text or any(p.text for p in page.paragraphs)
+            if late_text:
+                organizations = self.find_document_organizations()
+                seller = self._find_seller(organizations)
+            if not seller:
+                self.logger.warning("Продавец не определен. Анализ акта сверки не выполнен.")
+                return organizations, []
+
+        def remaining_pages() -> Iterator[Page]:
+            yield from received
+            for page in pages_iter:
+                self._add_page(page)
+                yield page
+
+        transactions = self.reconciliation_extractor.extract_for_seller(
+            seller, tables=iter_logical_tables(remaining_pages()))
+        return organizations, transactions
+
+    @staticmethod
+    def _find_seller(organizations: list[dict]) -> Optional[dict]:
+        return next((org for org in organizations if org.get('role') == 'продавец'), None)
+
+    def _add_page(self, page: Page) -> None:
+        self.doc.pages.append(page)
+        self.doc.page_count = len(self.doc.pages)
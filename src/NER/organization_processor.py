@@ -1,13 +1,26 @@
 
+import copy
+import hashlib
 import logging
 
 from pullenti.ner.AnalysisResult import AnalysisResult
 from pullenti.ner.ExtOntology import ExtOntology
-from pullenti.ner.ProcessorService import ProcessorService
 from pullenti.ner.SourceOfAnalysis import SourceOfAnalysis
 from pullenti.ner.org.OrganizationAnalyzer import OrganizationAnalyzer
 from pullenti.ner.org.OrganizationReferent import OrganizationReferent
 
+from .processor_pool import get_processor_pool
+from .result_cache import LRUCache
+
+# Результаты process_text по хэшу текста: шапки актов одного контрагента повторяются.
+# Онтология и ключевые слова одинаковы у всех экземпляров, поэтому кэш общий.
+_organization_cache = LRUCache(capacity=256, copy_fn=copy.deepcopy)
+
+
+def get_organization_cache() -> LRUCache:
+    """Общий для процесса кэш результатов OrganizationProcessor.process_text."""
+    return _organization_cache
+
 
 class OrganizationProcessor:
     """
@@ -166,8 +179,25 @@ class OrganizationProcessor:
             self.logger.info(log_entry)
 
     def process_text(self, text: str) -> list[dict]:
+        """
+        Организации в тексте с ролями (продавец/покупатель). Результат кэшируется
+        по хэшу текста (get_organization_cache); возвращается копия, которую можно изменять.
+        """
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        orgs = _organization_cache.get(key)
+        if orgs is not None:
+            self.logger.debug(f"Организации взяты из кэша (текст {len(text)} символов).")
+            if orgs:
+                self._log_final_organization_roles(orgs)
+            return orgs
+        orgs = self._process_text(text)
+        _organization_cache.put(key, orgs)
+        return orgs
+
+    def _process_text(self, text: str) -> list[dict]:
         self.logger.debug(f"Поиск организаций в тексте (начало): {text[:200]}...")
-        with ProcessorService.create_specific_processor(OrganizationAnalyzer.ANALYZER_NAME) as proc:
+        # OrganizationAnalyzer с зависимостями (гео, адреса), без персон, денег, дат и т.п.
+        with get_processor_pool().acquire(OrganizationAnalyzer.ANALYZER_NAME, minimal=True) as proc:
             res = proc.process(SourceOfAnalysis(text), self.org_ontos)
         
         orgs = self._extract_raw_organizations(res, text)
@@ -0,0 +1,202 @@
+from contextlib import contextmanager
+import logging
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pullenti.ner.Processor import Processor
+from pullenti.ner.ProcessorService import ProcessorService
+
+# used_extern_object_types с этим значением означает зависимость от всех стандартных анализаторов
+_ALL_TYPES = "ALL"
+
+# Анализаторы, которые анализатор запрашивает по ходу обработки через Processor.find_analyzer
+# (process_referent, get_analyzer_data_by_analyzer_name) и которых нет в used_extern_object_types.
+# Отсутствующий анализатор find_analyzer сам добавляет в процессор, и минимальный процессор
+# разрастается, поэтому они добавляются сразу, так же как это делает find_analyzer.
+_LOOKUP_ANALYZERS: Dict[str, Tuple[str, ...]] = {
+    "ORGANIZATION": ("PERSON", "PERSONPROPERTY", "TRANSPORT", "NAMEDENTITY", "DECREE"),
+}
+
+
+def _split_names(analyzer_names: str) -> FrozenSet[str]:
+    # тот же разбор списка, что в create_specific_processor
+    return frozenset(name for name in re.split(r"[,; ]+", analyzer_names or "") if name)
+
+
+def resolve_analyzer_names(analyzer_names: Iterable[str]) -> List[str]:
+    """
+    Анализаторы вместе с их зависимостями: для каждого типа из used_extern_object_types
+    добавляются анализаторы, у которых этот тип есть в type_system (как при упорядочивании
+    в ProcessorService.__reorder_cartridges). Порядок - порядок регистрации в ProcessorService,
+    где зависимости уже стоят раньше зависящих от них анализаторов.
+
+    Raises:
+        ValueError: анализатор с таким именем не зарегистрирован.
+    """
+    registry = ProcessorService.get_analyzers() or []
+    by_name = {a.name: a for a in registry}
+    providers: Dict[str, List[str]] = {}
+    for a in registry:
+        for referent_class in a.type_system or []:
+            providers.setdefault(referent_class.name, []).append(a.name)
+
+    required: Set[str] = set()
+    stack = list(analyzer_names)
+    while stack:
+        name = stack.pop()
+        if name in required:
+            continue
+        analyzer = by_name.get(name)
+        if analyzer is None:
+            raise ValueError(f"Анализатор Pullenti '{name}' не зарегистрирован.")
+        required.add(name)
+        for type_name in analyzer.used_extern_object_types or []:
+            if type_name == _ALL_TYPES:
+                stack.extend(a.name for a in registry if not a.is_specific)
+            else:
+                stack.extend(providers.get(type_name, []))
+    return [a.name for a in registry if a.name in required]
+
+
+def close_processor(proc: Processor) -> None:
+    """
+    Processor.close, который не прерывает вызывающий код. На анализаторах, которые
+    Processor.find_analyzer добавил по ходу обработки без подписки на события, штатный
+    close падает с ValueError; ошибка записывается в лог.
+    """
+    try:
+        proc.close()
+    except ValueError as e:
+        logging.getLogger('app.' + close_processor.__name__).warning(
+            f"Процессор Pullenti {[a.name for a in proc.analyzers]} закрыт не полностью: {e!r}")
+
+
+def create_minimal_processor(analyzer_names: str) -> Optional[Processor]:
+    """
+    Процессор только с указанными анализаторами (имена через запятую) и их зависимостями,
+    без остальных стандартных. Анализаторы из _LOOKUP_ANALYZERS добавляются так же, как
+    их добавил бы Processor.find_analyzer: в обработке текста они не участвуют.
+    None - Pullenti не инициализирован (как у create_specific_processor).
+    """
+    if not ProcessorService.is_initialized():
+        return None
+    names = set(resolve_analyzer_names(_split_names(analyzer_names)))
+    lookups = {lookup for name in names for lookup in _LOOKUP_ANALYZERS.get(name, ())} - names
+    proc = Processor()
+    registry = ProcessorService.get_analyzers()
+    for a in registry:
+        if a.name in names:
+            proc.add_analyzer(a.clone())
+    for a in registry:
+        if a.name in lookups:
+            clone = a.clone()
+            clone.ignore_this_analyzer = True
+            proc.add_analyzer(clone)
+    return proc
+
+
+class ProcessorPool:
+    """
+    Пул готовых процессоров Pullenti по набору специфических анализаторов.
+
+    ProcessorService.create_specific_processor клонирует все зарегистрированные анализаторы,
+    поэтому процессор создаётся один раз и переиспользуется: acquire выдаёт свободный
+    процессор (или создаёт новый), после блока with он возвращается в пул. Процессор
+    в каждый момент используется одним потоком. Процессор, на котором обработка упала,
+    в пул не возвращается, как и процессор, в который Processor.find_analyzer добавил
+    анализаторы по ходу обработки (минимальный процессор перестал быть минимальным). minimal=True - процессор только с нужными анализаторами
+    (create_minimal_processor), такие процессоры хранятся отдельно.
+    """
+    def __init__(self, max_idle: int = 8):
+        """
+        Args:
+            max_idle: сколько свободных процессоров хранить для каждого набора анализаторов.
+        """
+        self.max_idle = max_idle
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[bool, FrozenSet[str]], List[Processor]] = {}
+        self._pid = os.getpid()
+        self.stats: Dict[str, int] = {"created": 0, "reused": 0, "discarded": 0}
+
+    @contextmanager
+    def acquire(self, analyzer_names: str, minimal: bool = False) -> Iterator[Processor]:
+        """
+        Процессор со стандартными анализаторами и указанными специфическими
+        (имена через запятую, как в create_specific_processor), а при minimal=True -
+        только с указанными анализаторами и их зависимостями.
+
+        Raises:
+            RuntimeError: Pullenti не инициализирован (Sdk.initialize_all).
+        """
+        names = _split_names(analyzer_names)
+        key = (minimal, names)
+        proc = self._take(key)
+        if proc is None:
+            create = create_minimal_processor if minimal else ProcessorService.create_specific_processor
+            proc = create(",".join(sorted(names)))
+            if proc is None:
+                raise RuntimeError("Pullenti не инициализирован (вызовите Sdk.initialize_all).")
+            with self._lock:
+                self.stats["created"] += 1
+            self.logger.debug(f"Создан процессор Pullenti: {[a.name for a in proc.analyzers]}.")
+        n_analyzers = len(proc.analyzers)
+        try:
+            yield proc
+        except BaseException:
+            # состояние анализаторов после сбоя не гарантировано
+            self._discard(proc)
+            raise
+        if len(proc.analyzers) != n_analyzers:
+            self.logger.warning(f"В процессор Pullenti {sorted(names)} по ходу обработки добавлены анализаторы "
+                                f"{[a.name for a in proc.analyzers[n_analyzers:]]}; процессор не возвращается в пул.")
+            self._discard(proc)
+            return
+        self._release(key, proc)
+
+    def _discard(self, proc: Processor) -> None:
+        close_processor(proc)
+        with self._lock:
+            self.stats["discarded"] += 1
+
+    def _take(self, key: Tuple[bool, FrozenSet[str]]) -> Optional[Processor]:
+        with self._lock:
+            if self._pid != os.getpid():
+                # после fork процессоры родителя не переиспользуются
+                self._idle.clear()
+                self._pid = os.getpid()
+            idle = self._idle.get(key)
+            if idle:
+                self.stats["reused"] += 1
+                return idle.pop()
+        return None
+
+    def _release(self, key: Tuple[bool, FrozenSet[str]], proc: Processor) -> None:
+        # сброс настроек, которые вызывающий код мог поменять
+        proc.timeout_seconds = 0
+        proc.tag = None
+        proc.progress.clear()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(proc)
+                return
+        close_processor(proc)
+
+    def clear(self) -> None:
+        """Закрывает свободные процессоры (например, после повторной инициализации Pullenti)."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for procs in idle.values():
+            for proc in procs:
+                close_processor(proc)
+
+
+_pool = ProcessorPool()
+
+
+def get_processor_pool() -> ProcessorPool:
+    """Общий для процесса пул процессоров Pullenti."""
+    return _pool
@@ -1,13 +1,11 @@
-
 import logging
 import re
 import typing
-from venv import logger
 
-from .utils import extract_date_from_text
+from .utils import extract_dates_from_texts
 from .utils import format_currency_value
 
-from src.PDFExtractor.base_extractor import Cell, Document
+from src.PDFExtractor.base_extractor import Cell, Document, Table, TableGrid
 
 class ReconciliationActExtractor:
     """
@@ -17,181 +15,219 @@ class ReconciliationActExtractor:
         self.doc = doc
         self.logger = logger
 
+    @staticmethod
     def _find_debit_credit_columns_under_header(
-            self, table_cells: list[Cell], 
+            grid: TableGrid,
             parent_row: int, parent_col: int, parent_colspan: int,
             debit_kw: str = "дебет", credit_kw: str = "кредит"
     ) -> tuple[int, int]:
         debit_idx, credit_idx = -1, -1
-        sub_header_row = parent_row + 1
-        for cell in table_cells:
-            logger.debug(f'text cell: {cell.text} - {cell.row}:{cell.col}')
-            if cell.row == sub_header_row and parent_col <= cell.col < (parent_col + parent_colspan):
-                text_low = cell.text.lower().strip() if cell.text else ""
-                if debit_kw in text_low and debit_idx == -1: 
+        for cell in grid.row_cells(parent_row + 1):
+            if parent_col <= cell.col < (parent_col + parent_colspan):
+                text_low = grid.lower(cell)
+                if debit_kw in text_low and debit_idx == -1:
                     debit_idx = cell.col
-                if credit_kw in text_low and credit_idx == -1 and cell.col != debit_idx: 
+                if credit_kw in text_low and credit_idx == -1 and cell.col != debit_idx:
                     credit_idx = cell.col
         return debit_idx, credit_idx
 
-    def extract_for_seller(self, seller_info: dict) -> list[dict]:
-        transactions_data = []
-        seller_names = set()
-        
-        if sr := seller_info.get('str_repr'):
+    @classmethod
+    def select_ocr_columns(cls, header: Table) -> typing.Optional[typing.Set[int]]:
+        """
+        Столбцы, которые читают extract_for_seller/extract_for_buyer: описание слева от дебета
+        и колонки Д/К под каждым заголовком «по данным ...» (продавца и покупателя - роли
+        на этапе распознавания ещё неизвестны). header - верхние строки таблицы с уже
+        распознанным текстом. None - заголовок не найден, нужны все столбцы.
+        Используется как column_selector ScanExtractor.
+        """
+        grid = TableGrid(header)
+        columns: typing.Set[int] = set()
+        for cell in grid.iter_cells():
+            if "по данным" not in grid.lower(cell):
+                continue
+            debit_col, credit_col = cls._find_debit_credit_columns_under_header(
+                grid, cell.row, cell.col, cell.colspan)
+            if debit_col == -1:
+                continue
+            columns.update(range(debit_col + 1))
+            if credit_col != -1:
+                columns.add(credit_col)
+        return columns or None
+
+    @staticmethod
+    def _party_names(party_info: dict) -> list[str]:
+        """Варианты написания имени организации для поиска в заголовках, от длинных к коротким."""
+        names = set()
+
+        if sr := party_info.get('str_repr'):
             sr_low = sr.lower()
-            seller_names.add(sr_low)
-            seller_names.add(sr_low.split(',')[0].strip())
-            seller_names.update(m.strip() for m in re.findall(r'\(([^,)]+)', sr_low) if m.strip() and len(m.strip()) > 1)
-        seller_names.update(cn.lower() for cn in seller_info.get('canonical_names', []))
-        
-        if raw_txt := seller_info.get('text'):
+            names.add(sr_low)
+            names.add(sr_low.split(',')[0].strip())
+            names.update(m.strip() for m in re.findall(r'\(([^,)]+)', sr_low) if m.strip() and len(m.strip()) > 1)
+        names.update(cn.lower() for cn in party_info.get('canonical_names', []))
+
+        if raw_txt := party_info.get('text'):
             raw_low = raw_txt.lower()
             core_raw = raw_low.split(',')[0].strip()
-            seller_names.add(core_raw)
-            if qm := re.search(r'["«“]([^"»”]+)["»”]', core_raw): 
-                seller_names.add(qm.group(1).strip())
-            seller_names.update(m.strip() for m in re.findall(r'\(([^,)]+)', raw_low) if m.strip() and len(m.strip()) > 1)
-        
-        sorted_seller_names = sorted([name for name in seller_names if name], key=len, reverse=True)
-        self.logger.debug(f"Варианты имени продавца для поиска: {sorted_seller_names}")
-
-        for tbl_idx, tbl in enumerate(self.doc.get_tables()):
-            self.logger.info(f"Анализ таблицы {tbl_idx + 1} для акта сверки продавца.")
-            main_hdr_cell: typing.Optional[Cell] = None
-            for cell in tbl.cells:
-                if not cell.text: 
-                    continue
-                cell_txt_low = cell.text.lower().strip()
-               
-                if "по данным продавца" in cell_txt_low: 
-                    main_hdr_cell = cell 
-                    break
-               
-                if "по данным" in cell_txt_low and any(v in cell_txt_low for v in sorted_seller_names):
-                    main_hdr_cell = cell
-                    break
-            
-            if not main_hdr_cell:
-                self.logger.debug(f"Заголовок продавца не найден в табл. {tbl_idx + 1}.")
+            names.add(core_raw)
+            if qm := re.search(r'["«“]([^"»”]+)["»”]', core_raw):
+                names.add(qm.group(1).strip())
+            names.update(m.strip() for m in re.findall(r'\(([^,)]+)', raw_low) if m.strip() and len(m.strip()) > 1)
+
+        return sorted([name for name in names if name], key=len, reverse=True)
+
+    @staticmethod
+    def _find_party_headers(
+            grid: TableGrid,
+            seller_names: typing.Optional[list[str]],
+            buyer_names: typing.Optional[list[str]]
+    ) -> tuple[typing.Optional[Cell], typing.Optional[Cell]]:
+        """
+        Заголовки «по данным продавца/покупателя» за один проход по ячейкам таблицы.
+        Ещё не распознанные ячейки (LazyCell) пропускаются: это столбцы, которые
+        select_ocr_columns не выбрал, и обращение к их тексту запустило бы OCR.
+        Для роли, имена которой не заданы (None), заголовок не ищется.
+        """
+        seller_hdr: typing.Optional[Cell] = None
+        buyer_hdr: typing.Optional[Cell] = None
+        need_seller, need_buyer = seller_names is not None, buyer_names is not None
+        for cell in grid.iter_cells():
+            if not need_seller and not need_buyer:
+                break
+            if getattr(cell, 'pending', False):
+                continue
+            cell_txt_low = grid.lower(cell)
+            if "по данным" not in cell_txt_low:
                 continue
-            
-            self.logger.debug(f"Найден заголовок продавца: '{main_hdr_cell.text}' R{main_hdr_cell.row}C{main_hdr_cell.col}")
+            if need_seller and ("по данным продавца" in cell_txt_low or
+                                any(v in cell_txt_low for v in seller_names)):
+                seller_hdr, need_seller = cell, False
+            if need_buyer and ("по данным покупателя" in cell_txt_low or
+                               any(v in cell_txt_low for v in buyer_names)):
+                buyer_hdr, need_buyer = cell, False
+        return seller_hdr, buyer_hdr
 
-            debit_col, credit_col = self._find_debit_credit_columns_under_header(
-                tbl.cells, main_hdr_cell.row, main_hdr_cell.col, main_hdr_cell.colspan)
+    def _debit_credit_columns(self, grid: TableGrid, hdr: Cell, tbl_idx: int) -> typing.Optional[tuple[int, int]]:
+        debit_col, credit_col = self._find_debit_credit_columns_under_header(
+            grid, hdr.row, hdr.col, hdr.colspan)
 
-            cols_ok = (debit_col != -1 and (main_hdr_cell.colspan < 2 or credit_col != -1))
-            
-            if not cols_ok:
-                self.logger.warning(f"Не удалось идентифицировать Д/К колонки в табл. {tbl_idx + 1}.")
-                continue
-            
-            self.logger.info(f"Колонки продавца: Дебет(C{debit_col})" + (f", Кредит(C{credit_col})" if credit_col!=-1 else ""))
-            
-            rows_map: typing.Dict[int, typing.Dict[int, str]] = {}
-            for cell in tbl.cells:
-                if cell.row not in rows_map: 
-                    rows_map[cell.row] = {}
-                
-                rows_map[cell.row][cell.col] = cell.text.strip() if cell.text else ""
-
-            data_start_row = main_hdr_cell.row + 2
-            # добавил запоминание контекст "год", так как есть документы
-            # где указан только месяц
-            last_known_year_in_table: typing.Optional[int] = None
-
-            for r_idx in sorted(rows_map.keys()):
-                
-                if r_idx < data_start_row: 
-                    continue
-                
-                row_data = rows_map[r_idx]
-                desc = " ".join(filter(None, (row_data.get(c_idx, "") for c_idx in range(debit_col)))).strip()
-
-
-                date_val_str = None 
-                if desc:
-                    # Передаем last_known_year_in_table как контекст
-                    date_info = extract_date_from_text(desc, self.logger, context_year=last_known_year_in_table)
-                    if date_info:
-                        date_val_str = date_info['formatted_str']
-                        # Обновляем контекстный год, если извлеченная дата содержала год
-                        if date_info.get('year') and date_info['year'] > 0: # Убедимся, что год валидный
-                            last_known_year_in_table = date_info['year']
-                
-                debit_val = format_currency_value(row_data.get(debit_col, ""))
-                credit_val = format_currency_value(row_data.get(credit_col, "")) if credit_col != -1 else ""
-                
-                transactions_data.append({
-                    "table_idx": tbl_idx, 
-                    "row_idx": r_idx, 
-                    "record": desc,
-                    "date": date_val_str, 
-                    "debit": debit_val, 
-                    "credit": credit_val
-                })
-                self.logger.info(f"  Т{tbl_idx}R{r_idx}: Оп='{desc}', Дата={date_val_str or None}, Д={debit_val}, К={credit_val}")
-        return transactions_data
-    
-    def extract_for_buyer(self, buyer_info: dict) -> list[dict]:
+        cols_ok = (debit_col != -1 and (hdr.colspan < 2 or credit_col != -1))
+
+        if not cols_ok:
+            self.logger.warning(f"Не удалось идентифицировать Д/К колонки в табл. {tbl_idx + 1}.")
+            return None
+        return debit_col, credit_col
+
+    def _seller_rows(self, grid: TableGrid, tbl_idx: int, main_hdr_cell: Cell) -> list[dict]:
+        self.logger.debug(f"Найден заголовок продавца: '{main_hdr_cell.text}' R{main_hdr_cell.row}C{main_hdr_cell.col}")
+
+        columns = self._debit_credit_columns(grid, main_hdr_cell, tbl_idx)
+        if columns is None:
+            return []
+        debit_col, credit_col = columns
+
+        self.logger.info(f"Колонки продавца: Дебет(C{debit_col})" + (f", Кредит(C{credit_col})" if credit_col!=-1 else ""))
 
         transactions_data = []
-        buyer_names = set()
-        
-        if sr := buyer_info.get('str_repr'):
-            sr_low = sr.lower()
-            buyer_names.add(sr_low)
-            buyer_names.add(sr_low.split(',')[0].strip())
-            buyer_names.update(m.strip() for m in re.findall(r'\(([^,)]+)', sr_low) if m.strip() and len(m.strip()) > 1)
-        buyer_names.update(cn.lower() for cn in buyer_info.get('canonical_names', []))
-        
-        if raw_txt := buyer_info.get('text'):
-            raw_low = raw_txt.lower()
-            core_raw = raw_low.split(',')[0].strip()
-            buyer_names.add(core_raw)
-            if qm := re.search(r'["«“]([^"»”]+)["»”]', core_raw): 
-                buyer_names.add(qm.group(1).strip())
-            buyer_names.update(m.strip() for m in re.findall(r'\(([^,)]+)', raw_low) if m.strip() and len(m.strip()) > 1)
-        
-        sorted_buyer_names = sorted([name for name in buyer_names if name], key=len, reverse=True)
-        self.logger.debug(f"Варианты имени покупателя для поиска: {sorted_buyer_names}")
-
-        for tbl_idx, tbl in enumerate(self.doc.get_tables()):
-            self.logger.info(f"Анализ таблицы {tbl_idx + 1} для акта сверки покупателя.")
-            main_hdr_cell: typing.Optional[Cell] = None
-            for cell in tbl.cells:
-                if not cell.text: 
-                    continue
-                cell_txt_low = cell.text.lower().strip()
-               
-                if "по данным покупателя" in cell_txt_low: 
-                    main_hdr_cell = cell 
-                    break
-               
-                if "по данным" in cell_txt_low and any(v in cell_txt_low for v in sorted_buyer_names):
-                    main_hdr_cell = cell
-                    break
-            
-            if not main_hdr_cell:
-                self.logger.debug(f"Заголовок плкупателя не найден в табл. {tbl_idx + 1}.")
-                continue
-            
-            self.logger.debug(f"Найден заголовок плкупателя: '{main_hdr_cell.text}' R{main_hdr_cell.row}C{main_hdr_cell.col}")
+        data_start_row = main_hdr_cell.row + 2
 
-            debit_col, credit_col = self._find_debit_credit_columns_under_header(
-                tbl.cells, main_hdr_cell.row, main_hdr_cell.col, main_hdr_cell.colspan)
+        # читаются только нужные столбцы: остальные ячейки скана могут быть ещё не распознаны (LazyCell)
+        data_rows = [r_idx for r_idx in grid.rows if r_idx >= data_start_row]
+        descs = [" ".join(filter(None, (grid.text_at(r_idx, c_idx) for c_idx in range(debit_col)))).strip()
+                 for r_idx in data_rows]
+        # даты всех строк - одним анализом Pullenti; год переносится со строки на строку,
+        # так как есть документы, где указан только месяц
+        dates = extract_dates_from_texts(descs, self.logger)
+
+        for r_idx, desc, date_info in zip(data_rows, descs, dates):
+            date_val_str = date_info['formatted_str'] if date_info else None
+
+            debit_val = format_currency_value(grid.text_at(r_idx, debit_col))
+            credit_val = format_currency_value(grid.text_at(r_idx, credit_col)) if credit_col != -1 else ""
 
-            cols_ok = (debit_col != -1 and (main_hdr_cell.colspan < 2 or credit_col != -1))
-            
-            if not cols_ok:
-                self.logger.warning(f"Не удалось идентифицировать Д/К колонки в табл. {tbl_idx + 1}.")
-                continue
-            
-            self.logger.info(f"Колонки покупателя: Дебет(C{debit_col})" + (f", Кредит(C{credit_col})" if credit_col!=-1 else ""))
             transactions_data.append({
-                "table" :  tbl_idx,
-                "col_debit": debit_col,
-                "col_credit": credit_col,
+                "table_idx": tbl_idx,
+                "row_idx": r_idx,
+                "record": desc,
+                "date": date_val_str,
+                "debit": debit_val,
+                "credit": credit_val
             })
-        return transactions_data
\ No newline at end of file
+            self.logger.info(f"  Т{tbl_idx}R{r_idx}: Оп='{desc}', Дата={date_val_str or None}, Д={debit_val}, К={credit_val}")
+        return transactions_data
+
+    def _buyer_columns(self, grid: TableGrid, tbl_idx: int, main_hdr_cell: Cell) -> list[dict]:
+        self.logger.debug(f"Найден заголовок плкупателя: '{main_hdr_cell.text}' R{main_hdr_cell.row}C{main_hdr_cell.col}")
+
+        columns = self._debit_credit_columns(grid, main_hdr_cell, tbl_idx)
+        if columns is None:
+            return []
+        debit_col, credit_col = columns
+
+        self.logger.info(f"Колонки покупателя: Дебет(C{debit_col})" + (f", Кредит(C{credit_col})" if credit_col!=-1 else ""))
+        return [{
+            "table" :  tbl_idx,
+            "col_debit": debit_col,
+            "col_credit": credit_col,
+        }]
+
+    def extract_for_parties(
+            self,
+            seller_info: typing.Optional[dict],
+            buyer_info: typing.Optional[dict],
+            tables: typing.Optional[typing.Iterable[Table]] = None
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Разбирает акт сверки для продавца и покупателя за один проход по каждой логической таблице:
+        индекс TableGrid строится один раз, заголовки обеих сторон ищутся одним обходом ячеек.
+        Сторона, для которой передан None, пропускается.
+        tables - логические таблицы для анализа (по умолчанию - все таблицы документа);
+        можно передать генератор (iter_logical_tables), тогда таблицы разбираются по мере готовности.
+
+        Returns:
+            (строки акта по данным продавца, колонки Д/К покупателя - как extract_for_buyer)
+        """
+        seller_names = self._party_names(seller_info) if seller_info is not None else None
+        buyer_names = self._party_names(buyer_info) if buyer_info is not None else None
+        if seller_names is not None:
+            self.logger.debug(f"Варианты имени продавца для поиска: {seller_names}")
+        if buyer_names is not None:
+            self.logger.debug(f"Варианты имени покупателя для поиска: {buyer_names}")
+
+        seller_data: list[dict] = []
+        buyer_data: list[dict] = []
+        if seller_names is None and buyer_names is None:
+            return seller_data, buyer_data
+
+        if tables is None:
+            tables = self.doc.get_tables()
+
+        for tbl_idx, tbl in enumerate(tables):
+            self.logger.info(f"Анализ таблицы {tbl_idx + 1} для акта сверки.")
+            grid = TableGrid(tbl)
+            seller_hdr, buyer_hdr = self._find_party_headers(grid, seller_names, buyer_names)
+
+            if seller_names is not None:
+                if seller_hdr is None:
+                    self.logger.debug(f"Заголовок продавца не найден в табл. {tbl_idx + 1}.")
+                else:
+                    seller_data.extend(self._seller_rows(grid, tbl_idx, seller_hdr))
+
+            if buyer_names is not None:
+                if buyer_hdr is None:
+                    self.logger.debug(f"Заголовок плкупателя не найден в табл. {tbl_idx + 1}.")
+                else:
+                    buyer_data.extend(self._buyer_columns(grid, tbl_idx, buyer_hdr))
+        return seller_data, buyer_data
+
+    def extract_for_seller(self, seller_info: dict, tables: typing.Optional[typing.Iterable[Table]] = None) -> list[dict]:
+        """
+        Извлекает строки акта сверки по данным продавца (см. extract_for_parties).
+        """
+        return self.extract_for_parties(seller_info, None, tables)[0]
+
+    def extract_for_buyer(self, buyer_info: dict, tables: typing.Optional[typing.Iterable[Table]] = None) -> list[dict]:
+        """
+        Находит колонки дебета/кредита по данным покупателя (см. extract_for_parties).
+        """
+        return self.extract_for_parties(None, buyer_info, tables)[1]
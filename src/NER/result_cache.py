@@ -0,0 +1,56 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Потокобезопасный кэш результатов в памяти с вытеснением давно не использованных
+    записей (LRU) и счётчиками обращений.
+
+    copy_fn применяется к значению при записи и при каждом чтении, чтобы вызывающий
+    код, изменяющий полученный результат, не портил запись в кэше (например, copy.deepcopy
+    для списков словарей).
+    """
+    def __init__(self, capacity: int, copy_fn: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            capacity: наибольшее число записей; 0 - кэш отключён.
+            copy_fn: копирование значения при записи и чтении (None - значение хранится как есть).
+        """
+        self.capacity = capacity
+        self.copy_fn = copy_fn
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение по ключу (запись становится самой свежей) или default."""
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.stats["misses"] += 1
+                return default
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+        # записи не изменяются, поэтому копируются вне блокировки
+        return self.copy_fn(value) if self.copy_fn else value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.copy_fn:
+            value = self.copy_fn(value)
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > max(self.capacity, 0):
+                self._items.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
@@ -1,15 +1,18 @@
+import bisect
+import copy
 import logging
 import re
 import typing
 import datetime
 
-from pullenti.ner.ProcessorService import ProcessorService
 from pullenti.ner.Referent import Referent
 from pullenti.ner.SourceOfAnalysis import SourceOfAnalysis
 from pullenti.ner.date.DateAnalyzer import DateAnalyzer
 from pullenti.ner.date.DateRangeReferent import DateRangeReferent
 from pullenti.ner.date.DateReferent import DateReferent
 
+from .processor_pool import get_processor_pool
+from .result_cache import LRUCache
 
 def get_quarter_end_date(year: int, quarter: int) -> typing.Optional[datetime.date]:
     """Возвращает последний день указанного квартала."""
@@ -26,27 +29,52 @@ def get_quarter_end_date(year: int, quarter: int) -> typing.Optional[datetime.da
         return datetime.date(year, 12, 31)
     return None
 
-def extract_date_from_text(
-    txt: str, 
-    logger: logging.Logger, 
-    context_year: typing.Optional[int] = None
-) -> typing.Optional[dict]:
+# Числовая дата дд.мм.гггг / дд.мм.гг, не часть более длинного числа
+_NUMERIC_DATE_RE = re.compile(r"(?<![\d.,/])(\d{1,2})\.(\d{1,2})\.(\d{4}|\d{2})(?!\d|[.,/]\d)")
+# Признаки текста, который разбирает только Pullenti: кварталы, названия месяцев,
+# вторая дата или период (дефис у числа)
+_NOT_NUMERIC_DATE_RE = re.compile(
+    r"кв\.|квартал|\b(?:янв|фев|мар|апр|ма[йяе]|июн|июл|авг|сен|окт|ноя|дек)|\d\s*[-–—]|[-–—]\s*\d|\d[./]\d",
+    re.IGNORECASE)
+# Предлог перед датой, с которым Pullenti строит период: "по 31.03.2024", "до 31.03.2024"
+_RANGE_PREFIX_RE = re.compile(r"(?:^|[^\w])(?:по|до|с|со)\s*\(?\s*$", re.IGNORECASE)
+# Двузначный год не больше порога - 20xx, иначе 19xx. Pullenti (DateItemToken.year) берёт
+# порог от текущей даты; здесь он постоянный, чтобы результат и кэш не зависели от дня запуска.
+TWO_DIGIT_YEAR_PIVOT = 40
+
+def parse_numeric_date(txt: str) -> typing.Optional[dict]:
     """
-    Извлекает дату из текста.
-    Сначала пытается найти кварталы регулярным выражением.
-    Затем использует Pullenti.
-    Приоритеты:
-    1. Конец квартала (из regex или Pullenti).
-    2. Полная дата (дд.мм.гггг) из Pullenti.
-    3. Месяц и год (мм.гггг) из Pullenti (день по умолчанию 1).
-    4. День и месяц (дд.мм) из Pullenti + context_year.
-    5. Только месяц (мм) из Pullenti (день по умолчанию 1) + context_year.
+    Быстрый разбор строки акта с одной числовой датой ("05.05.2024", "от 05.05.24",
+    "Продажа (05.05.2024 № 123)") без Pullenti. Двузначный год - по TWO_DIGIT_YEAR_PIVOT.
+    Результат в формате extract_date_from_text; None - строку
+    нужно разбирать полностью (кварталы, месяцы словами, периоды, несколько дат,
+    несуществующая дата).
     """
-    potential_dates_info = []
-    if not txt:
+    match = _NUMERIC_DATE_RE.search(txt)
+    if match is None or _RANGE_PREFIX_RE.search(txt, 0, match.start()):
         return None
+    if _NOT_NUMERIC_DATE_RE.search(txt[:match.start()] + " " + txt[match.end():]):
+        return None
+    day, month, year = (int(g) for g in match.groups())
+    if len(match.group(3)) == 2:
+        if year == 0:
+            return None
+        year += 2000 if year <= TWO_DIGIT_YEAR_PIVOT else 1900
+    elif not 1900 <= year <= 2099:
+        return None
+    try:
+        datetime.date(year, month, day)
+    except ValueError:
+        return None
+    return {'day': day, 'month': month, 'year': year, 'formatted_str': f"{day:02d}.{month:02d}.{year:04d}"}
 
-    # --- Шаг 1: Поиск кварталов регулярным выражением ---
+def _regex_quarter_dates(
+    txt: str,
+    logger: logging.Logger,
+    context_year: typing.Optional[int]
+) -> typing.List[dict]:
+    """Шаг 1 extract_date_from_text: кварталы, найденные регулярным выражением (нужен context_year)."""
+    potential_dates_info = []
     # Паттерны для кварталов: "1 квартал", "1-й квартал", "I квартал", "1 кв." и т.д.
     # Учитываем возможные вариации написания.
     quarter_patterns = [
@@ -89,76 +117,76 @@ def extract_date_from_text(
                         break # Достаточно одного совпадения квартала по regex
             if found_quarter_by_regex:
                 break
-    
-    # --- Шаг 2: Анализ с помощью Pullenti (если regex не нашел квартал или для других типов дат) ---
-    # Можно добавить условие not found_quarter_by_regex, если хотим, чтобы Pullenti не запускался,
-    # если regex уже нашел квартал. Но Pullenti может найти более точную полную дату.
-    # Поэтому оставим Pullenti работать всегда, но приоритет отдадим regex-кварталу, если он есть.
+    return potential_dates_info
 
-    try:
-        with ProcessorService.create_specific_processor(DateAnalyzer.ANALYZER_NAME) as proc:
-            analysis_result = proc.process(SourceOfAnalysis(txt))
-            entities: typing.List[Referent] = analysis_result.entities
-            
-            logger.debug(f"Анализ текста '{txt}' дал {len(entities)} сущностей Pullenti.")
-            for i, entity in enumerate(entities):
-                # ... (остальная логика Pullenti из предыдущего ответа остается здесь) ...
-                # Логика извлечения DateReferent и DateRangeReferent (включая кварталы от Pullenti)
-                logger.debug(f"  Сущность {i}: {type(entity).__name__} - '{str(entity)}'")
-                
-                date_ref: typing.Optional[DateReferent] = None
-                is_quarter_range_pullenti = False
-                quarter_num_pullenti = 0
-                quarter_year_candidate_pullenti = 0
-
-                if isinstance(entity, DateRangeReferent):
-                    logger.debug(f"    Pullenti DateRangeReferent: Q={entity.quarter}, From={entity.date_from}, To={entity.date_to}")
-                    if entity.quarter > 0:
-                        is_quarter_range_pullenti = True
-                        quarter_num_pullenti = entity.quarter
-                        if entity.date_to and entity.date_to.year > 0:
-                            quarter_year_candidate_pullenti = entity.date_to.year
-                        elif entity.date_from and entity.date_from.year > 0:
-                            quarter_year_candidate_pullenti = entity.date_from.year
-                        logger.debug(f"    Pullenti обнаружил квартал Q{quarter_num_pullenti}. Кандидат года: {quarter_year_candidate_pullenti}")
-                    elif entity.date_from:
-                        date_ref = entity.date_from
-                elif isinstance(entity, DateReferent):
-                    date_ref = entity
-                
-                if is_quarter_range_pullenti:
-                    year_for_quarter_pullenti = quarter_year_candidate_pullenti if quarter_year_candidate_pullenti > 0 else context_year
-                    if year_for_quarter_pullenti and year_for_quarter_pullenti > 0:
-                        quarter_end_dt_pullenti = get_quarter_end_date(year_for_quarter_pullenti, quarter_num_pullenti)
-                        if quarter_end_dt_pullenti:
-                            potential_dates_info.append({
-                                'day': quarter_end_dt_pullenti.day, 
-                                'month': quarter_end_dt_pullenti.month, 
-                                'year': quarter_end_dt_pullenti.year, 
-                                'type': 'quarter_end_pullenti'
-                            })
-                            logger.debug(f"    Pullenti добавил дату конца квартала: {quarter_end_dt_pullenti} (год {year_for_quarter_pullenti})")
-                elif date_ref:
-                    p_day = date_ref.day if date_ref.day > 0 else 0
-                    p_month = date_ref.month if date_ref.month > 0 else 0
-                    p_year = date_ref.year if date_ref.year > 0 else 0
-
-                    if p_month > 0:
-                        if p_year > 0:
-                            if p_day > 0:
-                                potential_dates_info.append({'day': p_day, 'month': p_month, 'year': p_year, 'type': 'full_dmy_pullenti'})
-                            else:
-                                potential_dates_info.append({'day': 1, 'month': p_month, 'year': p_year, 'type': 'month_year_pullenti'})
-                        else: 
-                            if p_day > 0:
-                                potential_dates_info.append({'day': p_day, 'month': p_month, 'year': None, 'type': 'day_month_only_pullenti'})
-                            else:
-                                potential_dates_info.append({'day': 1, 'month': p_month, 'year': None, 'type': 'month_only_pullenti'})
+def _pullenti_dates(
+    entities: typing.List[Referent],
+    logger: logging.Logger,
+    context_year: typing.Optional[int]
+) -> typing.List[dict]:
+    """Шаг 2 extract_date_from_text: кандидаты из DateReferent/DateRangeReferent Pullenti."""
+    potential_dates_info = []
+    for i, entity in enumerate(entities):
+        # Логика извлечения DateReferent и DateRangeReferent (включая кварталы от Pullenti)
+        logger.debug(f"  Сущность {i}: {type(entity).__name__} - '{str(entity)}'")
+        
+        date_ref: typing.Optional[DateReferent] = None
+        is_quarter_range_pullenti = False
+        quarter_num_pullenti = 0
+        quarter_year_candidate_pullenti = 0
 
-    except Exception as e_pullenti:
-        logger.exception(f"Ошибка при обработке текста '{txt}' с Pullenti: {e_pullenti}")
-        # Не прерываем выполнение, если Pullenti упал, regex мог уже что-то найти
+        if isinstance(entity, DateRangeReferent):
+            logger.debug(f"    Pullenti DateRangeReferent: Q={entity.quarter}, From={entity.date_from}, To={entity.date_to}")
+            if entity.quarter > 0:
+                is_quarter_range_pullenti = True
+                quarter_num_pullenti = entity.quarter
+                if entity.date_to and entity.date_to.year > 0:
+                    quarter_year_candidate_pullenti = entity.date_to.year
+                elif entity.date_from and entity.date_from.year > 0:
+                    quarter_year_candidate_pullenti = entity.date_from.year
+                logger.debug(f"    Pullenti обнаружил квартал Q{quarter_num_pullenti}. Кандидат года: {quarter_year_candidate_pullenti}")
+            elif entity.date_from:
+                date_ref = entity.date_from
+        elif isinstance(entity, DateReferent):
+            date_ref = entity
+        
+        if is_quarter_range_pullenti:
+            year_for_quarter_pullenti = quarter_year_candidate_pullenti if quarter_year_candidate_pullenti > 0 else context_year
+            if year_for_quarter_pullenti and year_for_quarter_pullenti > 0:
+                quarter_end_dt_pullenti = get_quarter_end_date(year_for_quarter_pullenti, quarter_num_pullenti)
+                if quarter_end_dt_pullenti:
+                    potential_dates_info.append({
+                        'day': quarter_end_dt_pullenti.day, 
+                        'month': quarter_end_dt_pullenti.month, 
+                        'year': quarter_end_dt_pullenti.year, 
+                        'type': 'quarter_end_pullenti'
+                    })
+                    logger.debug(f"    Pullenti добавил дату конца квартала: {quarter_end_dt_pullenti} (год {year_for_quarter_pullenti})")
+        elif date_ref:
+            p_day = date_ref.day if date_ref.day > 0 else 0
+            p_month = date_ref.month if date_ref.month > 0 else 0
+            p_year = date_ref.year if date_ref.year > 0 else 0
+
+            if p_month > 0:
+                if p_year > 0:
+                    if p_day > 0:
+                        potential_dates_info.append({'day': p_day, 'month': p_month, 'year': p_year, 'type': 'full_dmy_pullenti'})
+                    else:
+                        potential_dates_info.append({'day': 1, 'month': p_month, 'year': p_year, 'type': 'month_year_pullenti'})
+                else: 
+                    if p_day > 0:
+                        potential_dates_info.append({'day': p_day, 'month': p_month, 'year': None, 'type': 'day_month_only_pullenti'})
+                    else:
+                        potential_dates_info.append({'day': 1, 'month': p_month, 'year': None, 'type': 'month_only_pullenti'})
+    return potential_dates_info
 
+def _choose_date(
+    txt: str,
+    potential_dates_info: typing.List[dict],
+    logger: logging.Logger,
+    context_year: typing.Optional[int]
+) -> typing.Optional[dict]:
+    """Выбор даты из кандидатов по приоритетам extract_date_from_text."""
     if not potential_dates_info:
         logger.debug(f"Для текста '{txt}' не найдено потенциальных дат (regex и Pullenti).")
         return None
@@ -219,6 +247,180 @@ def extract_date_from_text(
         logger.debug(f"Не удалось окончательно определить дату из '{txt}'. Лучший кандидат: {best_date_components}, Контекстный год: {context_year}")
         return None
 
+# Результаты разбора строк Pullenti: ключ - _cache_key (текст без лишних пробелов, context_year)
+_date_cache = LRUCache(capacity=10000, copy_fn=copy.copy)
+_NOT_CACHED = object()
+
+def get_date_cache() -> LRUCache:
+    """Общий для процесса кэш дат extract_date_from_text/extract_dates_from_texts."""
+    return _date_cache
+
+def _cache_key(txt: str, context_year: typing.Optional[int]) -> typing.Tuple[str, typing.Optional[int]]:
+    # пробелы нормализуются только в ключе, Pullenti получает исходный текст
+    return " ".join(txt.split()), context_year
+
+def extract_date_from_text(
+    txt: str, 
+    logger: logging.Logger, 
+    context_year: typing.Optional[int] = None
+) -> typing.Optional[dict]:
+    """
+    Извлекает дату из текста.
+    Сначала пытается найти кварталы регулярным выражением.
+    Затем использует Pullenti.
+    Приоритеты:
+    1. Конец квартала (из regex или Pullenti).
+    2. Полная дата (дд.мм.гггг) из Pullenti.
+    3. Месяц и год (мм.гггг) из Pullenti (день по умолчанию 1).
+    4. День и месяц (дд.мм) из Pullenti + context_year.
+    5. Только месяц (мм) из Pullenti (день по умолчанию 1) + context_year.
+    Результаты разбора, которому нужен Pullenti, кэшируются (get_date_cache);
+    строки, отличающиеся только пробелами, разделяют запись кэша.
+    """
+    if not txt or txt.isspace():
+        return None
+
+    # --- Шаг 0: одна числовая дата - без Pullenti ---
+    date_info = parse_numeric_date(txt)
+    if date_info:
+        logger.debug(f"Извлечена дата: {date_info['formatted_str']} из '{txt}' (тип: numeric_fast_path)")
+        return date_info
+
+    key = _cache_key(txt, context_year)
+    date_info = _date_cache.get(key, _NOT_CACHED)
+    if date_info is _NOT_CACHED:
+        date_info = _extract_date_with_pullenti(txt, logger, context_year)
+        _date_cache.put(key, date_info)
+    return date_info
+
+def _extract_date_with_pullenti(
+    txt: str,
+    logger: logging.Logger,
+    context_year: typing.Optional[int]
+) -> typing.Optional[dict]:
+    # --- Шаг 1: Поиск кварталов регулярным выражением ---
+    potential_dates_info = _regex_quarter_dates(txt, logger, context_year)
+
+    # --- Шаг 2: Анализ с помощью Pullenti (если regex не нашел квартал или для других типов дат) ---
+    # Pullenti работает всегда (может найти более точную полную дату), но приоритет
+    # отдаётся regex-кварталу, если он есть.
+    try:
+        # только DateAnalyzer и его зависимости - остальной NER-стек для дат не нужен
+        with get_processor_pool().acquire(DateAnalyzer.ANALYZER_NAME, minimal=True) as proc:
+            entities: typing.List[Referent] = proc.process(SourceOfAnalysis(txt)).entities
+        logger.debug(f"Анализ текста '{txt}' дал {len(entities)} сущностей Pullenti.")
+        potential_dates_info.extend(_pullenti_dates(entities, logger, context_year))
+    except Exception as e_pullenti:
+        logger.exception(f"Ошибка при обработке текста '{txt}' с Pullenti: {e_pullenti}")
+        # Не прерываем выполнение, если Pullenti упал, regex мог уже что-то найти
+
+    return _choose_date(txt, potential_dates_info, logger, context_year)
+
+# Разделитель строк таблицы при пакетном анализе: переводов строк Pullenti не учитывает
+# и может собрать, например, период "с 01.01.2024" / "по 31.03.2024" из соседних строк,
+# а строка с точкой с запятой разделяет их. Точка не подходит: Pullenti присоединяет её
+# к сокращению в конце строки ("2024 г" -> "г.", "дек" -> "дек."), и вхождение даты
+# выходит за границу строки.
+ROW_SEPARATOR = "\n;\n"
+
+def _entities_by_row(texts: typing.List[str]) -> typing.List[typing.List[Referent]]:
+    """
+    Один проход Pullenti по всем строкам, склеенным через ROW_SEPARATOR. Сущности
+    раскладываются по строкам по смещениям вхождений (одна сущность Pullenti может
+    встречаться в нескольких строках), внутри строки - в порядке списка entities.
+    """
+    if not any(texts):
+        return [[] for _ in texts]
+    starts = []
+    pos = 0
+    for txt in texts:
+        starts.append(pos)
+        pos += len(txt) + len(ROW_SEPARATOR)
+
+    with get_processor_pool().acquire(DateAnalyzer.ANALYZER_NAME, minimal=True) as proc:
+        entities: typing.List[Referent] = proc.process(SourceOfAnalysis(ROW_SEPARATOR.join(texts))).entities
+
+    by_row: typing.List[typing.List[Referent]] = [[] for _ in texts]
+    for entity in entities:
+        rows = set()
+        for occ in entity.occurrence:
+            row = bisect.bisect_right(starts, occ.begin_char) - 1
+            # вхождение через разделитель строке не принадлежит
+            if occ.end_char < starts[row] + len(texts[row]):
+                rows.add(row)
+        for row in rows:
+            by_row[row].append(entity)
+    return by_row
+
+def extract_dates_from_texts(
+    texts: typing.List[str],
+    logger: logging.Logger,
+    context_year: typing.Optional[int] = None
+) -> typing.List[typing.Optional[dict]]:
+    """
+    Даты для строк таблицы (как extract_date_from_text для каждой строки), но с одним
+    анализом Pullenti на все строки, которые не разобрал parse_numeric_date. Год
+    переносится между строками: год последней найденной даты служит context_year
+    для следующих строк, где указан только месяц или день и месяц. context_year -
+    год до первой строки.
+
+    Returns:
+        список той же длины, что texts; None - дата в строке не найдена.
+    """
+    texts = [txt if txt and not txt.isspace() else "" for txt in texts]
+    numeric_dates = [parse_numeric_date(txt) if txt else None for txt in texts]
+
+    # Предварительный проход: строки, которые разрешаются числовым разбором или кэшем
+    # с текущим годом контекста. Остальные (каждый текст один раз) разбираются одним
+    # проходом Pullenti; если год контекста по ходу таблицы окажется другим,
+    # строка разбирается отдельно через extract_date_from_text.
+    cached: typing.Dict[int, typing.Tuple[typing.Optional[int], typing.Optional[dict]]] = {}
+    slow_texts: typing.Dict[str, None] = {}
+    year = context_year
+    for i, txt in enumerate(texts):
+        if not txt:
+            continue
+        date_info = numeric_dates[i]
+        if not date_info:
+            date_info = _date_cache.get(_cache_key(txt, year), _NOT_CACHED)
+            if date_info is _NOT_CACHED:
+                slow_texts[txt] = None
+                continue
+            cached[i] = (year, date_info)
+        if date_info and date_info.get('year') and date_info['year'] > 0:
+            year = date_info['year']
+
+    try:
+        text_entities = dict(zip(slow_texts, _entities_by_row(list(slow_texts))))
+    except Exception as e_pullenti:
+        logger.exception(f"Ошибка пакетной обработки {len(slow_texts)} строк с Pullenti, разбор по строкам: {e_pullenti}")
+        text_entities = {}
+
+    results: typing.List[typing.Optional[dict]] = []
+    for i, txt in enumerate(texts):
+        if not txt:
+            results.append(None)
+            continue
+        if numeric_dates[i]:
+            date_info = numeric_dates[i]
+        elif i in cached and cached[i][0] == context_year:
+            date_info = cached[i][1]
+        elif txt in text_entities:
+            potential_dates_info = _regex_quarter_dates(txt, logger, context_year)
+            try:
+                potential_dates_info.extend(_pullenti_dates(text_entities[txt], logger, context_year))
+            except Exception as e_pullenti:
+                # как в extract_date_from_text: кандидаты regex остаются
+                logger.exception(f"Ошибка при обработке текста '{txt}' с Pullenti: {e_pullenti}")
+            date_info = _choose_date(txt, potential_dates_info, logger, context_year)
+            _date_cache.put(_cache_key(txt, context_year), date_info)
+        else:
+            date_info = extract_date_from_text(txt, logger, context_year=context_year)
+        results.append(date_info)
+        if date_info and date_info.get('year') and date_info['year'] > 0:
+            context_year = date_info['year']
+    return results
+
 def format_currency_value(value: str) -> str:
     text_to_process = value.strip()
     original_value_to_return = value
@@ -2,7 +2,12 @@ from abc import ABC
 from dataclasses import dataclass, field
 import enum
 import logging
-from typing import List, Optional, Tuple, Union
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
 from PIL import Image
 import pymupdf
 
@@ -10,8 +15,13 @@ from openpyxl import Workbook
 from openpyxl.utils import get_column_letter 
 from openpyxl.styles import Alignment, Border, Side 
 
+from .utils import DEFAULT_DPI
 
-@dataclass
+if TYPE_CHECKING:
+    from .document_cache import DocumentCache
+
+
+@dataclass(slots=True)
 class BBox:
     x1: int
     y1: int
@@ -76,13 +86,22 @@ class BBox:
             y2=int(y1 * sy),
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует объект в словарь для сериализации."""
+        return {"x1": self.x1, "y1": self.y1, "x2": self.x2, "y2": self.y2}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BBox":
+        """Создает объект из словаря."""
+        return cls(**data)
+
 class InsertionPosition(enum.Enum):
     TOP = "top"  # Сверху
     BOTTOM = "bottom" # Снизу
     LEFT = "left"
     RIGHT = "right"
 
-@dataclass
+@dataclass(slots=True)
 class Cell:
     bbox: BBox
     row: int
@@ -93,6 +112,33 @@ class Cell:
     blobs: List[BBox] = field(default_factory=list)
     original_page_num: Optional[int] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует объект в словарь для сериализации."""
+        return {
+            "bbox": self.bbox.to_dict(),
+            "row": self.row,
+            "col": self.col,
+            "colspan": self.colspan,
+            "rowspan": self.rowspan,
+            "text": self.text,
+            "blobs": [b.to_dict() for b in self.blobs],
+            "original_page_num": self.original_page_num,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Cell":
+        """Создает объект из словаря."""
+        return cls(
+            bbox=BBox.from_dict(data["bbox"]),
+            row=data["row"],
+            col=data["col"],
+            colspan=data["colspan"],
+            rowspan=data["rowspan"],
+            text=data.get("text"),
+            blobs=[BBox.from_dict(b) for b in data.get("blobs", [])],
+            original_page_num=data.get("original_page_num"),
+        )
+
     @property
     def has_text(self) -> bool:
         """Проверяет, содержит ли ячейка текст (на основе атрибута text или blobs)."""
@@ -192,11 +238,328 @@ class Cell:
 
         return None
 
-@dataclass
+class LazyCell(Cell):
+    """
+    Ячейка, текст и blobs которой распознаются при первом обращении к text/blobs.
+    loader возвращает (text, blobs); вызывается один раз (при одновременном первом
+    обращении из нескольких потоков - возможно, повторно).
+    Явное присваивание text отменяет распознавание. При pickle ячейка распознаётся
+    и сохраняется как обычная Cell; to_dict и сравнение тоже читают text, поэтому
+    сериализация распознаёт всё.
+    """
+    __slots__ = ('_loader', '_text', '_blobs')
+
+    def __init__(self, *args, loader: Callable[[], Tuple[str, List[BBox]]], **kwargs):
+        super().__init__(*args, **kwargs)
+        # присваивания в Cell.__init__ сбрасывают загрузчик, поэтому он задаётся последним
+        self._loader = loader
+
+    @property
+    def pending(self) -> bool:
+        """Текст ещё не распознан."""
+        return getattr(self, '_loader', None) is not None
+
+    def _resolve(self) -> None:
+        # Без блокировки: ячейки распознаются параллельно, а при одновременном обращении
+        # к одной ячейке из двух потоков она распознаётся дважды с одинаковым результатом.
+        loader = getattr(self, '_loader', None)
+        if loader is None:
+            return
+        text, blobs = loader()
+        # text могли присвоить явно, пока шло распознавание
+        if getattr(self, '_loader', None) is loader:
+            self._text, self._blobs = text, list(blobs)
+            self._loader = None
+
+    @property
+    def text(self) -> str:
+        self._resolve()
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+        self._loader = None
+
+    @property
+    def blobs(self) -> List[BBox]:
+        self._resolve()
+        return self._blobs
+
+    @blobs.setter
+    def blobs(self, value: List[BBox]) -> None:
+        self._blobs = value
+
+    def __eq__(self, other):
+        return _cells_equal(self, other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _plain_cell_reduce(self)
+
+
+class CellView(Cell):
+    """
+    Ячейка логической таблицы: исходная ячейка фрагмента со сдвигом строки на row_offset.
+    Геометрия, текст и blobs не копируются, а читаются из исходной ячейки (изменения
+    text/blobs видны в обе стороны); отложенная ячейка (LazyCell) остаётся отложенной.
+    При pickle сохраняется как обычная Cell.
+    """
+    __slots__ = ('_source', '_row_offset', '_original_page_num')
+
+    def __init__(self, source: Cell, row_offset: int, original_page_num: Optional[int] = None):
+        self._source = source
+        self._row_offset = row_offset
+        self._original_page_num = original_page_num
+
+    @property
+    def source(self) -> Cell:
+        """Ячейка фрагмента таблицы на странице."""
+        return self._source
+
+    @property
+    def bbox(self) -> BBox:
+        return self._source.bbox
+
+    @property
+    def row(self) -> int:
+        return self._source.row + self._row_offset
+
+    @property
+    def col(self) -> int:
+        return self._source.col
+
+    @property
+    def colspan(self) -> int:
+        return self._source.colspan
+
+    @property
+    def rowspan(self) -> int:
+        return self._source.rowspan
+
+    @property
+    def text(self) -> str:
+        return self._source.text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._source.text = value
+
+    @property
+    def blobs(self) -> List[BBox]:
+        return self._source.blobs
+
+    @blobs.setter
+    def blobs(self, value: List[BBox]) -> None:
+        self._source.blobs = value
+
+    @property
+    def original_page_num(self) -> Optional[int]:
+        return self._original_page_num
+
+    @original_page_num.setter
+    def original_page_num(self, value: Optional[int]) -> None:
+        self._original_page_num = value
+
+    @property
+    def pending(self) -> bool:
+        """Текст исходной ячейки ещё не распознан (см. LazyCell.pending)."""
+        return getattr(self._source, 'pending', False)
+
+    def __eq__(self, other):
+        return _cells_equal(self, other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _plain_cell_reduce(self)
+
+
+def _plain_cell_reduce(cell: Cell) -> Tuple[type, Tuple]:
+    # ячейки-представления передаются между процессами и в кэши как обычные Cell
+    return Cell, (cell.bbox, cell.row, cell.col, cell.colspan, cell.rowspan,
+                  cell.text, list(cell.blobs), cell.original_page_num)
+
+
+def _cells_equal(a: Cell, b: Any) -> bool:
+    # dataclass сравнивает только объекты одного класса; ячейки-наследники сравниваются
+    # с обычной Cell по содержимому
+    if not isinstance(b, Cell):
+        return NotImplemented
+    return a.to_dict() == b.to_dict()
+
+
+class ColumnarCell(Cell):
+    """
+    Лёгкое представление i-й ячейки ColumnarCells: поля читаются из массивов хранилища.
+    bbox и blobs создаются при каждом обращении (blobs - копия: изменить можно только
+    присваиванием), text и blobs записываются обратно в хранилище.
+    """
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: "ColumnarCells", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def bbox(self) -> BBox:
+        x1, y1, x2, y2 = self._store.bboxes[self._index].tolist()
+        return BBox(x1, y1, x2, y2)
+
+    @property
+    def row(self) -> int:
+        return int(self._store.rows[self._index])
+
+    @property
+    def col(self) -> int:
+        return int(self._store.cols[self._index])
+
+    @property
+    def colspan(self) -> int:
+        return int(self._store.colspans[self._index])
+
+    @property
+    def rowspan(self) -> int:
+        return int(self._store.rowspans[self._index])
+
+    @property
+    def text(self) -> str:
+        return self._store.texts[self._index]
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._store.texts[self._index] = value
+
+    @property
+    def blobs(self) -> List[BBox]:
+        return self._store.get_blobs(self._index)
+
+    @blobs.setter
+    def blobs(self, value: List[BBox]) -> None:
+        self._store.set_blobs(self._index, value)
+
+    @property
+    def original_page_num(self) -> Optional[int]:
+        page_num = int(self._store.page_nums[self._index])
+        return None if page_num < 0 else page_num
+
+    def __eq__(self, other):
+        return _cells_equal(self, other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _plain_cell_reduce(self)
+
+
+class ColumnarCells(Sequence[Cell]):
+    """
+    Колоночное хранение ячеек таблицы (см. Table.to_columnar): координаты (n, 4), строки,
+    столбцы, объединения и номера страниц - массивы NumPy, blobs всех ячеек - общий массив
+    (m, 4) со смещениями blob_offsets. Элементы - ColumnarCell, создаваемые при обращении.
+    Состав ячеек неизменяем; при построении текст всех ячеек читается (LazyCell распознаются).
+    """
+    def __init__(self, cells: Iterable[Cell]):
+        cells = list(cells)
+        n = len(cells)
+        self.bboxes = np.array([c.bbox.coords for c in cells], dtype=np.int32).reshape(n, 4)
+        spans = np.array([(c.row, c.col, c.colspan, c.rowspan) for c in cells], dtype=np.int32).reshape(n, 4)
+        self.rows, self.cols, self.colspans, self.rowspans = (np.ascontiguousarray(a) for a in spans.T)
+        self.page_nums = np.array([-1 if c.original_page_num is None else c.original_page_num for c in cells],
+                                  dtype=np.int32)
+        self.texts: List[Optional[str]] = [c.text for c in cells]
+        blob_lists = [c.blobs for c in cells]
+        self.blob_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in blob_lists], out=self.blob_offsets[1:])
+        self.blob_boxes = np.array([b.coords for blobs in blob_lists for b in blobs], dtype=np.int32).reshape(-1, 4)
+        # blobs, присвоенные после построения (массив blob_boxes не перестраивается)
+        self._blob_overrides: Dict[int, List[BBox]] = {}
+
+    @classmethod
+    def from_arrays(cls, bboxes: np.ndarray, rows: np.ndarray, cols: np.ndarray, colspans: np.ndarray,
+                    rowspans: np.ndarray, page_nums: np.ndarray, texts: List[Optional[str]],
+                    blob_offsets: np.ndarray, blob_boxes: np.ndarray) -> "ColumnarCells":
+        """Хранилище из готовых массивов (например, при десериализации) без создания Cell."""
+        store = cls.__new__(cls)
+        store.bboxes = np.ascontiguousarray(bboxes, dtype=np.int32).reshape(-1, 4)
+        store.rows, store.cols, store.colspans, store.rowspans = (
+            np.ascontiguousarray(a, dtype=np.int32) for a in (rows, cols, colspans, rowspans))
+        store.page_nums = np.ascontiguousarray(page_nums, dtype=np.int32)
+        store.texts = list(texts)
+        store.blob_offsets = np.ascontiguousarray(blob_offsets, dtype=np.int64)
+        store.blob_boxes = np.ascontiguousarray(blob_boxes, dtype=np.int32).reshape(-1, 4)
+        store._blob_overrides = {}
+        return store
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ColumnarCell(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return ColumnarCell(self, index)
+
+    def __iter__(self) -> Iterator[Cell]:
+        for i in range(len(self)):
+            yield ColumnarCell(self, i)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, ColumnarCells)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def get_blobs(self, index: int) -> List[BBox]:
+        if index in self._blob_overrides:
+            return self._blob_overrides[index]
+        boxes = self.blob_boxes[self.blob_offsets[index]:self.blob_offsets[index + 1]].tolist()
+        return [BBox(x1, y1, x2, y2) for x1, y1, x2, y2 in boxes]
+
+    def set_blobs(self, index: int, blobs: List[BBox]) -> None:
+        self._blob_overrides[index] = blobs
+
+    @property
+    def nbytes(self) -> int:
+        """Размер числовых массивов в байтах (без строк текста)."""
+        return sum(a.nbytes for a in (self.bboxes, self.rows, self.cols, self.colspans, self.rowspans,
+                                      self.page_nums, self.blob_offsets, self.blob_boxes))
+
+
+@dataclass(slots=True)
 class Table:
     bbox: BBox
     cells: List[Cell] = field(default_factory=list)
     start_page_num: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует объект в словарь для сериализации."""
+        return {
+            "bbox": self.bbox.to_dict(),
+            "cells": [c.to_dict() for c in self.cells],
+            "start_page_num": self.start_page_num,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Table":
+        """Создает объект из словаря."""
+        return cls(
+            bbox=BBox.from_dict(data["bbox"]),
+            cells=[Cell.from_dict(c) for c in data.get("cells", [])],
+            start_page_num=data.get("start_page_num"),
+        )
+
+    def to_columnar(self) -> "Table":
+        """Копия таблицы с колоночным хранением ячеек (ColumnarCells)."""
+        if isinstance(self.cells, ColumnarCells):
+            return self
+        return Table(bbox=self.bbox, cells=ColumnarCells(self.cells), start_page_num=self.start_page_num)
+
     @property
     def average_blob_height(self) -> float:
         """
@@ -212,17 +575,109 @@ class Table:
             return 0.0
         return sum(all_blobs_heights) / len(all_blobs_heights)
 
+class TableGrid:
+    """
+    Индекс ячеек таблицы для поиска по координатам сетки.
+    cell_at(row, col) - ячейка, начинающаяся в (row, col); covering(row, col) - ячейка,
+    покрывающая позицию с учётом colspan/rowspan; row_cells(row) - ячейки строки по столбцам.
+    Нормализованный текст (text/lower) вычисляется при первом обращении к ячейке и
+    запоминается: отложенные ячейки (LazyCell) распознаются, только если их текст нужен.
+    Индекс строится по текущему составу table.cells и не отслеживает его изменения.
+    """
+    def __init__(self, table: Table):
+        self.table = table
+        self._anchors: Dict[Tuple[int, int], Cell] = {}
+        self._covered: Dict[Tuple[int, int], Cell] = {}
+        self._rows: Dict[int, List[Cell]] = {}
+        self._text: Dict[int, str] = {}
+        self._lower: Dict[int, str] = {}
+        for cell in table.cells:
+            # как и при построении словаря строк, более поздняя ячейка с той же позицией побеждает
+            self._anchors[(cell.row, cell.col)] = cell
+            self._rows.setdefault(cell.row, []).append(cell)
+            for r in range(cell.row, cell.row + max(cell.rowspan, 1)):
+                for c in range(cell.col, cell.col + max(cell.colspan, 1)):
+                    self._covered.setdefault((r, c), cell)
+        for row_cells in self._rows.values():
+            row_cells.sort(key=lambda c: c.col)
+        self.rows: List[int] = sorted(self._rows)
+        self.n_rows = max((c.row + max(c.rowspan, 1) for c in table.cells), default=0)
+        self.n_cols = _table_column_count(table)
+
+    def cell_at(self, row: int, col: int) -> Optional[Cell]:
+        """Ячейка, левый верхний угол которой находится в (row, col)."""
+        return self._anchors.get((row, col))
+
+    def covering(self, row: int, col: int) -> Optional[Cell]:
+        """Ячейка, покрывающая позицию (row, col), в том числе объединённая."""
+        return self._covered.get((row, col))
+
+    def row_cells(self, row: int) -> List[Cell]:
+        """Ячейки, начинающиеся в строке row, по возрастанию столбца."""
+        return self._rows.get(row, [])
+
+    def iter_cells(self) -> Iterator[Cell]:
+        """Ячейки построчно, внутри строки - по столбцам."""
+        for row in self.rows:
+            yield from self._rows[row]
+
+    def text(self, cell: Optional[Cell]) -> str:
+        """Текст ячейки без пробелов по краям ('' для отсутствующей ячейки или текста)."""
+        if cell is None:
+            return ""
+        key = id(cell)
+        value = self._text.get(key)
+        if value is None:
+            value = cell.text.strip() if cell.text else ""
+            self._text[key] = value
+        return value
+
+    def lower(self, cell: Optional[Cell]) -> str:
+        """Нормализованный текст ячейки для поиска по ключевым словам (нижний регистр)."""
+        if cell is None:
+            return ""
+        key = id(cell)
+        value = self._lower.get(key)
+        if value is None:
+            value = self.text(cell).lower()
+            self._lower[key] = value
+        return value
+
+    def text_at(self, row: int, col: int) -> str:
+        """Текст ячейки, начинающейся в (row, col)."""
+        return self.text(self._anchors.get((row, col)))
+
+
 class ParagraphType(enum.Enum):
     HEADER = 0
     FOOTER = 1
     NONE = 2
 
-@dataclass
+@dataclass(slots=True)
 class Paragraph:
     bbox: BBox
     type: ParagraphType = ParagraphType.NONE
     text: str = None
     blobs: List[BBox] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует объект в словарь для сериализации."""
+        return {
+            "bbox": self.bbox.to_dict(),
+            "type": self.type.name,
+            "text": self.text,
+            "blobs": [b.to_dict() for b in self.blobs],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Paragraph":
+        """Создает объект из словаря."""
+        return cls(
+            bbox=BBox.from_dict(data["bbox"]),
+            type=ParagraphType[data.get("type", ParagraphType.NONE.name)],
+            text=data.get("text"),
+            blobs=[BBox.from_dict(b) for b in data.get("blobs", [])],
+        )
     
 
 @dataclass
@@ -231,12 +686,173 @@ class Page:
     tables: List[Table] = field(default_factory=list)
     paragraphs: List[Paragraph] = field(default_factory=list)
     num_page: int = 0
+    # Текст ошибки, если страницу не удалось обработать (тогда она пустая)
+    error: Optional[str] = None
+    # Счётчики обработки страницы (например, сколько ячеек пропущено без OCR)
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует страницу в словарь для сериализации (изображение не сохраняется)."""
+        return {
+            "num_page": self.num_page,
+            "tables": [t.to_dict() for t in self.tables],
+            "paragraphs": [p.to_dict() for p in self.paragraphs],
+            "error": self.error,
+            "stats": dict(self.stats),
+        }
+
+    @property
+    def has_pending_cells(self) -> bool:
+        """На странице есть ещё не распознанные отложенные ячейки (LazyCell)."""
+        return any(getattr(c, 'pending', False) for t in self.tables for c in t.cells)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Page":
+        """Создает страницу из словаря."""
+        return cls(
+            tables=[Table.from_dict(t) for t in data.get("tables", [])],
+            paragraphs=[Paragraph.from_dict(p) for p in data.get("paragraphs", [])],
+            num_page=data.get("num_page", 0),
+            error=data.get("error"),
+            stats=dict(data.get("stats", {})),
+        )
+
+def _table_column_count(table_obj: Table) -> int:
+    """Количество столбцов таблицы с учётом colspan (0, если ячеек нет)."""
+    if not table_obj.cells:
+        return 0
+    max_col_idx = 0  # 0-indexed
+    for cell in table_obj.cells:
+        max_col_idx = max(max_col_idx, cell.col + cell.colspan - 1)
+    return max_col_idx + 1  # Return 1-indexed count
+
+
+class LogicalTableAssembler:
+    """
+    Постраничная сборка логических таблиц (см. Document.get_tables).
+    Страницы подаются по порядку через feed(); логическая таблица возвращается,
+    как только она завершена (встретился значимый параграф, новая таблица на той же
+    странице или фрагмент с другим числом столбцов). Остаток забирается через flush().
+    """
+    def __init__(self):
+        self._cells: List[Cell] = []
+        self._row_offset: int = 0
+        self._first_bbox: Optional[BBox] = None
+        # Page number of the first physical table fragment of the current logical table
+        self._start_page_num: Optional[int] = None
+        self._last_fragment_page_num: int = -1
+        self._column_count: int = -1
+
+    def feed(self, page: Page) -> List[Table]:
+        """Добавляет страницу и возвращает логические таблицы, завершённые на ней."""
+        elements = []
+        for p_obj in page.paragraphs:
+            elements.append(('paragraph', p_obj, p_obj.bbox.y1))
+        for t_obj in page.tables:
+            if t_obj.cells:
+                elements.append(('table', t_obj, t_obj.bbox.y1))
+        elements.sort(key=lambda x: x[2])
+
+        completed: List[Table] = []
+        for el_type, el_obj, _ in elements:
+            if el_type == 'paragraph':
+                para: Paragraph = el_obj
+                if para.type != ParagraphType.HEADER and para.type != ParagraphType.FOOTER:
+                    completed.extend(self.flush())
+            else:
+                completed.extend(self._add_fragment(el_obj, page.num_page))
+        return completed
+
+    def flush(self) -> List[Table]:
+        """Завершает текущую логическую таблицу (если она есть)."""
+        completed: List[Table] = []
+        if self._cells and self._first_bbox is not None:
+            completed.append(Table(
+                bbox=self._first_bbox,
+                cells=list(self._cells),
+                start_page_num=self._start_page_num
+            ))
+        self._cells.clear()
+        self._row_offset = 0
+        self._first_bbox = None
+        self._start_page_num = None
+        self._last_fragment_page_num = -1
+        self._column_count = -1
+        return completed
+
+    def _add_fragment(self, table_fragment: Table, page_num: int) -> List[Table]:
+        completed: List[Table] = []
+        fragment_column_count = _table_column_count(table_fragment)
+
+        starts_new_logical_table = False
+        if not self._cells:
+            starts_new_logical_table = True
+        elif page_num == self._last_fragment_page_num:
+            starts_new_logical_table = True
+        elif page_num > self._last_fragment_page_num:
+            if (self._column_count > 0 and
+                    fragment_column_count > 0 and
+                    self._column_count != fragment_column_count):
+                starts_new_logical_table = True
+
+        if starts_new_logical_table:
+            completed.extend(self.flush())
+            self._first_bbox = table_fragment.bbox
+            self._start_page_num = page_num
+            self._column_count = fragment_column_count
+
+        max_rows_in_this_fragment = 0
+        for cell in table_fragment.cells:
+            # Ячейка-представление без копирования; сохраняем исходную страницу ячейки
+            self._cells.append(CellView(cell, self._row_offset, page_num))
+            max_rows_in_this_fragment = max(max_rows_in_this_fragment, cell.row + cell.rowspan)
+
+        self._row_offset += max_rows_in_this_fragment
+        self._last_fragment_page_num = page_num
+        return completed
+
+
+def iter_logical_tables(pages: Iterable[Page]) -> Iterator[Table]:
+    """Выдаёт логические таблицы по мере поступления страниц (страницы - по порядку)."""
+    assembler = LogicalTableAssembler()
+    for page in pages:
+        yield from assembler.feed(page)
+    yield from assembler.flush()
+
 
 @dataclass
 class Document:
     pdf_bytes: bytes = None
     pages: List[Page] = field(default_factory=list)
     page_count: int = 0
+    # Логические таблицы и версия структуры документа, для которой они собраны (см. get_tables)
+    _tables_cache: Optional[Tuple[Tuple, List[Table], List]] = field(default=None, init=False, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует документ в словарь для сериализации (без pdf_bytes и изображений)."""
+        return {
+            "page_count": self.page_count,
+            "pages": [p.to_dict() for p in self.pages],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], pdf_bytes: bytes = None) -> "Document":
+        """Создает документ из словаря."""
+        pages = [Page.from_dict(p) for p in data.get("pages", [])]
+        return cls(
+            pdf_bytes=pdf_bytes,
+            pages=pages,
+            page_count=data.get("page_count", len(pages)),
+        )
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Счётчики обработки, просуммированные по страницам документа."""
+        total: Dict[str, int] = {}
+        for page in self.pages:
+            for name, value in page.stats.items():
+                total[name] = total.get(name, 0) + value
+        return total
 
     def get_all_text_paragraphs(self) -> str:
         '''Получем текс параграфов со всех страниц документа и представим его в виде строки'''
@@ -254,12 +870,7 @@ class Document:
         Calculates the number of columns in a table.
         Returns 0 if the table has no cells.
         """
-        if not table_obj.cells:
-            return 0
-        max_col_idx = 0  # 0-indexed
-        for cell in table_obj.cells:
-            max_col_idx = max(max_col_idx, cell.col + cell.colspan - 1)
-        return max_col_idx + 1  # Return 1-indexed count
+        return _table_column_count(table_obj)
 
     def get_tables(self) -> List[Table]:
         """
@@ -270,147 +881,45 @@ class Document:
         Таблицы на одной странице всегда считаются разными логическими таблицами, если они являются
         отдельными объектами Table.
         Каждый элемент в списке - это объект Table, представляющий одну логическую таблицу.
+        Сборка выполняется один раз на версию структуры документа (страницы, их таблицы,
+        число ячеек и параграфы); ячейки логических таблиц - представления CellView
+        ячеек страниц без копирования, поэтому изменение текста ячеек сборку не сбрасывает.
         """
-        logical_tables: List[Table] = []
-        
-        all_elements = []
-        for page_data in self.pages:
-            for p_obj in page_data.paragraphs:
-                all_elements.append({
-                    'type': 'paragraph', 
-                    'obj': p_obj,
-                    'page_num': page_data.num_page, 
-                    'y1': p_obj.bbox.y1
-                })
-            for t_obj in page_data.tables:
-                if t_obj.cells: 
-                    all_elements.append({
-                        'type': 'table', 
-                        'obj': t_obj,
-                        'page_num': page_data.num_page, 
-                        'y1': t_obj.bbox.y1
-                    })
-        
-        all_elements.sort(key=lambda x: (x['page_num'], x['y1']))
+        version = self.structure_version()
+        if self._tables_cache is None or self._tables_cache[0] != version:
+            pages = sorted(self.pages, key=lambda p: p.num_page)
+            # фрагменты удерживаются вместе с результатом, чтобы их id в версии не переиспользовались
+            fragments = [(page, list(page.tables), list(page.paragraphs)) for page in self.pages]
+            self._tables_cache = (version, list(iter_logical_tables(pages)), fragments)
+        return list(self._tables_cache[1])
 
-        current_accumulated_cells: List[Cell] = []
-        current_row_offset: int = 0
-        first_bbox_of_current_logical_table: Optional[BBox] = None
-        # Page number of the first physical table fragment of the current logical table
-        current_logical_table_start_page_num: Optional[int] = None 
-        last_fragment_page_num: int = -1 
-        current_logical_table_column_count: int = -1
-
-        for element_data in all_elements:
-            el_type = element_data['type']
-            el_obj = element_data['obj']
-            el_page_num = element_data['page_num']
-
-            if el_type == 'paragraph':
-                para: Paragraph = el_obj
-                if para.type != ParagraphType.HEADER and para.type != ParagraphType.FOOTER:
-                    if current_accumulated_cells:
-                        if first_bbox_of_current_logical_table is not None:
-                            logical_table = Table(
-                                bbox=first_bbox_of_current_logical_table,
-                                cells=list(current_accumulated_cells),
-                                start_page_num=current_logical_table_start_page_num
-                            )
-                            logical_tables.append(logical_table)
-                        
-                        current_accumulated_cells.clear()
-                        current_row_offset = 0
-                        first_bbox_of_current_logical_table = None
-                        current_logical_table_start_page_num = None
-                        last_fragment_page_num = -1
-                        current_logical_table_column_count = -1
-            
-            elif el_type == 'table':
-                table_fragment: Table = el_obj
-                if not table_fragment.cells:
-                    continue
+    def structure_version(self) -> Tuple:
+        """Отпечаток структуры документа, от которой зависит сборка логических таблиц."""
+        return tuple(
+            (id(page), page.num_page,
+             tuple((id(t), len(t.cells), t.bbox.y1) for t in page.tables),
+             tuple((id(p), p.type, p.bbox.y1) for p in page.paragraphs))
+            for page in self.pages
+        )
 
-                fragment_column_count = self._get_table_column_count(table_fragment)
-
-                starts_new_logical_table = False
-                if not current_accumulated_cells:
-                    starts_new_logical_table = True
-                else:
-                    if el_page_num == last_fragment_page_num:
-                        starts_new_logical_table = True
-                    elif el_page_num > last_fragment_page_num:
-                        if (current_logical_table_column_count > 0 and
-                                fragment_column_count > 0 and
-                                current_logical_table_column_count != fragment_column_count):
-                            starts_new_logical_table = True
-                
-                if starts_new_logical_table:
-                    if current_accumulated_cells and first_bbox_of_current_logical_table is not None:
-                        logical_table = Table(
-                            bbox=first_bbox_of_current_logical_table,
-                            cells=list(current_accumulated_cells),
-                            start_page_num=current_logical_table_start_page_num
-                        )
-                        logical_tables.append(logical_table)
+    def compact(self) -> None:
+        """
+        Переводит таблицы страниц на колоночное хранение ячеек (Table.to_columnar).
+        Для долго хранимых документов (extract перед записью в DocumentCache): меньше памяти
+        и объектов для сборщика мусора; ячейки становятся неизменяемыми по составу,
+        отложенные ячейки распознаются.
+        """
+        for page in self.pages:
+            page.tables = [t.to_columnar() for t in page.tables]
 
-                    current_accumulated_cells.clear()
-                    current_row_offset = 0 
-                    first_bbox_of_current_logical_table = table_fragment.bbox
-                    current_logical_table_start_page_num = el_page_num 
-                    current_logical_table_column_count = fragment_column_count
-                    
-                    max_rows_in_this_fragment = 0
-                    for cell in table_fragment.cells:
-                        adjusted_cell = Cell(
-                            bbox=cell.bbox,
-                            row=cell.row + current_row_offset, 
-                            col=cell.col,
-                            colspan=cell.colspan,
-                            rowspan=cell.rowspan,
-                            text=cell.text,
-                            blobs=list(cell.blobs),
-                            original_page_num=el_page_num # Сохраняем исходную страницу ячейки
-                        )
-                        current_accumulated_cells.append(adjusted_cell)
-                        max_rows_in_this_fragment = max(max_rows_in_this_fragment, cell.row + cell.rowspan)
-                    
-                    current_row_offset = max_rows_in_this_fragment
-                    last_fragment_page_num = el_page_num
-
-                else: 
-                    max_rows_in_this_fragment = 0
-                    for cell in table_fragment.cells:
-                        adjusted_cell = Cell(
-                            bbox=cell.bbox,
-                            row=cell.row + current_row_offset, 
-                            col=cell.col,
-                            colspan=cell.colspan,
-                            rowspan=cell.rowspan,
-                            text=cell.text,
-                            blobs=list(cell.blobs),
-                            original_page_num=el_page_num # Сохраняем исходную страницу ячейки
-                        )
-                        current_accumulated_cells.append(adjusted_cell)
-                        max_rows_in_this_fragment = max(max_rows_in_this_fragment, cell.row + cell.rowspan)
-                    
-                    current_row_offset += max_rows_in_this_fragment
-                    last_fragment_page_num = el_page_num
-
-        if current_accumulated_cells and first_bbox_of_current_logical_table is not None:
-            logical_table = Table(
-                bbox=first_bbox_of_current_logical_table,
-                cells=list(current_accumulated_cells),
-                start_page_num=current_logical_table_start_page_num
-            )
-            logical_tables.append(logical_table)
-            
-        return logical_tables
+    def invalidate_tables(self) -> None:
+        """Сбрасывает собранные логические таблицы (после изменения ячеек на месте)."""
+        self._tables_cache = None
 
     def to_excel(self, file_path: str):
         """
         Сохраняет все логические таблицы из документа в файл Excel.
-        Таблицы, разделенные параграфами, считаются новыми.
-        Части таблиц без параграфов между ними (даже через страницы) объединяются.
+        Логические таблицы - те же, что возвращает get_tables().
         Каждая логическая таблица сохраняется на отдельный лист.
         Ячейки будут иметь рамки.
 
@@ -422,54 +931,8 @@ class Document:
             default_sheet = wb["Sheet"]
             wb.remove(default_sheet)
 
-        all_elements = []
-        for page_data in self.pages:
-            for p_obj in page_data.paragraphs:
-                all_elements.append({'type': 'paragraph', 'obj': p_obj, 
-                                     'page_num': page_data.num_page, 'y1': p_obj.bbox.y1})
-            for t_obj in page_data.tables:
-                if t_obj.cells: 
-                    all_elements.append({'type': 'table', 'obj': t_obj, 
-                                         'page_num': page_data.num_page, 'y1': t_obj.bbox.y1})
-        
-        all_elements.sort(key=lambda x: (x['page_num'], x['y1']))
-
-        logical_tables_cell_lists = []
-        current_accumulated_cells = []
-        current_row_offset = 0
-
-        for element_data in all_elements:
-            el_type = element_data['type']
-            el_obj = element_data['obj']
-
-            if el_type == 'table':
-                table_fragment: Table = el_obj
-                
-                max_rows_in_this_fragment = 0
-                if table_fragment.cells:
-                    for cell in table_fragment.cells:
-                        adjusted_cell = Cell(
-                            bbox=cell.bbox,
-                            row=cell.row + current_row_offset,
-                            col=cell.col,
-                            colspan=cell.colspan,
-                            rowspan=cell.rowspan,
-                            text=cell.text,
-                            blobs=list(cell.blobs)
-                        )
-                        current_accumulated_cells.append(adjusted_cell)
-                        max_rows_in_this_fragment = max(max_rows_in_this_fragment, cell.row + cell.rowspan)
-                
-                current_row_offset += max_rows_in_this_fragment
-            
-            elif el_type == 'paragraph':
-                if current_accumulated_cells:
-                    logical_tables_cell_lists.append(list(current_accumulated_cells))
-                    current_accumulated_cells.clear()
-                    current_row_offset = 0
-
-        if current_accumulated_cells:
-            logical_tables_cell_lists.append(list(current_accumulated_cells))
+        # те же логические таблицы, что и для NER (собираются один раз на документ)
+        logical_tables_cell_lists = [table.cells for table in self.get_tables()]
 
         if not logical_tables_cell_lists:
             if not wb.sheetnames:
@@ -527,11 +990,102 @@ class Document:
         except Exception as e:
             raise
 
+# Состояние процесса-обработчика страниц (см. BaseExtractor._extract_pages_parallel).
+# Заполняется один раз при старте процесса в _init_page_worker.
+_worker_extractor: Optional["BaseExtractor"] = None
+_worker_doc = None
+
+
+def _init_page_worker(extractor_cls: type, extractor_kwargs: Dict[str, Any], pdf_bytes: bytes):
+    """Инициализирует процесс пула: создаёт свой экстрактор и заново открывает PDF из байтов."""
+    global _worker_extractor, _worker_doc
+    _worker_extractor = extractor_cls(**extractor_kwargs)
+    _worker_doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _process_page_in_worker(page_idx: int) -> bytes:
+    """
+    Обрабатывает одну страницу в процессе пула. Страница возвращается в двоичном
+    формате serialization.py: он компактнее и быстрее pickle вложенных dataclass.
+    """
+    from .serialization import dumps_page
+    # страницы документа распределены по процессам, поэтому состояние документа у каждой своё
+    return dumps_page(_worker_extractor._extract_page(_worker_doc, page_idx, {}))
+
+
 class BaseExtractor(ABC):
-    def __init__(self):
+    def __init__(self, page_workers: int = 1, cache: Optional["DocumentCache"] = None, dpi: int = DEFAULT_DPI):
+        """
+        Args:
+            page_workers: количество процессов для постраничной обработки.
+                1 - страницы обрабатываются последовательно в текущем процессе.
+            cache: кэш извлечённых документов; при попадании extract() не обрабатывает PDF.
+            dpi: разрешение, в котором считаются координаты (и рендерятся страницы).
+        """
+        self.page_workers = page_workers
+        self.cache = cache
+        self.dpi = dpi
         self.logger = logging.getLogger('app.' + __class__.__name__)
 
+    def _cache_namespace(self) -> str:
+        """
+        Конфигурация экстрактора, влияющая на результат; входит в ключ кэша.
+        Наследники с собственными параметрами должны дополнить её.
+        """
+        return f"{type(self).__name__}:dpi={self.dpi}"
+
+    def _worker_kwargs(self) -> Dict[str, Any]:
+        """
+        Аргументы конструктора, с которыми экстрактор пересоздаётся в процессе пула.
+        Наследники с собственными параметрами должны дополнить его.
+        """
+        return {'dpi': self.dpi}
+
+    def _uses_document_state(self) -> bool:
+        """
+        Результат страницы зависит от предыдущих страниц документа (doc_state в _process).
+        Такие документы обрабатываются последовательно и при page_workers > 1: в процессах
+        пула у каждой страницы было бы своё состояние, и таблицы отличались бы.
+        """
+        return False
+
     def extract(self, pdf_bytes: bytes) -> Document:
+        cache_key = None
+        if self.cache is not None and pdf_bytes:
+            cache_key = self.cache.make_key(pdf_bytes, self._cache_namespace())
+            cached_document = self.cache.get(cache_key, pdf_bytes=pdf_bytes)
+            if cached_document is not None:
+                self.logger.info(f"Документ найден в кэше ({cache_key[:12]}).")
+                return cached_document
+
+        pages_data = list(self.iter_pages(pdf_bytes))
+
+        self.logger.info("Все страницы обработаны. Формирование итогового документа.")
+        final_document = Document(
+                            pdf_bytes=pdf_bytes,
+                            pages=pages_data,
+                            page_count=len(pages_data)
+                        )
+        if final_document.stats:
+            self.logger.info(f"Статистика обработки документа: {final_document.stats}.")
+        # Документы с упавшими страницами не кэшируем, чтобы повторная отправка могла их обработать.
+        # Документы с отложенными ячейками тоже: запись в кэш распознала бы их все сразу.
+        if cache_key is not None and not any(p.error or p.has_pending_cells for p in pages_data):
+            # таблицы переводятся на колоночное хранение, как и у документа, прочитанного из кэша
+            final_document.compact()
+            self.cache.put(cache_key, final_document)
+        self.logger.info("Процесс извлечения данных из PDF завершен.")
+        return final_document
+
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[Page]:
+        """
+        Выдаёт страницы документа по порядку, сразу по мере готовности каждой.
+        В отличие от extract() не держит весь документ в памяти: обработанную страницу
+        потребитель может сразу передать дальше (сборка таблиц, NER) и освободить.
+        Страницы документа получают общий словарь состояния (см. _process); при параллельной
+        обработке у каждой страницы он свой, поэтому экстрактор, которому нужно состояние
+        документа (_uses_document_state), обрабатывает страницы последовательно.
+        """
         self.logger.info("Начало процесса извлечения данных из PDF.")
         if not pdf_bytes:
             self.logger.error("Получены пустые байты PDF. Прерывание операции.")
@@ -543,41 +1097,87 @@ class BaseExtractor(ABC):
             self.logger.error(f"Ошибка при открытии PDF документа: {e}", exc_info=True)
             raise 
 
+        with doc:
+            page_count = len(doc)
+            self.logger.info(f"Документ успешно открыт. Количество страниц: {page_count}.")
+            sequential = self.page_workers <= 1 or page_count <= 1
+            if not sequential and self._uses_document_state():
+                self.logger.info("Страницы зависят от состояния документа, параллельная обработка отключена.")
+                sequential = True
+            if sequential:
+                doc_state: Dict[str, Any] = {}
+                for i in range(page_count):
+                    yield self._extract_page(doc, i, doc_state)
+                return
+        # процессы пула открывают PDF сами, документ родителя уже закрыт
+        yield from self._iter_pages_parallel(pdf_bytes, page_count)
+
+    def _extract_page(self, doc, page_idx: int, doc_state: Dict[str, Any]) -> Page:
+        """Обрабатывает одну страницу. При ошибке возвращает пустую страницу."""
         page_count = len(doc)
-        self.logger.info(f"Документ успешно открыт. Количество страниц: {page_count}.")
-        
-        pages_data: List[Page] = []
-        for i in range(page_count):
-            self.logger.info(f"Обработка страницы {i + 1}/{page_count}.")
-            page_content = doc[i]
-            try:
-                paragraphs, tables = self._process(page_content)
-                self.logger.debug(f"Страница {i + 1}: найдено {len(paragraphs)} параграфов и {len(tables)} таблиц.")
-                
-                pages_data.append(
-                    Page(
-                        tables=tables,
-                        paragraphs=paragraphs,
-                        num_page=i
-                    )
-                )
-            except Exception as e:
-                self.logger.error(f"Ошибка при обработке страницы {i + 1}: {e}", exc_info=True)
-
-                pages_data.append(
-                    Page(num_page=i) 
-                )
-                continue 
+        self.logger.info(f"Обработка страницы {page_idx + 1}/{page_count}.")
+        try:
+            # счётчики страницы живут в состоянии документа, а не на экземпляре:
+            # один экстрактор может обрабатывать несколько документов в разных потоках
+            page_stats: Dict[str, int] = {}
+            doc_state['page_stats'] = page_stats
+            paragraphs, tables = self._process(doc[page_idx], doc_state)
+            self.logger.debug(f"Страница {page_idx + 1}: найдено {len(paragraphs)} параграфов и {len(tables)} таблиц.")
+            return Page(
+                tables=tables,
+                paragraphs=paragraphs,
+                num_page=page_idx,
+                stats=page_stats,
+            )
+        except Exception as e:
+            self.logger.error(f"Ошибка при обработке страницы {page_idx + 1}: {e}", exc_info=True)
+            return Page(num_page=page_idx, error=str(e) or type(e).__name__)
 
-        self.logger.info("Все страницы обработаны. Формирование итогового документа.")
-        final_document = Document(
-                            pdf_bytes=pdf_bytes,
-                            pages=pages_data,
-                            page_count=len(pages_data)
-                        )
-        self.logger.info("Процесс извлечения данных из PDF завершен.")
-        return final_document
-    
-    def _process(self, page)-> Tuple[List[Paragraph], List[Table]]:
-        ...
+    def _iter_pages_parallel(self, pdf_bytes: bytes, page_count: int) -> Iterator[Page]:
+        """
+        Распределяет страницы по пулу процессов. Каждый процесс один раз открывает PDF
+        из переданных байтов и пересоздаёт экстрактор через _worker_kwargs().
+        Страницы выдаются по порядку; одновременно в работе не больше 2 * workers страниц,
+        чтобы готовые результаты не копились, пока потребитель занят.
+        Упавшая страница (в том числе из-за падения самого процесса) превращается в пустую Page.
+        """
+        from .serialization import loads_page
+        workers = min(self.page_workers, page_count)
+        self.logger.info(f"Параллельная обработка {page_count} страниц в {workers} процессах.")
 
+        worker_kwargs = dict(self._worker_kwargs(), page_workers=1)
+        # spawn: fork копировал бы потоки родителя (OCR, цикл заданий) вместе с их блокировками
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_page_worker,
+            initargs=(type(self), worker_kwargs, pdf_bytes),
+        ) as exe:
+            in_flight: Deque[Future] = deque()
+            next_page = 0
+            for i in range(page_count):
+                while next_page < page_count and len(in_flight) < 2 * workers:
+                    try:
+                        fut = exe.submit(_process_page_in_worker, next_page)
+                    except BrokenProcessPool as e:
+                        # пул сломан упавшим процессом: оставшиеся страницы тоже становятся пустыми
+                        fut = Future()
+                        fut.set_exception(e)
+                    in_flight.append(fut)
+                    next_page += 1
+                fut = in_flight.popleft()
+                try:
+                    page = loads_page(fut.result())
+                except Exception as e:
+                    self.logger.error(f"Ошибка процесса при обработке страницы {i + 1}: {e}", exc_info=True)
+                    page = Page(num_page=i, error=str(e) or type(e).__name__)
+                yield page
+    
+    def _process(self, page, doc_state: Dict[str, Any]) -> Tuple[List[Paragraph], List[Table]]:
+        """
+        Разбирает страницу. doc_state - состояние, общее для страниц одного документа
+        (например, столбцы таблицы, продолжающейся на следующей странице); наследник
+        хранит в нём что нужно сам, на экземпляре экстрактора такое состояние не держат.
+        doc_state['page_stats'] - счётчики обрабатываемой страницы, они попадают в Page.stats.
+        """
+        ...
\ No newline at end of file
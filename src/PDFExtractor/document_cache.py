@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+import zlib
+
+import numpy as np
+
+from .base_extractor import Document, Page
+from .serialization import dumps_document, dumps_page, loads_document, loads_page
+
+
+class _DiskLRUStore:
+    """
+    Хранилище сжатых записей в каталоге с вытеснением по размеру (LRU по времени
+    модификации файла, которое обновляется при каждом попадании) и счётчиками обращений.
+    Записи - двоичный формат serialization.py, сжатый zlib; наследник задаёт _encode/_decode.
+    """
+    SUFFIX = ".pdxb.z"
+    COMPRESS_LEVEL = 1
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('app.' + type(self).__name__)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(path) for path in self._entries())
+
+    def __getstate__(self):
+        # Кэш передаётся в процессы постраничной обработки; блокировка создаётся заново
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def _decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def _load(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    data = self._decode(zlib.decompress(f.read()))
+                os.utime(path)
+            except FileNotFoundError:
+                self.stats["misses"] += 1
+                return None
+            except (OSError, ValueError, zlib.error) as e:
+                self.logger.warning(f"Повреждённая запись кэша {key}: {e}. Запись удалена.")
+                self._remove(path)
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return data
+
+    def _store(self, key: str, obj: Any) -> None:
+        payload = zlib.compress(self._encode(obj), self.COMPRESS_LEVEL)
+        path = self._path(key)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # Пишем во временный файл и атомарно подменяем, чтобы читатель не увидел половину записи
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._total_bytes += len(payload) - old_size
+            self.stats["writes"] += 1
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._entries():
+                self._remove(path)
+
+    def _evict(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        for path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            self.stats["evictions"] += 1
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_bytes -= size
+        except FileNotFoundError:
+            pass
+
+    def _entries(self) -> List[str]:
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(self.SUFFIX)
+        ]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+
+class DocumentCache(_DiskLRUStore):
+    """
+    Дисковый кэш извлечённых документов с адресацией по содержимому.
+    Ключ - sha256 от байтов PDF и конфигурации экстрактора (тип, OCR-движок, DPI).
+    Документ хранится без изображений и pdf_bytes. Ячейки таблиц прочитанного документа -
+    ColumnarCells (см. Document.compact): кэшированные документы держат долго.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: каталог кэша (создаётся при необходимости).
+            max_bytes: максимальный суммарный размер записей на диске.
+        """
+        super().__init__(cache_dir, max_bytes)
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes, namespace: str) -> str:
+        """Ключ записи: хэш конфигурации экстрактора и содержимого PDF."""
+        digest = hashlib.sha256()
+        digest.update(namespace.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(pdf_bytes)
+        return digest.hexdigest()
+
+    def get(self, key: str, pdf_bytes: bytes = None) -> Optional[Document]:
+        """Возвращает документ из кэша или None. pdf_bytes подставляются в документ."""
+        doc = self._load(key)
+        if doc is not None:
+            doc.pdf_bytes = pdf_bytes
+        return doc
+
+    def put(self, key: str, doc: Document) -> None:
+        """Сохраняет документ; запись становится самой свежей."""
+        self._store(key, doc)
+
+    def _encode(self, doc: Document) -> bytes:
+        return dumps_document(doc)
+
+    def _decode(self, data: bytes) -> Document:
+        return loads_document(data, columnar=True)
+
+
+class PageCache(_DiskLRUStore):
+    """
+    Дисковый кэш результатов обработки отдельных страниц скана.
+    Ключ - sha256 от отрендеренной полутоновой страницы и конфигурации экстрактора,
+    поэтому при повторной отправке документа с изменённой/добавленной страницей
+    заново обрабатываются только изменившиеся страницы.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: каталог кэша (создаётся при необходимости).
+            max_bytes: максимальный суммарный размер записей на диске.
+        """
+        super().__init__(cache_dir, max_bytes)
+
+    @staticmethod
+    def make_key(gray: np.ndarray, namespace: str) -> str:
+        """Ключ записи: хэш конфигурации экстрактора и пикселей страницы."""
+        digest = hashlib.sha256()
+        digest.update(namespace.encode("utf-8"))
+        digest.update(repr(gray.shape).encode("ascii"))
+        digest.update(np.ascontiguousarray(gray).data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Page]:
+        """Возвращает сохранённые абзацы и таблицы страницы (в виде Page) или None."""
+        return self._load(key)
+
+    def put(self, key: str, page: Page) -> None:
+        """Сохраняет результат обработки страницы."""
+        self._store(key, page)
+
+    def _encode(self, page: Page) -> bytes:
+        return dumps_page(page)
+
+    def _decode(self, data: bytes) -> Page:
+        return loads_page(data)
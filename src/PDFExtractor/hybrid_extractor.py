@@ -0,0 +1,27 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from .base_extractor import Paragraph, Table
+from .native_extractor import NativeExtractor
+from .scan_extractor import ScanExtractor
+from .utils import is_native_page
+
+
+class HybridExtractor(ScanExtractor):
+    '''
+    Выбирает способ разбора для каждой страницы: страницы с текстовым слоем (цифровые акты)
+    разбираются NativeExtractor без рендеринга, остальные - как скан с OCR.
+    Классификация дешёвая и выполняется до рендеринга (см. is_native_page).
+    Параметры те же, что у ScanExtractor.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.native = NativeExtractor(dpi=self.dpi)
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+
+    def _process(self, page, doc_state: Dict[str, Any]) -> Tuple[List[Paragraph], List[Table]]:
+        if is_native_page(page):
+            self.logger.debug(f"Страница {page.number}: текстовый слой, разбор без рендеринга.")
+            return self.native._process(page, doc_state)
+        self.logger.debug(f"Страница {page.number}: скан, рендеринг и OCR.")
+        return super()._process(page, doc_state)
@@ -1,11 +1,18 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 
 from PIL import Image
 
-def detected_text_blocks_lines(gray:np.ndarray)->np.ndarray:
-    blur = cv2.blur(gray, (3, 3))
-    binary = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+def detected_text_blocks_lines(gray:np.ndarray, binary: Optional[np.ndarray] = None)->np.ndarray:
+    """
+    Маска блоков текста ROI. binary - уже готовая инвертированная бинаризация ROI
+    (например, срез PageContext.cleaned_binary_inv); без неё ROI размывается и бинаризуется здесь.
+    """
+    if binary is None:
+        blur = cv2.blur(gray, (3, 3))
+        binary = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
 
     kernel_width = 15 # Ширина ядра (подбирается)
     kernel_height = 3 # Высота ядра (подбирается)
@@ -19,11 +26,12 @@ def detected_text_blocks_lines(gray:np.ndarray)->np.ndarray:
 
     return closed_text
 
-def remove_lines_by_mask(gray: np.ndarray, mask: np.ndarray) -> np.ndarray:
+def remove_lines_by_mask(gray: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Удаляет из серого изображения все пиксели, где в маске mask == 255,
     заменяя их белым (255).
     mask: 8-битное, 0 — фон, 255 — линии.
+    out: если задан (например, сам gray или срез страницы), результат пишется в него без копии.
     """
     # Убедимся, что оба массива одного размера и типа
     assert gray.shape == mask.shape, "gray и mask должны быть одинакового размера"
@@ -33,24 +41,25 @@ def remove_lines_by_mask(gray: np.ndarray, mask: np.ndarray) -> np.ndarray:
 
     if gray.dtype != np.uint8:
         gray = gray.astype(np.uint8)
-    if mask.dtype != np.uint8:
-        mask = mask.astype(np.uint8)
 
-    # Инвертируем маску: линии → 0, фон → 255
-    inv_mask = cv2.bitwise_not(mask)
+    if out is None:
+        out = gray.copy()
+    elif out is not gray:
+        out[...] = gray
 
-    # Применяем побитовое И — оставляем только фон по маске
-    cleaned = cv2.bitwise_and(gray, inv_mask)
-
-    # Опционально: там, где были линии (mask==255), заливаем белым,
+    # Там, где были линии (mask==255), заливаем белым,
     # чтобы нечёткие края получили идеальный фон
-    cleaned[mask == 255] = 255
+    out[mask == 255] = 255
 
-    return cleaned
+    return out
 
 def detected_text(roi_image: np.ndarray, vk: int=100, hk=50) -> np.ndarray:
     # Адаптивная бинаризация (текст становится белым на чёрном фоне)
     binary = cv2.threshold(roi_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    return close_text_blocks(binary, vk, hk)
+
+def close_text_blocks(binary: np.ndarray, vk: int=100, hk=50) -> np.ndarray:
+    """Склеивает текст инвертированной бинарной маски в строки, а строки в абзацы."""
     # Склейка слов в строки
     horiz_k = cv2.getStructuringElement(cv2.MORPH_RECT, (vk, 1))
     closed_h = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, horiz_k, iterations=2)
@@ -99,12 +108,18 @@ def extract_strong_lines(mask: np.ndarray, orientation: str, length: int) -> np.
     return clean
 
 
-def find_lines(gray: np.ndarray, scale: int = 50) -> np.ndarray:
-    """Находит длинные линии на изображении."""
+def binarize_inv(gray: np.ndarray) -> np.ndarray:
+    """Размытие 3x3 и инвертированная бинаризация Отсу: чернила - 255, фон - 0."""
     blur = cv2.GaussianBlur(gray, (3,3), 0)
-    
-    _, img_bin = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    img_bin = 255-img_bin
+    return cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+
+def find_lines(gray: np.ndarray, scale: int = 50, binary_inv: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Находит длинные линии на изображении.
+    binary_inv - готовая бинаризация страницы (PageContext.binary_inv), иначе считается здесь.
+    """
+    img_bin = binary_inv if binary_inv is not None else binarize_inv(gray)
     vertical_element, _ = create_structuring_element(img_bin, scale + 150, type=0)
     horizontal_element, _ = create_structuring_element(img_bin, scale, type=1)
 
@@ -165,32 +180,29 @@ def filter_small_and_isolated(mask: np.ndarray, intersec: np.ndarray, min_length
     Удаляет из mask все компоненты (линии), 
     у которых длина (число пикселей) < min_length
     или число пересечений <= min_intersections.
+
+    Пересечения считаются за один проход: пятна пересечений размечаются одним вызовом
+    connectedComponents, и для каждого пятна берётся метка компоненты маски, в которой оно лежит.
+    Разные 8-связные компоненты маски не соприкасаются, поэтому каждое пятно целиком
+    принадлежит одной компоненте, и число пятен на метку - bincount по этим меткам.
     """
     
     num_mask_labels, labels_mask, stats_mask, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8) 
     
-    output_mask = np.zeros_like(mask, dtype=np.uint8)
-
-    for lbl in range(1, num_mask_labels): # Начинаем с 1, чтобы пропустить фон (метка 0)
-        length = stats_mask[lbl, cv2.CC_STAT_AREA]
-
-        if length < min_length:
-            continue 
-
-        comp_boolean_mask = (labels_mask == lbl) 
-        
-        current_comp_intersections_map_bool = comp_boolean_mask & (intersec > 0)
-        
-        if not np.any(current_comp_intersections_map_bool): 
-            crosses = 0
-        else:
-            num_intersection_blobs, _ = cv2.connectedComponents(current_comp_intersections_map_bool.astype(np.uint8), connectivity=8)
-            crosses = num_intersection_blobs - 1 
-        
-        if crosses > min_intersections: 
-            output_mask[comp_boolean_mask] = 255 
+    intersections = ((labels_mask > 0) & (intersec > 0)).astype(np.uint8)
+    num_blobs, labels_blobs = cv2.connectedComponents(intersections, connectivity=8)
+
+    # метка компоненты маски под пикселями каждого пятна (метка 0 - фон); пикселей пересечений
+    # немного, поэтому проходим только по ним, без сортировки всего изображения
+    pixels = np.flatnonzero(intersections)
+    blob_owner = np.zeros(num_blobs, dtype=np.intp)
+    blob_owner[labels_blobs.ravel()[pixels]] = labels_mask.ravel()[pixels]
+    crosses = np.bincount(blob_owner[1:], minlength=num_mask_labels)
+
+    keep = (stats_mask[:, cv2.CC_STAT_AREA] >= min_length) & (crosses > min_intersections)
+    keep[0] = False # фон
             
-    return output_mask
+    return np.where(keep[labels_mask], 255, 0).astype(np.uint8)
 
 def create_structuring_element(image: np.ndarray, scale: int, type: int = 0):
     """Создает структурный элемент для морфологических операций."""
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Tuple
 from pymupdf import find_tables
 
 from .utils import get_pix_rect_page
@@ -11,17 +11,21 @@ from .base_extractor import (BBox,
                              Table)
 
 
+# допуск при сравнении границ ячеек с сеткой (в пунктах PDF)
+SPAN_EPS = 1.0
+
 
 class NativeExtractor(BaseExtractor):
 
-    def _process(self, page):
-        x_scale, y_scale = get_pix_rect_page(page)
+    def _process(self, page, doc_state: Dict[str, Any]):
+        x_scale, y_scale = get_pix_rect_page(page, self.dpi)
 
         tbls = find_tables(page)
         tables: List[Table] = []
         
         for table in tbls:
             text_ext = table.extract()
+            col_x0, row_y0 = self._grid_starts(table)
             cells: List[Cell] = []
             for r, (row, row_text) in enumerate(zip(table.rows, text_ext)):
                 for c, (rect, text) in enumerate(zip(list(row.cells), list(row_text))):
@@ -29,11 +33,15 @@ class NativeExtractor(BaseExtractor):
                     if rect is None:
                         continue
 
+                    # объединённая ячейка накрывает начала следующих столбцов/строк сетки
+                    x1, y1 = rect[2] - SPAN_EPS, rect[3] - SPAN_EPS
                     cells.append(
                         Cell(
                             bbox=BBox.from_rect(rect, x_scale, y_scale),
                             row = r,
                             col = c,
+                            colspan=1 + sum(1 for x in col_x0[c + 1:] if x < x1),
+                            rowspan=1 + sum(1 for y in row_y0[r + 1:] if y < y1),
                             text=text
                         )
                     )
@@ -76,6 +84,15 @@ class NativeExtractor(BaseExtractor):
 
             paragraphs.append(Paragraph(bbox=bb, type=ptype, text=txt))
         return paragraphs, tables 
-        
-        
-        
+
+    @staticmethod
+    def _grid_starts(table) -> Tuple[List[float], List[float]]:
+        """Левые границы столбцов и верхние границы строк сетки таблицы pymupdf."""
+        col_x0 = [float("inf")] * table.col_count
+        for row in table.rows:
+            for c, rect in enumerate(row.cells):
+                if rect is not None:
+                    col_x0[c] = min(col_x0[c], rect[0])
+        row_y0 = [row.bbox[1] for row in table.rows]
+        return col_x0, row_y0
+
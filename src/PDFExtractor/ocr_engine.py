@@ -1,7 +1,10 @@
 from abc import ABC
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
 import enum
 import os
-from typing import List, Optional, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -18,10 +21,36 @@ class OcrEngine(enum.Enum):
 
 
 class Engine(ABC):
-    def extract_text(self, image: np.ndarray) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    # Белая рамка вокруг ROI перед распознаванием (координаты boxes - с её учётом)
+    BORDER = 10
+
+    def extract_text(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+        """
+        Распознаёт ROI. binary - готовая инвертированная бинаризация того же ROI
+        (срез PageContext.cleaned_binary_inv), по ней ищутся блоки текста.
+        """
         ...     
-    def detected_text(self, image: np.ndarray):
-        blobs = detected_text_blocks_lines(image)
+
+    def extract_text_batch(self, images: List[np.ndarray],
+                           binaries: Optional[List[np.ndarray]] = None) -> List[Tuple[str, List[Tuple[int, int, int, int]]]]:
+        """
+        Распознаёт список ROI. По умолчанию - по одному вызову на ROI;
+        движки, умеющие распознавать пачку за один запуск, переопределяют метод.
+        """
+        binaries = binaries if binaries is not None else [None] * len(images)
+        return [self.extract_text(image, binary) for image, binary in zip(images, binaries)]
+
+    def detected_text(self, image: np.ndarray, binary: Optional[np.ndarray] = None):
+        """
+        Блоки текста ROI в координатах ROI с рамкой BORDER (как после preprocess).
+        Если передана готовая бинаризация исходного ROI, image не используется.
+        """
+        if binary is not None:
+            blobs = detected_text_blocks_lines(None, binary=binary)
+            offset = self.BORDER
+        else:
+            blobs = detected_text_blocks_lines(image)
+            offset = 0
         cnts, hierarchy = cv2.findContours(blobs, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
         boxes = []
         if cnts is not None and hierarchy is not None:
@@ -31,7 +60,7 @@ class Engine(ABC):
                     if hierarchy[0][i][3] == -1:
                         x, y, w, h = cv2.boundingRect(cnt)
                         if w > 15 and h > 15: # Отфильтровываем очень маленькие контуры
-                            boxes.append((x, y, w, h))
+                            boxes.append((x + offset, y + offset, w, h))
         
         boxes = sorted(boxes, key=lambda b: (b[1], b[0]))
         return boxes
@@ -48,7 +77,7 @@ class Engine(ABC):
 
 
         # clean = cv2.bitwise_not(thresh)
-        border = 10
+        border = self.BORDER
         gray = cv2.copyMakeBorder(
             gray, border, border, border, border,
             borderType=cv2.BORDER_CONSTANT,
@@ -59,10 +88,15 @@ class Engine(ABC):
         return gray
 
 class TesseractEngine(Engine):
+    # Белый промежуток между ROI на общем холсте пакетного распознавания
+    BATCH_GAP = 40
+    # Tesseract не принимает изображения больше 32767 пикселей по стороне
+    BATCH_MAX_HEIGHT = 30000
+
     def __init__(self):
         self.cfg = r'--oem 1 --psm 4 -l rus+eng'
 
-    def extract_text(self, image: np.ndarray) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    def extract_text(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
         image = self.preprocess(image)
         data = pytesseract.image_to_data(image, config=self.cfg, output_type=pytesseract.Output.DICT)
         
@@ -76,8 +110,74 @@ class TesseractEngine(Engine):
         # Объединяем все слова в одну строку через пробел
         text = " ".join(words)
 
-        boxes = self.detected_text(image) # Ваш метод для получения bounding boxes блоков
+        boxes = self.detected_text(image, binary) # Ваш метод для получения bounding boxes блоков
         return (text, boxes)
+
+    def extract_text_batch(self, images: List[np.ndarray],
+                           binaries: Optional[List[np.ndarray]] = None) -> List[Tuple[str, List[Tuple[int, int, int, int]]]]:
+        """
+        Распознаёт все ROI за один запуск tesseract.
+        ROI складываются в столбик на общем белом холсте с известными смещениями
+        (белая рамка BORDER получается из самого холста, без копий preprocess),
+        слова из image_to_data раскладываются обратно по ROI по центру bbox.
+        Блоки текста (boxes) считаются по каждому ROI отдельно, как в extract_text.
+        """
+        results: List[Tuple[str, List[Tuple[int, int, int, int]]]] = [('', []) for _ in images]
+        rois = {i: img for i, img in enumerate(images) if img.size > 0}
+
+        for chunk in self._split_batch(rois):
+            words = self._recognize_stacked([rois[i] for i in chunk])
+            for i, roi_words in zip(chunk, words):
+                if binaries is not None and binaries[i] is not None:
+                    boxes = self.detected_text(rois[i], binaries[i])
+                else:
+                    boxes = self.detected_text(self.preprocess(rois[i]))
+                results[i] = (" ".join(roi_words), boxes)
+        return results
+
+    def _split_batch(self, rois: Dict[int, np.ndarray]) -> List[List[int]]:
+        """Делит ROI на группы, чтобы высота холста не превышала BATCH_MAX_HEIGHT."""
+        chunks: List[List[int]] = []
+        current: List[int] = []
+        height = 0
+        for i, img in rois.items():
+            roi_height = img.shape[0] + 2 * self.BORDER + self.BATCH_GAP
+            if current and height + roi_height > self.BATCH_MAX_HEIGHT:
+                chunks.append(current)
+                current, height = [], 0
+            current.append(i)
+            height += roi_height
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _recognize_stacked(self, rois: List[np.ndarray]) -> List[List[str]]:
+        """
+        Распознаёт ROI, сложенные в один холст; возвращает слова для каждого ROI.
+        Каждый ROI занимает на холсте полосу высотой ROI + 2 * BORDER (белая рамка, как в preprocess).
+        """
+        border = self.BORDER
+        width = max(roi.shape[1] for roi in rois) + 2 * border
+        height = sum(roi.shape[0] + 2 * border + self.BATCH_GAP for roi in rois)
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+
+        starts: List[int] = []
+        y = 0
+        for roi in rois:
+            canvas[y + border:y + border + roi.shape[0], border:border + roi.shape[1]] = roi
+            starts.append(y)
+            y += roi.shape[0] + 2 * border + self.BATCH_GAP
+
+        data = pytesseract.image_to_data(canvas, config=self.cfg, output_type=pytesseract.Output.DICT)
+
+        words: List[List[str]] = [[] for _ in rois]
+        for i in range(len(data['text'])):
+            if int(data['conf'][i]) > -1 and data['text'][i].strip() != '':
+                center_y = data['top'][i] + data['height'][i] // 2
+                idx = bisect_right(starts, center_y) - 1
+                if idx >= 0 and center_y < starts[idx] + rois[idx].shape[0] + 2 * border:
+                    words[idx].append(data['text'][i])
+        return words
     
 
 class EasyOcrEngine(Engine):
@@ -88,12 +188,13 @@ class EasyOcrEngine(Engine):
         
         self.reader = easyocr.Reader(['ru', 'en'], gpu=False)
 
-    def extract_text(self, image: np.ndarray) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    def extract_text(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
         image = self.preprocess(image)
         result = self.reader.readtext(image)
         text = " ".join([res[1] for res in result])
+        boxes = []
         if text != '':
-            boxes = self.detected_text(image)
+            boxes = self.detected_text(image, binary)
         return text, boxes
 
 class PaddleOcrEngine(Engine):
@@ -102,24 +203,83 @@ class PaddleOcrEngine(Engine):
         from paddleocr import PaddleOCR
         self.reader = PaddleOCR(use_angle_cls=True, lang='ru')
     
-    def extract_text(self, image: np.ndarray) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    def extract_text(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
         image = self.preprocess(image)
         result = self.reader.ocr(image, cls=False)
         text = " ".join([res[1][0] for res in result])
+        boxes = []
         if text != '':
-                boxes = self.detected_text(image)
+                boxes = self.detected_text(image, binary)
         return text, boxes
 
+def create_engine(ocr_engine: Optional[OcrEngine]) -> Engine:
+    """Создаёт новый экземпляр движка (для EasyOCR/PaddleOCR - с загрузкой модели)."""
+    match(ocr_engine):
+        case OcrEngine.EASYOCR:
+            return EasyOcrEngine()
+        case OcrEngine.PADDLEOCR:
+            return PaddleOcrEngine()
+        case _: 
+            return TesseractEngine()
+
+
+# Движки, уже созданные в этом процессе: модель загружается один раз на процесс,
+# а не на каждый ScanExtractor.
+_engines: Dict[Optional[OcrEngine], Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(ocr_engine: Optional[OcrEngine]) -> Engine:
+    """Возвращает общий для процесса экземпляр движка, создавая его при первом обращении."""
+    with _engines_lock:
+        engine = _engines.get(ocr_engine)
+        if engine is None:
+            engine = create_engine(ocr_engine)
+            _engines[ocr_engine] = engine
+        return engine
+
+
 class OCR:
-    def __init__(self, ocr_engine:Optional[OcrEngine]):
-        match(ocr_engine):
-            case ocr_engine.EASYOCR:
-                self.ocr = EasyOcrEngine()
-            case ocr_engine.PADDLEOCR:
-                self.ocr = PaddleOcrEngine()
-            case _: 
-                self.ocr = TesseractEngine()
-
-    def extract(self, image: np.ndarray) -> Tuple[str, List[Tuple[int, int, int, int]]]:
-        return self.ocr.extract_text(image)
-    
+    def __init__(self, ocr_engine:Optional[OcrEngine], max_workers: int = 4, pool=None):
+        """
+        Args:
+            ocr_engine: OCR-движок (экземпляр берётся общий для процесса, см. get_engine).
+            max_workers: количество потоков для submit/submit_batch без пула процессов.
+            pool: OcrWorkerPool - если задан, распознавание выполняется в его процессах
+                с заранее загруженными движками, а движок в текущем процессе не создаётся.
+        """
+        self.pool = pool
+        self.ocr = get_engine(ocr_engine) if pool is None else None
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def extract(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+        if self.pool is not None:
+            return self.pool.submit(image, binary).result()
+        return self.ocr.extract_text(image, binary)
+
+    def extract_batch(self, images: List[np.ndarray],
+                      binaries: Optional[List[np.ndarray]] = None) -> List[Tuple[str, List[Tuple[int, int, int, int]]]]:
+        if self.pool is not None:
+            return self.pool.submit_batch(images, binaries).result()
+        return self.ocr.extract_text_batch(images, binaries)
+
+    def submit(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Future:
+        """Асинхронное распознавание одного ROI (binary - готовая бинаризация ROI, см. Engine.extract_text)."""
+        if self.pool is not None:
+            return self.pool.submit(image, binary)
+        return self._get_executor().submit(self.ocr.extract_text, image, binary)
+
+    def submit_batch(self, images: List[np.ndarray], binaries: Optional[List[np.ndarray]] = None) -> Future:
+        """Асинхронное распознавание пачки ROI."""
+        if self.pool is not None:
+            return self.pool.submit_batch(images, binaries)
+        return self._get_executor().submit(self.ocr.extract_text_batch, images, binaries)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Один пул потоков на весь срок жизни OCR, а не новый на каждую страницу
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ocr')
+            return self._executor
@@ -0,0 +1,165 @@
+import atexit
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ocr_engine import Engine, OcrEngine, create_engine
+
+# Движок, загруженный в процессе пула (см. _init_ocr_worker)
+_worker_engine: Optional[Engine] = None
+
+
+def _init_ocr_worker(ocr_engine: OcrEngine, engine_threads: int):
+    """Инициализирует процесс пула: ограничивает потоки и один раз загружает движок."""
+    global _worker_engine
+    # Ограничиваем внутренние потоки библиотек, иначе N процессов x OMP-потоки
+    # EasyOCR/PaddleOCR перегружают процессор
+    for var in ("OMP_NUM_THREADS", "OMP_THREAD_LIMIT", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(engine_threads)
+    import cv2
+    cv2.setNumThreads(engine_threads)
+    _worker_engine = create_engine(ocr_engine)
+
+
+def _ocr_job(image: np.ndarray, binary: Optional[np.ndarray] = None) -> Tuple[str, List[Tuple[int, int, int, int]]]:
+    try:
+        return _worker_engine.extract_text(image, binary)
+    except Exception as e:
+        # Не все исключения движков переживают pickle (например, TesseractNotFoundError),
+        # а ошибка распаковки результата ломает весь пул
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _ocr_batch_job(images: List[np.ndarray],
+                   binaries: Optional[List[np.ndarray]] = None) -> List[Tuple[str, List[Tuple[int, int, int, int]]]]:
+    try:
+        return _worker_engine.extract_text_batch(images, binaries)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _ping_job() -> int:
+    if _worker_engine is None:
+        raise RuntimeError("OCR-движок в процессе пула не загружен.")
+    return os.getpid()
+
+
+class OcrWorkerPool:
+    """
+    Долгоживущий пул процессов с заранее загруженными OCR-движками.
+    Задания (ROI или пачки ROI) подаются через общую очередь пула; процесс
+    перезапускается после max_jobs_per_worker заданий, чтобы не копилась память
+    моделей. Пул общий для всех документов и запросов (см. get_ocr_pool).
+    """
+    def __init__(self,
+                 ocr_engine: OcrEngine = OcrEngine.TESSERACT,
+                 workers: int = 2,
+                 max_jobs_per_worker: Optional[int] = 500,
+                 engine_threads: int = 1):
+        """
+        Args:
+            ocr_engine: движок, загружаемый в каждом процессе.
+            workers: количество процессов.
+            max_jobs_per_worker: после стольких заданий процесс пересоздаётся (None - никогда).
+            engine_threads: ограничение внутренних потоков движка в каждом процессе.
+        """
+        self.ocr_engine = ocr_engine
+        self.workers = workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.engine_threads = engine_threads
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._start()
+
+    def _start(self) -> None:
+        self.logger.info(f"Запуск пула OCR: {self.workers} процессов, движок {self.ocr_engine.name}.")
+        # max_tasks_per_child несовместим с fork, поэтому процессы запускаются через spawn
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_ocr_worker,
+            initargs=(self.ocr_engine, self.engine_threads),
+            max_tasks_per_child=self.max_jobs_per_worker,
+        )
+
+    def submit(self, image: np.ndarray, binary: Optional[np.ndarray] = None) -> Future:
+        """Распознаёт один ROI в процессе пула."""
+        return self._submit(_ocr_job, image, binary)
+
+    def submit_batch(self, images: List[np.ndarray], binaries: Optional[List[np.ndarray]] = None) -> Future:
+        """Распознаёт пачку ROI одним заданием."""
+        return self._submit(_ocr_batch_job, images, binaries)
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            try:
+                return self._executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self.logger.warning("Пул OCR сломан, перезапуск.")
+                self._restart_locked()
+                return self._executor.submit(fn, *args)
+
+    def health_check(self, timeout: float = 60.0) -> bool:
+        """
+        Проверяет, что процессы пула живы и движки загружены.
+        При неудаче пул перезапускается и возвращается False.
+        """
+        with self._lock:
+            executor = self._executor
+        try:
+            futures = [executor.submit(_ping_job) for _ in range(self.workers)]
+            for fut in futures:
+                fut.result(timeout=timeout)
+            return True
+        except Exception as e:
+            self.logger.error(f"Проверка пула OCR не пройдена: {e}")
+            self.restart()
+            return False
+
+    def restart(self) -> None:
+        with self._lock:
+            self._restart_locked()
+
+    def _restart_locked(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+_pools: Dict[OcrEngine, OcrWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ocr_pool(ocr_engine: OcrEngine = OcrEngine.TESSERACT, **kwargs) -> OcrWorkerPool:
+    """
+    Возвращает общий для процесса пул для движка, создавая его при первом обращении.
+    kwargs передаются в OcrWorkerPool и учитываются только при создании.
+    """
+    with _pools_lock:
+        pool = _pools.get(ocr_engine)
+        if pool is None:
+            pool = OcrWorkerPool(ocr_engine=ocr_engine, **kwargs)
+            _pools[ocr_engine] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_ocr_pools() -> None:
+    """Останавливает все общие пулы OCR."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False)
+        _pools.clear()
@@ -0,0 +1,80 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .image_processing import binarize_inv, remove_lines_by_mask
+
+
+class PageContext:
+    """
+    Растры одной страницы скана, общие для всех этапов обработки.
+    Каждый растр считается один раз при первом обращении и дальше только нарезается:
+    поиск линий, поиск абзацев, удаление линий и OCR берут срезы отсюда, а не
+    размывают и бинаризуют одни и те же пиксели заново.
+
+    binary_inv описывает страницу до удаления линий таблиц; cleaned, cleaned_binary_inv
+    и ink_integral - после (remove_lines сбрасывает их кэш).
+    """
+    def __init__(self, gray: np.ndarray):
+        """
+        Args:
+            gray: полутоновая страница; remove_lines изменяет её на месте.
+        """
+        self.gray = gray
+        self._binary_inv: Optional[np.ndarray] = None
+        self._cleaned: Optional[np.ndarray] = None
+        self._cleaned_binary_inv: Optional[np.ndarray] = None
+        self._ink_integral: Optional[np.ndarray] = None
+
+    @property
+    def shape(self):
+        return self.gray.shape
+
+    @property
+    def binary_inv(self) -> np.ndarray:
+        """Размытая и бинаризованная по Отсу страница, чернила - 255 (для линий и абзацев)."""
+        if self._binary_inv is None:
+            self._binary_inv = binarize_inv(self.gray)
+        return self._binary_inv
+
+    @property
+    def cleaned(self) -> np.ndarray:
+        """Страница без линий таблиц после медианного фильтра - источник ROI для OCR."""
+        if self._cleaned is None:
+            self._cleaned = cv2.medianBlur(self.gray, 3)
+        return self._cleaned
+
+    @property
+    def cleaned_binary_inv(self) -> np.ndarray:
+        """Бинаризация cleaned для поиска блоков текста в ROI (вместо бинаризации каждого ROI)."""
+        if self._cleaned_binary_inv is None:
+            blur = cv2.blur(self.cleaned, (3, 3))
+            self._cleaned_binary_inv = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+        return self._cleaned_binary_inv
+
+    @property
+    def ink_integral(self) -> np.ndarray:
+        """Интегральное изображение чернил cleaned_binary_inv (1 - чернила): сумма по любому прямоугольнику за O(1)."""
+        if self._ink_integral is None:
+            ink = cv2.threshold(self.cleaned_binary_inv, 0, 1, cv2.THRESH_BINARY)[1]
+            self._ink_integral = cv2.integral(ink, sdepth=cv2.CV_32S)
+        return self._ink_integral
+
+    def ink_count(self, x1: int, y1: int, x2: int, y2: int) -> int:
+        """Число пикселей чернил в прямоугольнике [x1, x2) x [y1, y2) страницы без линий таблиц."""
+        h, w = self.gray.shape[:2]
+        x1, x2 = min(max(x1, 0), w), min(max(x2, 0), w)
+        y1, y2 = min(max(y1, 0), h), min(max(y2, 0), h)
+        if x2 <= x1 or y2 <= y1:
+            return 0
+        s = self.ink_integral
+        return int(s[y2, x2] - s[y1, x2] - s[y2, x1] + s[y1, x1])
+
+    def remove_lines(self, x: int, y: int, w: int, h: int, mask: np.ndarray) -> None:
+        """Заливает белым линии mask в области (x, y, w, h) страницы на месте."""
+        roi = self.gray[y:y+h, x:x+w]
+        remove_lines_by_mask(roi, mask, out=roi)
+        self._cleaned = None
+        self._cleaned_binary_inv = None
+        self._ink_integral = None
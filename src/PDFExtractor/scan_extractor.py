@@ -1,22 +1,27 @@
+from functools import partial
 import logging
-from typing import Any, List, Optional, Tuple
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import cv2
 import numpy as np
 
 
 from .image_processing import find_lines
 from .image_processing import find_max_contours
-from .image_processing import detected_text
-from .image_processing import remove_lines_by_mask
+from .image_processing import close_text_blocks
+from .page_context import PageContext
 
 
-from .utils import page_to_image
+from .utils import DEFAULT_DPI
+from .utils import render_gray
 from .utils import find_line_positions 
-from .utils import has_line
+from .utils import interval_max_runs
 
 from .base_extractor import (BBox, 
                              BaseExtractor, 
                              Cell, 
+                             LazyCell,
+                             Page,
                              Paragraph, 
                              ParagraphType, 
                              Table)
@@ -24,21 +29,96 @@ from .base_extractor import (BBox,
 from PIL import Image
 
 from .ocr_engine import OCR, OcrEngine
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ocr_pool import OcrWorkerPool
+from .document_cache import DocumentCache, PageCache
+from concurrent.futures import as_completed
+
+# Ячейка с меньшим числом пикселей чернил (при 300 DPI) считается пустой и не распознаётся
+BLANK_CELL_MIN_INK = 40
+# Отступ внутрь ячейки при подсчёте чернил: остатки удалённых линий сетки не учитываются
+BLANK_CELL_INSET = 4
+# Двухфазный OCR: сколько верхних строк таблицы распознаётся до выбора столбцов
+HEADER_ROWS = 4
 
 # http://ieeexplore.ieee.org/document/9752204
 class ScanExtractor(BaseExtractor):
     '''Извлекает структуру документа если он отсканирован'''
-    def __init__(self, ocr:Optional[OcrEngine]=OcrEngine.TESSERACT, max_workers: int = 4):
-        self.ocr = OCR(ocr_engine=ocr)
+    def __init__(self, ocr:Optional[OcrEngine]=OcrEngine.TESSERACT, max_workers: int = 4, page_workers: int = 1,
+                 batch_ocr: bool = False, ocr_pool: Optional[OcrWorkerPool] = None,
+                 cache: Optional[DocumentCache] = None, dpi: int = DEFAULT_DPI,
+                 page_cache: Optional[PageCache] = None, blank_cell_min_ink: int = BLANK_CELL_MIN_INK,
+                 column_selector: Optional[Callable[[Table], Optional[Set[int]]]] = None,
+                 header_rows: int = HEADER_ROWS):
+        """
+        Args:
+            ocr: OCR-движок.
+            max_workers: количество потоков для вызовов OCR на странице.
+            page_workers: количество процессов для постраничной обработки.
+            batch_ocr: распознавать ROI страницы пачками (max_workers вызовов движка на страницу
+                вместо одного вызова на каждую ячейку/абзац). Включается явно: слова раскладываются
+                по ROI по положению на общем холсте (см. TesseractEngine.extract_text_batch).
+            ocr_pool: общий пул процессов с загруженными движками (см. get_ocr_pool).
+                В процессы постраничной обработки (page_workers > 1) пул не передаётся.
+            cache: кэш извлечённых документов.
+            dpi: разрешение рендеринга страниц для распознавания.
+            page_cache: кэш результатов отдельных страниц (по пикселям отрендеренной страницы).
+            blank_cell_min_ink: порог чернил (в пикселях при 300 DPI), ниже которого ячейка
+                считается пустой и в OCR не отправляется; 0 - распознавать все ячейки.
+            column_selector: включает двухфазный OCR. Сначала распознаются абзацы и первые
+                header_rows строк таблиц, затем column_selector получает таблицу из этих строк и
+                возвращает номера нужных столбцов (None - заголовок не найден, нужны все).
+                Ячейки остальных столбцов становятся LazyCell и распознаются при первом
+                обращении к text. Например, ReconciliationActExtractor.select_ocr_columns.
+                Для page_workers > 1 должен передаваться через pickle. Страницы и документы
+                с отложенными ячейками не кэшируются (запись в кэш распознала бы их сразу).
+            header_rows: количество строк шапки, распознаваемых в первой фазе.
+        """
+        super().__init__(page_workers=page_workers, cache=cache, dpi=dpi)
+        self.ocr_engine = ocr
+        self.ocr = OCR(ocr_engine=ocr, max_workers=max_workers, pool=ocr_pool)
         self.max_workers = max_workers
+        self.batch_ocr = batch_ocr
+        self.page_cache = page_cache
+        self.blank_cell_min_ink = blank_cell_min_ink
+        self.column_selector = column_selector
+        self.header_rows = header_rows
         self.logger = logging.getLogger('app.' + __class__.__name__)
 
-    def _process(self, page) -> Tuple[List[Paragraph], List[Table]]:
-        
-        image = page_to_image(page)
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        h_lines, v_lines = find_lines(gray)
+    def _worker_kwargs(self) -> Dict[str, Any]:
+        return dict(super()._worker_kwargs(), ocr=self.ocr_engine, max_workers=self.max_workers, batch_ocr=self.batch_ocr,
+                    page_cache=self.page_cache, blank_cell_min_ink=self.blank_cell_min_ink,
+                    column_selector=self.column_selector, header_rows=self.header_rows)
+
+    def _uses_document_state(self) -> bool:
+        # столбцы продолжения таблицы берутся со страницы с шапкой (_select_columns)
+        return self.column_selector is not None
+
+    def _cache_namespace(self) -> str:
+        engine = self.ocr_engine.name if self.ocr_engine is not None else OcrEngine.TESSERACT.name
+        return f"{super()._cache_namespace()}:ocr={engine}:blank={self.blank_cell_min_ink}"
+
+    def _process(self, page, doc_state: Dict[str, Any]) -> Tuple[List[Paragraph], List[Table]]:
+
+        cpu_start = time.process_time()
+        # полутоновый рендеринг без промежуточных RGB-копий (см. render_gray)
+        gray = render_gray(page, dpi=self.dpi)
+
+        page_key = None
+        if self.page_cache is not None:
+            # ключ считаем до удаления линий, которое меняет gray
+            page_key = self.page_cache.make_key(gray, self._cache_namespace())
+            cached_page = self.page_cache.get(page_key)
+            if cached_page is not None:
+                self.logger.debug("Страница найдена в кэше, поиск линий и OCR пропущены.")
+                if self.column_selector is not None:
+                    # в кэше только полностью распознанные страницы: по их шапкам
+                    # восстанавливаем столбцы для продолжения таблицы на следующей странице
+                    for tbl in cached_page.tables:
+                        self._select_columns(tbl, doc_state)
+                return cached_page.paragraphs, cached_page.tables
+
+        ctx = PageContext(gray)
+        h_lines, v_lines = find_lines(gray, binary_inv=ctx.binary_inv)
 
         mask = h_lines + v_lines
         # Image.fromarray(mask).show()
@@ -46,7 +126,7 @@ class ScanExtractor(BaseExtractor):
         contours = find_max_contours(mask, max=5)
 
         # находим абзацы
-        paragraphs = self._extract_paragraph_blocks(gray, contours, margin=2)
+        paragraphs = self._extract_paragraph_blocks(ctx, contours, margin=2)
 
         tables: List[Table] = []
         for x, y, w, h in contours:
@@ -59,10 +139,7 @@ class ScanExtractor(BaseExtractor):
                 h_lines[y:y+h, x:x+w]
             )
             
-            gray[y:y+h, x:x+w] = remove_lines_by_mask(
-                gray[y:y+h, x:x+w],
-                mask_roi
-            )
+            ctx.remove_lines(x, y, w, h, mask_roi)
             # получаем сетку таблицы (по умолчанию объединим только столбцы)
             # можно объдинить и столбцы и строки, но есть таблицы, где строки объединены 
             # не логично, либо линия скрыта. 
@@ -80,93 +157,225 @@ class ScanExtractor(BaseExtractor):
                 )
             )
         # На простых файлах работает, но нужен алгоритм обработки
-        cleaned = cv2.medianBlur(gray, 3)
+        cleaned = ctx.cleaned
+        cleaned_binary = ctx.cleaned_binary_inv
 
         # посмотри что получилось
         # Image.fromarray(cleaned).show()
         
-        tasks: List[Tuple[Any, np.ndarray]] = []
+        # ROI для OCR и их бинаризация - срезы растров страницы
+        tasks: List[Tuple[Any, np.ndarray, np.ndarray]] = []
         for p in paragraphs:
-            roi = cleaned[p.bbox.y1:p.bbox.y2, p.bbox.x1:p.bbox.x2]
-            tasks.append((p, roi))
-        for tbl in tables:
+            box = p.bbox
+            tasks.append((p, cleaned[box.y1:box.y2, box.x1:box.x2], cleaned_binary[box.y1:box.y2, box.x1:box.x2]))
+        # строки таблиц ниже шапки в двухфазном режиме: распознаются после выбора столбцов
+        body_tasks: List[Tuple[int, Tuple[Any, np.ndarray, np.ndarray]]] = []
+        two_phase = self.column_selector is not None
+        # порог чернил задан для 300 DPI, площадь растёт квадратично
+        min_ink = self.blank_cell_min_ink * (self.dpi / DEFAULT_DPI) ** 2
+        blank_cells = 0
+        for tbl_idx, tbl in enumerate(tables):
             for c in tbl.cells:
+                if min_ink > 0:
+                    inner = c.bbox.padding(-BLANK_CELL_INSET)
+                    if ctx.ink_count(inner.x1, inner.y1, inner.x2, inner.y2) < min_ink:
+                        # пустая ячейка (неиспользуемая сторона дебет/кредит, пустая дата) - без OCR
+                        c.text = ''
+                        blank_cells += 1
+                        continue
                 
                 pad_box = c.bbox.padding(2)
                 roi = cleaned[pad_box.y1:pad_box.y2, pad_box.x1:pad_box.x2]
-                
+                roi_binary = cleaned_binary[pad_box.y1:pad_box.y2, pad_box.x1:pad_box.x2]
                     
-                tasks.append((c, roi))
-
-        # распараллеливаем вызовы OCR в потоках
-        with ThreadPoolExecutor(max_workers=self.max_workers) as exe:
-            future_to_obj = {
-                exe.submit(self.ocr.extract, roi): obj
-                for obj, roi in tasks
-            }
-            for fut in as_completed(future_to_obj):
-                obj = future_to_obj[fut]
-                try:
-                    # Предполагаем, что fut.result() возвращает кортеж (текст, список_боксов_относительно_ROI).
-                    # OCR-движок должен сам корректировать координаты с учетом внутренних преобразований (например, полей).
-                    (ocr_text_result, boxes_from_ocr) = fut.result()
-                    obj.text = ocr_text_result
-
-                    # Определяем координаты верхнего левого угла ROI на странице,
-                    # из которого был извлечен текст для данного obj.
-                    # Эта логика должна соответствовать тому, как создавались ROI в списке tasks.
-                    if isinstance(obj, Paragraph):
-                        # Для абзацев ROI обычно берется из obj.bbox
-                        roi_origin_x_on_page = obj.bbox.x1
-                        roi_origin_y_on_page = obj.bbox.y1
-                    elif isinstance(obj, Cell):
-                        # Для ячеек в вашем коде ROI создается с отступом (padding).
-                        # Например, для ячейки (5,1) используется obj.bbox.padding(2).
-                        # Эта логика должна быть последовательной для всех обрабатываемых ячеек.
-                        CELL_ROI_PADDING = 12 # Это значение должно соответствовать созданию ROI для ячеек
-                        padded_bbox_for_cell_roi = obj.bbox.padding(CELL_ROI_PADDING)
-                        roi_origin_x_on_page = padded_bbox_for_cell_roi.x1
-                        roi_origin_y_on_page = padded_bbox_for_cell_roi.y1
-                    else:
-                        # Неизвестный тип объекта, пропускаем добавление blobs.
-                        # Можно добавить логирование или обработку ошибки.
-                        continue
-
-                    for x_roi, y_roi, w_roi, h_roi in boxes_from_ocr:
-                        # x_roi, y_roi - координаты относительно верхнего левого угла ROI.
-                        # Преобразуем в абсолютные координаты страницы.
-                        abs_x1 = roi_origin_x_on_page + x_roi
-                        abs_y1 = roi_origin_y_on_page + y_roi
-                        abs_x2 = abs_x1 + w_roi # x2 = x1 + ширина
-                        abs_y2 = abs_y1 + h_roi # y2 = y1 + высота
-                        
-                        obj.blobs.append(BBox(x1=abs_x1, y1=abs_y1, x2=abs_x2, y2=abs_y2)) 
+                if two_phase and c.row >= self.header_rows:
+                    body_tasks.append((tbl_idx, (c, roi, roi_binary)))
+                else:
+                    tasks.append((c, roi, roi_binary))
+
+        ocr_failures = self._run_ocr(tasks)
+        ocr_rois = len(tasks)
+        lazy_cells = 0
+        if body_tasks:
+            # фаза 2: по распознанной шапке выбираем столбцы, остальные ячейки - ленивые
+            selected = [self._select_columns(tbl, doc_state) for tbl in tables]
+            eager_tasks = []
+            lazy: Dict[int, LazyCell] = {}
+            for tbl_idx, task in body_tasks:
+                c, roi, roi_binary = task
+                columns = selected[tbl_idx]
+                if columns is None or not columns.isdisjoint(range(c.col, c.col + c.colspan)):
+                    eager_tasks.append(task)
+                    continue
+                # копии ROI, чтобы не держать растры страницы до обращения к ячейке
+                lazy[id(c)] = LazyCell(
+                    bbox=c.bbox, row=c.row, col=c.col, colspan=c.colspan, rowspan=c.rowspan,
+                    loader=partial(self._recognize_cell, c.bbox, roi.copy(), roi_binary.copy()),
+                )
+            ocr_failures += self._run_ocr(eager_tasks)
+            ocr_rois += len(eager_tasks)
+            lazy_cells = len(lazy)
+            if lazy:
+                for tbl in tables:
+                    tbl.cells = [lazy.get(id(c), c) for c in tbl.cells]
+
+        page_stats = doc_state.setdefault('page_stats', {})
+        page_stats['blank_cells_skipped'] = blank_cells
+        page_stats['ocr_rois'] = ocr_rois
+        if two_phase:
+            page_stats['lazy_cells'] = lazy_cells
+
+        # страницы с ошибками OCR не кэшируем, чтобы при повторной отправке распознать их заново;
+        # страницы с отложенными ячейками - тоже: сериализация для кэша распознала бы их сразу
+        if page_key is not None and not ocr_failures and not lazy_cells:
+            self.page_cache.put(page_key, Page(tables=tables, paragraphs=paragraphs))
+
+        self.logger.debug(f"Страница {page.number}: {ocr_rois} ROI, пустых ячеек {blank_cells}, отложено {lazy_cells}, CPU {time.process_time() - cpu_start:.2f} c.")
+        return paragraphs, tables
 
+    def _run_ocr(self, tasks: List[Tuple[Any, np.ndarray, np.ndarray]]) -> int:
+        """Распознаёт ROI выбранным способом; возвращает количество ошибок."""
+        if self.batch_ocr:
+            return self._run_ocr_batched(tasks)
+        return self._run_ocr_per_roi(tasks)
+
+    def _select_columns(self, tbl: Table, doc_state: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        Столбцы таблицы, распознаваемые сразу (None - все). Таблица без найденной шапки
+        с тем же числом столбцов, что и последняя таблица с шапкой этого документа,
+        считается её продолжением. (Число столбцов, выбранные столбцы) последней таблицы
+        с шапкой хранятся в doc_state['carry_columns'].
+        """
+        n_cols = max((c.col + c.colspan for c in tbl.cells), default=0)
+        header = Table(bbox=tbl.bbox, cells=[c for c in tbl.cells if c.row < self.header_rows])
+        columns = self.column_selector(header)
+        if columns is not None:
+            doc_state['carry_columns'] = (n_cols, set(columns))
+            return set(columns)
+        carry = doc_state.get('carry_columns')
+        if carry is not None and carry[0] == n_cols:
+            return carry[1]
+        return None
+
+    def _recognize_cell(self, bbox: BBox, roi: np.ndarray, roi_binary: np.ndarray) -> Tuple[str, List[BBox]]:
+        """Загрузчик LazyCell: синхронно распознаёт ROI ячейки, возвращает (text, blobs)."""
+        probe = Cell(bbox=bbox, row=0, col=0, colspan=1, rowspan=1, text='')
+        try:
+            self._apply_ocr_result(probe, self.ocr.extract(roi, roi_binary))
+        except Exception as e:
+            self.logger.error(f"Ошибка отложенного OCR ячейки {bbox}: {e}")
+            return '', []
+        return probe.text, probe.blobs
+
+    def _run_ocr_per_roi(self, tasks: List[Tuple[Any, np.ndarray, np.ndarray]]) -> int:
+        """
+        Один вызов OCR на каждый ROI, вызовы выполняются параллельно (потоки OCR или пул процессов).
+        Возвращает количество ROI, которые не удалось распознать.
+        """
+        failures = 0
+        future_to_obj = {
+            self.ocr.submit(roi, roi_binary): obj
+            for obj, roi, roi_binary in tasks
+        }
+        for fut in as_completed(future_to_obj):
+            obj = future_to_obj[fut]
+            try:
+                self._apply_ocr_result(obj, fut.result())
+            except Exception as e:
+                self.logger.error(f"Ошибка OCR для {type(obj).__name__} {getattr(obj, 'bbox', None)}: {e}")
+                obj.text = ''
+                failures += 1
+        return failures
+
+    def _run_ocr_batched(self, tasks: List[Tuple[Any, np.ndarray, np.ndarray]]) -> int:
+        """
+        Пакетное распознавание: ROI страницы делятся на max_workers групп,
+        каждая группа распознаётся одним вызовом движка (для tesseract - один процесс).
+        Возвращает количество ROI, которые не удалось распознать.
+        """
+        failures = 0
+        if not tasks:
+            return failures
+        n_chunks = min(self.max_workers, len(tasks))
+        chunk_size = -(-len(tasks) // n_chunks)
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+        future_to_chunk = {
+            self.ocr.submit_batch([roi for _, roi, _ in chunk], [roi_binary for _, _, roi_binary in chunk]): chunk
+            for chunk in chunks
+        }
+        for fut in as_completed(future_to_chunk):
+            chunk = future_to_chunk[fut]
+            try:
+                results = fut.result()
+            except Exception as e:
+                self.logger.error(f"Ошибка пакетного OCR ({len(chunk)} ROI): {e}", exc_info=True)
+                results = [('', [])] * len(chunk)
+                failures += len(chunk)
+            for (obj, _, _), result in zip(chunk, results):
+                try:
+                    self._apply_ocr_result(obj, result)
                 except Exception as e:
-                    print(f"Error processing OCR result for object type {type(obj)} (bbox: {obj.bbox if hasattr(obj, 'bbox') else 'N/A'}). Exception: {e}")
+                    self.logger.error(f"Ошибка OCR для {type(obj).__name__} {getattr(obj, 'bbox', None)}: {e}")
                     obj.text = ''
-
-        return paragraphs, tables
+                    failures += 1
+        return failures
+
+    def _apply_ocr_result(self, obj: Any, result: Tuple[str, List[Tuple[int, int, int, int]]]) -> None:
+        # Предполагаем, что result - это кортеж (текст, список_боксов_относительно_ROI).
+        # OCR-движок должен сам корректировать координаты с учетом внутренних преобразований (например, полей).
+        (ocr_text_result, boxes_from_ocr) = result
+        obj.text = ocr_text_result
+
+        # Определяем координаты верхнего левого угла ROI на странице,
+        # из которого был извлечен текст для данного obj.
+        # Эта логика должна соответствовать тому, как создавались ROI в списке tasks.
+        if isinstance(obj, Paragraph):
+            # Для абзацев ROI обычно берется из obj.bbox
+            roi_origin_x_on_page = obj.bbox.x1
+            roi_origin_y_on_page = obj.bbox.y1
+        elif isinstance(obj, Cell):
+            # Для ячеек в вашем коде ROI создается с отступом (padding).
+            # Например, для ячейки (5,1) используется obj.bbox.padding(2).
+            # Эта логика должна быть последовательной для всех обрабатываемых ячеек.
+            CELL_ROI_PADDING = 12 # Это значение должно соответствовать созданию ROI для ячеек
+            padded_bbox_for_cell_roi = obj.bbox.padding(CELL_ROI_PADDING)
+            roi_origin_x_on_page = padded_bbox_for_cell_roi.x1
+            roi_origin_y_on_page = padded_bbox_for_cell_roi.y1
+        else:
+            # Неизвестный тип объекта, пропускаем добавление blobs.
+            # Можно добавить логирование или обработку ошибки.
+            return
+
+        for x_roi, y_roi, w_roi, h_roi in boxes_from_ocr:
+            # x_roi, y_roi - координаты относительно верхнего левого угла ROI.
+            # Преобразуем в абсолютные координаты страницы.
+            abs_x1 = roi_origin_x_on_page + x_roi
+            abs_y1 = roi_origin_y_on_page + y_roi
+            abs_x2 = abs_x1 + w_roi # x2 = x1 + ширина
+            abs_y2 = abs_y1 + h_roi # y2 = y1 + высота
+            
+            obj.blobs.append(BBox(x1=abs_x1, y1=abs_y1, x2=abs_x2, y2=abs_y2)) 
 
 
     def _extract_paragraph_blocks(
         self,
-        gray: np.ndarray,
+        ctx: PageContext,
         table_contours: List[Tuple[int, int, int, int]], 
         margin: int = 5
     ) -> List[Paragraph]:
-        h_img, w_img = gray.shape[:2]
+        h_img, w_img = ctx.shape[:2]
         
-        # 1. Создать копию изображения gray для модификации
-        gray_for_text_detection = gray.copy()
+        # 1. Создать копию бинаризованной страницы для модификации
+        binary_for_text_detection = ctx.binary_inv.copy()
 
-        # 2. Если есть контуры таблиц, "закрасить" эти области
+        # 2. Если есть контуры таблиц, "стереть" эти области (в инвертированной маске фон - 0)
         if table_contours:
             for x, y, w, h in table_contours:
-                cv2.rectangle(gray_for_text_detection, (x, y), (x + w, y + h), (255), -1) # Закрасить белым
+                cv2.rectangle(binary_for_text_detection, (x, y), (x + w, y + h), (0), -1)
 
-        # 3. На модифицированном изображении получить маску текстовых регионов
-        text_mask = detected_text(gray_for_text_detection, 50, 30)
+        # 3. На модифицированной маске получить текстовые регионы
+        text_mask = close_text_blocks(binary_for_text_detection, 50, 30)
         # Image.fromarray(text_mask).show()
 
         # 4. Найти контуры абзацев
@@ -280,10 +489,20 @@ class ScanExtractor(BaseExtractor):
         # матрица посещения, чтоб не создавать ячейку дважды
         n_rows, n_cols = len(ys) - 1, len(xs) - 1
         used = [[False]*n_cols for _ in range(n_rows)]
-        margin = 0  # Отступ от краев ячейки при проверке линии
         line_frac = 0.2 # Минимальная доля длины линии относительно высоты/ширины ячейки
         line_check_thickness = 3 # Толщина области вокруг линии для проверки (в пикселях в каждую сторону)
-        
+
+        # Индекс разделителей строится один раз на таблицу, дальше решения о colspan/rowspan -
+        # обращения к массивам вместо повторного сканирования одних и тех же полос маски
+        xs_arr = np.asarray(xs, dtype=np.intp)
+        ys_arr = np.asarray(ys, dtype=np.intp)
+        v_sep = None
+        if span_mode in (0, 1): # 0: оба, 1: только colspan
+            v_sep = self._vertical_separators(pure_v, xs_arr, ys_arr, line_check_thickness, line_frac)
+        h_sep = None
+        if span_mode in (0, 2): # 0: оба, 2: только rowspan
+            h_sep = self._horizontal_separators(pure_h, xs_arr, ys_arr, line_check_thickness, line_frac)
+
         cells: list[Cell] = []
         for r_idx in range(n_rows):
             for c_idx in range(n_cols):
@@ -292,67 +511,29 @@ class ScanExtractor(BaseExtractor):
                 
                 # Начальные границы базовой ячейки (координаты относительно ROI таблицы)
                 x0_base_cell, y0_base_cell = xs[c_idx], ys[r_idx]
-                x1_base_cell, y1_base_cell = xs[c_idx+1], ys[r_idx+1]
                 
                 # Текущие границы объединяемой ячейки, будут расширяться
-                current_x1_merged = x1_base_cell
-                current_y1_merged = y1_base_cell
+                current_x1_merged = xs[c_idx+1]
+                current_y1_merged = ys[r_idx+1]
                 
                 col_span = 1
                 # Проверка colspan (объединение столбцов)
-                if span_mode in (0, 1): # 0: оба, 1: только colspan
+                if v_sep is not None:
                     for next_c in range(c_idx + 1, n_cols):
-                        # Потенциальная вертикальная линия-разделитель находится на xs[next_c]
-                        # Эта линия разделяет столбец (next_c - 1) и столбец next_c
-                        
-                        # Определяем y-диапазон для проверки (высота текущей строки с отступами)
-                        y_check_s = y0_base_cell + margin
-                        y_check_e = y1_base_cell - margin
-
-                        # Определяем x-диапазон (узкая полоса) вокруг потенциальной вертикальной линии xs[next_c]
-                        x_line_candidate_pos = xs[next_c]
-                        x_check_s = max(0, x_line_candidate_pos - line_check_thickness)
-                        x_check_e = min(pure_v.shape[1], x_line_candidate_pos + line_check_thickness + 1) # +1 для среза
-
-                        if y_check_e <= y_check_s or x_check_e <= x_check_s: # Невалидный регион
-                            break
-
-                        # Извлекаем узкую вертикальную полосу из маски вертикальных линий
-                        region_to_check_for_line = pure_v[y_check_s:y_check_e, x_check_s:x_check_e]
-                        
-                        min_len_for_separator = int((y_check_e - y_check_s) * line_frac)
-                        
-                        if has_line(region_to_check_for_line, min_len_for_separator, axis=0): # axis=0 для вертикальной линии
+                        # Линия xs[next_c] разделяет столбцы (next_c - 1) и next_c в строке r_idx
+                        if v_sep[r_idx, next_c]:
                             break # Найдена разделяющая линия, прекращаем объединение столбцов
-                        
                         # Линия не найдена, расширяем colspan
                         current_x1_merged = xs[next_c + 1] # Обновляем правую границу объединенной ячейки
                         col_span += 1
                 
                 row_span = 1
                 # Проверка rowspan (объединение строк)
-                if span_mode in (0, 2): # 0: оба, 2: только rowspan
+                if h_sep is not None:
                     for next_r in range(r_idx + 1, n_rows):
-                        # Потенциальная горизонтальная линия-разделитель находится на ys[next_r]
-                        
-                        # Определяем x-диапазон для проверки (ширина текущей объединенной по столбцам ячейки с отступами)
-                        x_check_s = x0_base_cell + margin
-                        x_check_e = current_x1_merged - margin # Используем current_x1_merged, т.к. colspan уже учтен
-
-                        # Определяем y-диапазон (узкая полоса) вокруг потенциальной горизонтальной линии ys[next_r]
-                        y_line_candidate_pos = ys[next_r]
-                        y_check_s = max(0, y_line_candidate_pos - line_check_thickness)
-                        y_check_e = min(pure_h.shape[0], y_line_candidate_pos + line_check_thickness + 1)
-
-                        if x_check_e <= x_check_s or y_check_e <= y_check_s: # Невалидный регион
-                            break
-                        
-                        region_to_check_for_line = pure_h[y_check_s:y_check_e, x_check_s:x_check_e]
-                        min_len_for_separator = int((x_check_e - x_check_s) * line_frac)
-
-                        if has_line(region_to_check_for_line, min_len_for_separator, axis=1): # axis=1 для горизонтальной линии
+                        # Линия ys[next_r] на всей ширине объединенной по столбцам ячейки (colspan уже учтен)
+                        if h_sep[next_r, c_idx, c_idx + col_span]:
                             break # Найдена разделяющая линия, прекращаем объединение строк
-                        
                         current_y1_merged = ys[next_r + 1] # Обновляем нижнюю границу
                         row_span += 1
                 
@@ -374,4 +555,45 @@ class ScanExtractor(BaseExtractor):
                         text='',       
                     )
                 )
-        return cells  
\ No newline at end of file
+        return cells  
+
+    @staticmethod
+    def _vertical_separators(pure_v: np.ndarray, xs: np.ndarray, ys: np.ndarray,
+                             thickness: int, line_frac: float) -> np.ndarray:
+        """
+        Индекс вертикальных разделителей: sep[r, k] = True, если в строке r сетки вдоль линии xs[k]
+        (в полосе +-thickness пикселей) есть сплошной сегмент не короче line_frac высоты строки.
+        """
+        n_rows, n_cols = len(ys) - 1, len(xs) - 1
+        sep = np.ones((n_rows, n_cols + 1), dtype=bool)
+        heights = ys[1:] - ys[:-1]
+        min_lengths = (heights * line_frac).astype(np.intp)
+        for k in range(1, n_cols):
+            strip = pure_v[:, max(0, xs[k] - thickness):min(pure_v.shape[1], xs[k] + thickness + 1)]
+            if strip.shape[1] == 0:
+                continue
+            runs = interval_max_runs(strip, 0, ys[:-1], ys[1:])
+            # пустая строка считается разделённой, нулевая минимальная длина - нет (как в has_line)
+            sep[:, k] = (heights <= 0) | ((min_lengths > 0) & (runs >= min_lengths))
+        return sep
+
+    @staticmethod
+    def _horizontal_separators(pure_h: np.ndarray, xs: np.ndarray, ys: np.ndarray,
+                               thickness: int, line_frac: float) -> np.ndarray:
+        """
+        Индекс горизонтальных разделителей: sep[k, c0, c1] = True, если вдоль линии ys[k]
+        на отрезке столбцов [c0, c1) есть сплошной сегмент не короче line_frac его ширины.
+        """
+        n_rows, n_cols = len(ys) - 1, len(xs) - 1
+        sep = np.ones((n_rows + 1, n_cols, n_cols + 1), dtype=bool)
+        c0, c1 = np.triu_indices(n_cols + 1, k=1)
+        lo, hi = xs[c0], xs[c1]
+        widths = hi - lo
+        min_lengths = (widths * line_frac).astype(np.intp)
+        for k in range(1, n_rows):
+            strip = pure_h[max(0, ys[k] - thickness):min(pure_h.shape[0], ys[k] + thickness + 1), :]
+            if strip.shape[0] == 0:
+                continue
+            runs = interval_max_runs(strip, 1, lo, hi)
+            sep[k, c0, c1] = (widths <= 0) | ((min_lengths > 0) & (runs >= min_lengths))
+        return sep
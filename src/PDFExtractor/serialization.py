@@ -0,0 +1,248 @@
+"""
+Компактный двоичный формат Document/Page для передачи между процессами и кэшей.
+
+Геометрия всех уровней упакована в непрерывные массивы int32 (страницы, таблицы,
+ячейки, абзацы, blobs), весь текст - одна таблица строк (UTF-8 и смещения символов),
+одинаковые строки хранятся один раз. Изображения страниц не сохраняются, pdf_bytes -
+по желанию. Отсутствующие значения (None) кодируются как -1.
+
+Раскладка: MAGIC, версия и флаги, затем секции в фиксированном порядке, каждая -
+длина (uint64) и байты: meta, pages, tables, cells, paragraphs, blobs, offsets, strings, pdf.
+"""
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base_extractor import BBox, Cell, ColumnarCells, Document, Page, Paragraph, ParagraphType, Table
+
+MAGIC = b"PDXB"
+VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_LENGTH = struct.Struct("<Q")
+_FLAG_PDF = 1
+
+# столбцы массивов
+_PAGE_COLS = 5    # num_page, n_tables, n_paragraphs, error, stats (индексы строк)
+_TABLE_COLS = 6   # x1, y1, x2, y2, start_page_num, n_cells
+_CELL_COLS = 11   # x1, y1, x2, y2, row, col, colspan, rowspan, original_page_num, text, n_blobs
+_PARA_COLS = 7    # x1, y1, x2, y2, type, text, n_blobs
+_N_SECTIONS = 9
+
+
+class _StringTable:
+    """Таблица строк с дедупликацией; None - индекс -1."""
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self._index[value] = idx
+            self.strings.append(value)
+        return idx
+
+    def add_many(self, values: List[Optional[str]]) -> List[int]:
+        return [self.add(v) for v in values]
+
+
+def _opt(value: Optional[int]) -> int:
+    return -1 if value is None else value
+
+
+def _none(value: int) -> Optional[int]:
+    return None if value < 0 else value
+
+
+def dumps_document(doc: Document, include_pdf: bool = False) -> bytes:
+    """Сериализует документ (без изображений; pdf_bytes - только при include_pdf)."""
+    return _pack(doc.pages, doc.page_count, doc.pdf_bytes if include_pdf else None)
+
+
+def loads_document(data: bytes, pdf_bytes: Optional[bytes] = None, columnar: bool = False) -> Document:
+    """
+    Восстанавливает документ. pdf_bytes подставляются, если их нет в данных.
+    columnar=True - ячейки таблиц загружаются сразу в ColumnarCells без создания объектов Cell.
+    """
+    pages, page_count, stored_pdf = _unpack(data, columnar)
+    return Document(pdf_bytes=stored_pdf if stored_pdf is not None else pdf_bytes,
+                    pages=pages, page_count=page_count)
+
+
+def dumps_page(page: Page) -> bytes:
+    """Сериализует одну страницу (без изображения)."""
+    return _pack([page], 1, None)
+
+
+def loads_page(data: bytes, columnar: bool = False) -> Page:
+    """Восстанавливает страницу, сериализованную dumps_page."""
+    pages, _, _ = _unpack(data, columnar)
+    if len(pages) != 1:
+        raise ValueError(f"Ожидалась одна страница, в данных {len(pages)}.")
+    return pages[0]
+
+
+def _pack_cells(cells, strings: _StringTable, cell_parts: List[np.ndarray], blob_parts: List[np.ndarray]) -> None:
+    if isinstance(cells, ColumnarCells) and not cells._blob_overrides:
+        # колоночная таблица уже хранит нужные массивы
+        arr = np.empty((len(cells), _CELL_COLS), dtype=np.int32)
+        arr[:, 0:4] = cells.bboxes
+        arr[:, 4] = cells.rows
+        arr[:, 5] = cells.cols
+        arr[:, 6] = cells.colspans
+        arr[:, 7] = cells.rowspans
+        arr[:, 8] = cells.page_nums
+        arr[:, 9] = strings.add_many(cells.texts)
+        arr[:, 10] = np.diff(cells.blob_offsets)
+        cell_parts.append(arr)
+        blob_parts.append(cells.blob_boxes)
+        return
+
+    rows = []
+    blobs = []
+    for c in cells:
+        cell_blobs = c.blobs
+        rows.append((*c.bbox.coords, c.row, c.col, c.colspan, c.rowspan, _opt(c.original_page_num),
+                     strings.add(c.text), len(cell_blobs)))
+        blobs.extend(b.coords for b in cell_blobs)
+    cell_parts.append(np.array(rows, dtype=np.int32).reshape(-1, _CELL_COLS))
+    blob_parts.append(np.array(blobs, dtype=np.int32).reshape(-1, 4))
+
+
+def _pack(pages: List[Page], page_count: int, pdf_bytes: Optional[bytes]) -> bytes:
+    strings = _StringTable()
+    page_rows, table_rows, para_rows = [], [], []
+    cell_parts: List[np.ndarray] = []
+    blob_parts: List[np.ndarray] = []
+    para_blobs = []
+
+    for page in pages:
+        page_rows.append((page.num_page, len(page.tables), len(page.paragraphs), strings.add(page.error),
+                          strings.add(json.dumps(page.stats) if page.stats else None)))
+        for table in page.tables:
+            table_rows.append((*table.bbox.coords, _opt(table.start_page_num), len(table.cells)))
+            _pack_cells(table.cells, strings, cell_parts, blob_parts)
+        for para in page.paragraphs:
+            p_blobs = para.blobs
+            para_rows.append((*para.bbox.coords, para.type.value, strings.add(para.text), len(p_blobs)))
+            para_blobs.extend(b.coords for b in p_blobs)
+    # blobs абзацев идут после blobs всех ячеек
+    blob_parts.append(np.array(para_blobs, dtype=np.int32).reshape(-1, 4))
+
+    offsets = np.zeros(len(strings.strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings.strings], out=offsets[1:])
+
+    sections = [
+        np.array([page_count], dtype=np.int64).tobytes(),
+        np.array(page_rows, dtype=np.int32).reshape(-1, _PAGE_COLS).tobytes(),
+        np.array(table_rows, dtype=np.int32).reshape(-1, _TABLE_COLS).tobytes(),
+        (np.concatenate(cell_parts) if cell_parts else np.empty((0, _CELL_COLS), np.int32)).astype(np.int32, copy=False).tobytes(),
+        np.array(para_rows, dtype=np.int32).reshape(-1, _PARA_COLS).tobytes(),
+        np.concatenate(blob_parts).astype(np.int32, copy=False).tobytes(),
+        offsets.tobytes(),
+        "".join(strings.strings).encode("utf-8"),
+        pdf_bytes or b"",
+    ]
+    flags = _FLAG_PDF if pdf_bytes is not None else 0
+    out = [_HEADER.pack(MAGIC, VERSION, flags)]
+    for section in sections:
+        out.append(_LENGTH.pack(len(section)))
+        out.append(section)
+    return b"".join(out)
+
+
+def _read_sections(data: bytes) -> Tuple[int, List[memoryview]]:
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError("Данные слишком короткие для сериализованного документа.")
+    magic, version, flags = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Неизвестный формат данных (нет сигнатуры PDXB).")
+    if version != VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата: {version}.")
+    pos = _HEADER.size
+    sections = []
+    for _ in range(_N_SECTIONS):
+        if pos + _LENGTH.size > len(view):
+            raise ValueError("Данные обрезаны.")
+        (length,) = _LENGTH.unpack_from(view, pos)
+        pos += _LENGTH.size
+        if pos + length > len(view):
+            raise ValueError("Данные обрезаны.")
+        sections.append(view[pos:pos + length])
+        pos += length
+    return flags, sections
+
+
+def _unpack(data: bytes, columnar: bool) -> Tuple[List[Page], int, Optional[bytes]]:
+    flags, sections = _read_sections(data)
+    page_count = int(np.frombuffer(sections[0], dtype=np.int64)[0])
+    page_arr = np.frombuffer(sections[1], dtype=np.int32).reshape(-1, _PAGE_COLS)
+    table_arr = np.frombuffer(sections[2], dtype=np.int32).reshape(-1, _TABLE_COLS)
+    cell_arr = np.frombuffer(sections[3], dtype=np.int32).reshape(-1, _CELL_COLS)
+    para_arr = np.frombuffer(sections[4], dtype=np.int32).reshape(-1, _PARA_COLS)
+    blob_arr = np.frombuffer(sections[5], dtype=np.int32).reshape(-1, 4)
+    offsets = np.frombuffer(sections[6], dtype=np.int64).tolist()
+    text = str(sections[7], "utf-8")
+    strings = [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    pdf_bytes = bytes(sections[8]) if flags & _FLAG_PDF else None
+
+    def string(idx: int) -> Optional[str]:
+        return None if idx < 0 else strings[idx]
+
+    # Python-списки разбираются заметно быстрее поэлементного доступа к массивам
+    tables = table_arr.tolist()
+    paras = para_arr.tolist()
+    cell_blob_offsets = np.zeros(len(cell_arr) + 1, dtype=np.int64)
+    np.cumsum(cell_arr[:, 10], out=cell_blob_offsets[1:])
+    cells = None if columnar else cell_arr.tolist()
+    blobs = None if columnar else blob_arr.tolist()
+    para_blob_pos = int(cell_blob_offsets[-1])
+    para_blobs = blob_arr[para_blob_pos:].tolist()
+
+    pages: List[Page] = []
+    t_pos = c_pos = p_pos = pb_pos = 0
+    for num_page, n_tables, n_paras, error_idx, stats_idx in page_arr.tolist():
+        page_tables = []
+        for x1, y1, x2, y2, start_page_num, n_cells in tables[t_pos:t_pos + n_tables]:
+            if columnar:
+                rows = cell_arr[c_pos:c_pos + n_cells]
+                b_lo, b_hi = cell_blob_offsets[c_pos], cell_blob_offsets[c_pos + n_cells]
+                table_cells = ColumnarCells.from_arrays(
+                    rows[:, 0:4], rows[:, 4], rows[:, 5], rows[:, 6], rows[:, 7], rows[:, 8],
+                    [string(i) for i in rows[:, 9].tolist()],
+                    cell_blob_offsets[c_pos:c_pos + n_cells + 1] - b_lo, blob_arr[b_lo:b_hi])
+            else:
+                table_cells = []
+                b = int(cell_blob_offsets[c_pos])
+                for cx1, cy1, cx2, cy2, row, col, colspan, rowspan, orig, text_idx, n_blobs in cells[c_pos:c_pos + n_cells]:
+                    table_cells.append(Cell(
+                        bbox=BBox(cx1, cy1, cx2, cy2), row=row, col=col, colspan=colspan, rowspan=rowspan,
+                        text=string(text_idx),
+                        blobs=[BBox(bx1, by1, bx2, by2) for bx1, by1, bx2, by2 in blobs[b:b + n_blobs]],
+                        original_page_num=_none(orig),
+                    ))
+                    b += n_blobs
+            c_pos += n_cells
+            page_tables.append(Table(bbox=BBox(x1, y1, x2, y2), cells=table_cells,
+                                     start_page_num=_none(start_page_num)))
+        t_pos += n_tables
+
+        page_paras = []
+        for x1, y1, x2, y2, p_type, text_idx, n_blobs in paras[p_pos:p_pos + n_paras]:
+            page_paras.append(Paragraph(
+                bbox=BBox(x1, y1, x2, y2), type=ParagraphType(p_type), text=string(text_idx),
+                blobs=[BBox(bx1, by1, bx2, by2) for bx1, by1, bx2, by2 in para_blobs[pb_pos:pb_pos + n_blobs]],
+            ))
+            pb_pos += n_blobs
+        p_pos += n_paras
+
+        stats = string(stats_idx)
+        pages.append(Page(tables=page_tables, paragraphs=page_paras, num_page=num_page,
+                          error=string(error_idx), stats=json.loads(stats) if stats else {}))
+    return pages, page_count, pdf_bytes
@@ -2,6 +2,66 @@
 from typing import Tuple
 import numpy as np
 from PIL import Image
+import pymupdf
+
+# используем 300 dpi тессеракт лучше распознает
+DEFAULT_DPI = 300
+
+def _line_runs(region: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Начала и концы сплошных сегментов ненулевых пикселей вдоль колонок (axis=0) или строк (axis=1).
+
+    Маска дополняется нулями по краям и разворачивается в один вектор, так что сегменты соседних
+    колонок/строк не склеиваются; начала и концы - переходы 0->1 и 1->0 в np.diff.
+    Возвращает (starts, ends, stride), где starts // stride - номер колонки/строки сегмента.
+    """
+    mask = np.asarray(region) != 0
+    if axis == 0:
+        mask = mask.T
+    n_lines, length = mask.shape
+    padded = np.zeros((n_lines, length + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded.ravel())
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1), length + 2
+
+
+def max_run_lengths(region: np.ndarray, axis: int = 0) -> np.ndarray:
+    """
+    Длина самого длинного сплошного сегмента ненулевых пикселей в каждой колонке (axis=0)
+    или в каждой строке (axis=1) бинарной матрицы.
+
+    Returns:
+        Массив длиной region.shape[1] (axis=0) или region.shape[0] (axis=1).
+    """
+    runs = np.zeros(region.shape[1 - axis], dtype=np.intp)
+    if region.size == 0:
+        return runs
+    starts, ends, stride = _line_runs(region, axis)
+    if starts.size:
+        np.maximum.at(runs, starts // stride, ends - starts)
+    return runs
+
+
+def interval_max_runs(region: np.ndarray, axis: int, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Для каждого отрезка [lo[i], hi[i]) вдоль оси axis - длина самого длинного сплошного сегмента
+    ненулевых пикселей region, обрезанного этим отрезком (по всем колонкам/строкам region).
+    Эквивалентно max_run_lengths(region[lo[i]:hi[i]] (или region[:, lo[i]:hi[i]]), axis).max(),
+    но сегменты находятся один раз для всех отрезков.
+    """
+    lo = np.asarray(lo, dtype=np.intp)
+    hi = np.asarray(hi, dtype=np.intp)
+    result = np.zeros(lo.shape, dtype=np.intp)
+    if region.size == 0 or lo.size == 0:
+        return result
+    starts, ends, stride = _line_runs(region, axis)
+    if starts.size == 0:
+        return result
+    run_s = (starts % stride)[:, None]
+    run_e = (ends % stride)[:, None]
+    clipped = np.minimum(run_e, hi[None, :]) - np.maximum(run_s, lo[None, :])
+    return np.maximum(clipped.max(axis=0), 0)
+
 
 def has_line(region: np.ndarray, min_length: int, axis: int = 0) -> bool:
     """
@@ -19,38 +79,11 @@ def has_line(region: np.ndarray, min_length: int, axis: int = 0) -> bool:
         return False
     if min_length <= 0: # Минимальная длина должна быть положительной
         return False
+    if region.shape[axis] < min_length: # Регион короче требуемой длины линии
+        return False
 
-    if axis == 0: # Поиск вертикальной линии (вдоль колонок региона)
-        if region.shape[0] < min_length: # Высота региона меньше требуемой длины линии
-            return False
-        for x_col in range(region.shape[1]): # Итерация по каждому столбцу в переданном регионе
-            run = 0
-            max_run = 0
-            for y_row in range(region.shape[0]): # Итерация вниз по текущему столбцу
-                if region[y_row, x_col]: # Если пиксель установлен (часть линии)
-                    run += 1
-                else:
-                    max_run = max(max_run, run)
-                    run = 0
-            max_run = max(max_run, run) # Проверка после окончания столбца
-            if max_run >= min_length:
-                return True # Найдена вертикальная линия достаточной длины
-    else: # Поиск горизонтальной линии (вдоль строк региона)
-        if region.shape[1] < min_length: # Ширина региона меньше требуемой длины линии
-            return False
-        for y_row in range(region.shape[0]): # Итерация по каждой строке в переданном регионе
-            run = 0
-            max_run = 0
-            for x_col in range(region.shape[1]): # Итерация поперек текущей строки
-                if region[y_row, x_col]: # Если пиксель установлен
-                    run += 1
-                else:
-                    max_run = max(max_run, run)
-                    run = 0
-            max_run = max(max_run, run) # Проверка после окончания строки
-            if max_run >= min_length:
-                return True # Найдена горизонтальная линия достаточной длины
-    return False
+    starts, ends, _ = _line_runs(region, axis)
+    return bool(starts.size) and bool((ends - starts).max() >= min_length)
 
 
 def find_line_positions(mask: np.ndarray, axis: int) -> np.ndarray:
@@ -83,19 +116,43 @@ def find_line_positions(mask: np.ndarray, axis: int) -> np.ndarray:
     return centers
 
 
-def page_to_image(page) -> np.ndarray:
+def page_to_image(page, dpi: int = DEFAULT_DPI) -> np.ndarray:
     """конвертируем страницу в массив numpy"""
     if page is None:
         raise ValueError("Аргумент 'page' не может быть None.")
     
-    # используем 300 dpi тессеракт лучше распознает
-    pix = page.get_pixmap(dpi=300)
+    pix = page.get_pixmap(dpi=dpi)
     img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
     
     return np.array(img)
 
 
-def get_pix_rect_page(page, dpi = 300) -> Tuple[float, float]:
+class PixmapArray(np.ndarray):
+    """
+    Массив NumPy поверх памяти пиксмапа PyMuPDF (без копирования).
+    Хранит ссылку на пиксмап, чтобы память не освободилась, пока жив массив или его срезы.
+    """
+    def __array_finalize__(self, obj):
+        self.pixmap = getattr(obj, "pixmap", None)
+
+
+def render_gray(page, dpi: int = DEFAULT_DPI) -> np.ndarray:
+    """
+    Рендерит страницу сразу в полутоновый пиксмап (csGRAY) и возвращает его
+    как массив (высота, ширина) uint8 без копирования: одна аллокация на страницу
+    вместо RGB-пиксмапа, копий в PIL/NumPy и cvtColor. Массив доступен для записи.
+    """
+    if page is None:
+        raise ValueError("Аргумент 'page' не может быть None.")
+
+    pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+    samples = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    gray = samples.reshape(pix.height, pix.stride)[:, :pix.width].view(PixmapArray)
+    gray.pixmap = pix
+    return gray
+
+
+def get_pix_rect_page(page, dpi = DEFAULT_DPI) -> Tuple[float, float]:
     '''Получим коэффициент масштабирования'''
     if page is None:
         raise ValueError("Аргумент 'page' не может быть None.")
@@ -103,12 +160,52 @@ def get_pix_rect_page(page, dpi = 300) -> Tuple[float, float]:
         raise ValueError("Аргумент 'dpi' должен быть положительным целым числом.")
     
     # Проблема неверных координат https://github.com/pymupdf/PyMuPDF/issues/2868
-    pix = page.get_pixmap(dpi=dpi)
+    # Размер пиксмапа считаем без рендеринга: get_pixmap(dpi) строит пиксмап
+    # по целочисленному прямоугольнику страницы, умноженной на матрицу dpi/72
     pdf_rect = page.rect
+    pix_rect = (pdf_rect * pymupdf.Matrix(dpi / 72, dpi / 72)).irect
     pdf_w, pdf_h = pdf_rect.width, pdf_rect.height
     
     # коэффициенты преобразования в пиксели
-    scale_x = pix.width  / pdf_w
-    scale_y = pix.height / pdf_h
+    scale_x = pix_rect.width  / pdf_w
+    scale_y = pix_rect.height / pdf_h
     
-    return scale_x, scale_y
\ No newline at end of file
+    return scale_x, scale_y
+
+
+# Пороги классификации страниц (см. is_native_page)
+NATIVE_MIN_CHARS = 20
+NATIVE_MAX_IMAGE_COVERAGE = 0.5
+
+
+def page_coverage(page) -> Tuple[int, float]:
+    """
+    Дешёвая оценка текстового слоя страницы без рендеринга.
+
+    Returns:
+        (число непробельных символов текстового слоя, доля площади страницы под изображениями)
+    """
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0, 0.0
+
+    chars = sum(not c.isspace() for c in page.get_text("text"))
+    image_area = sum(
+        abs(pymupdf.Rect(info["bbox"]) & page.rect)
+        for info in page.get_image_info()
+    )
+    return chars, min(1.0, image_area / page_area)
+
+
+def is_native_page(page,
+                   min_chars: int = NATIVE_MIN_CHARS,
+                   max_image_coverage: float = NATIVE_MAX_IMAGE_COVERAGE) -> bool:
+    """
+    Решает, можно ли разобрать страницу по текстовому слою PDF (цифровой акт) или это скан,
+    которому нужны рендеринг и OCR. Страница считается цифровой, если в текстовом слое
+    есть хотя бы min_chars символов, а изображения занимают не больше max_image_coverage
+    площади страницы: скан с распознанным текстовым слоем всё равно страница-картинка,
+    линии таблиц в нём есть только в растре.
+    """
+    chars, image_coverage = page_coverage(page)
+    return chars >= min_chars and image_coverage <= max_image_coverage
@@ -0,0 +1,196 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+
+class JobRejected(RuntimeError):
+    """Очередь заданий переполнена - задание не принято."""
+
+
+class JobEngine:
+    """
+    Фоновый исполнитель заданий: asyncio-цикл в отдельном потоке принимает задания
+    и ограничивает число одновременно выполняемых, сама работа идёт в пуле процессов.
+
+    submit() только ставит задание в цикл и сразу возвращает управление, поэтому поток
+    запроса не блокируется ни распознаванием, ни ожиданием свободного процесса.
+    Результат передаётся в колбэки on_done/on_error, которые вызываются в потоке цикла -
+    они должны быть быстрыми (например, записать результат под блокировкой).
+    """
+    def __init__(self,
+                 job_fn: Callable[..., Any],
+                 max_workers: int = 2,
+                 max_pending: int = 100,
+                 initializer: Optional[Callable[..., None]] = None,
+                 initargs: Tuple = (),
+                 job_timeout: Optional[float] = None,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            job_fn: функция задания; для пула процессов должна быть доступна через pickle
+                (функция уровня модуля).
+            max_workers: количество процессов и одновременно выполняемых заданий.
+            max_pending: предел заданий в работе и в очереди; сверх него submit отклоняет задания.
+            initializer, initargs: инициализация каждого процесса пула (загрузка моделей и т.п.).
+            job_timeout: время (с), после которого задание считается упавшим (None - без ограничения).
+                on_error вызывается сразу, но слот задания занят, пока процесс не закончит работу.
+            executor: готовый исполнитель вместо собственного пула процессов (например, пул
+                потоков в тестах); engine его не закрывает.
+        """
+        self.job_fn = job_fn
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self.initargs = initargs
+        self.job_timeout = job_timeout
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._own_executor = executor is None
+        self._executor: Executor = executor if executor is not None else self._create_executor()
+
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread = threading.Thread(target=self._run_loop, name="JobEngineLoop", daemon=True)
+        started = threading.Event()
+        self._loop.call_soon(started.set)
+        self._thread.start()
+        started.wait()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        self.logger.info(f"Запуск пула заданий: {self.max_workers} процессов.")
+        # fork из процесса с работающим потоком цикла небезопасен, поэтому spawn
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._loop.run_forever()
+
+    @property
+    def pending(self) -> int:
+        """Задания, принятые и ещё не завершённые (в работе и в очереди)."""
+        with self._lock:
+            return self._pending
+
+    def submit(self, job_id: str, *args,
+               on_done: Callable[[str, Any], None],
+               on_error: Callable[[str, BaseException], None]) -> None:
+        """
+        Ставит задание в очередь, не дожидаясь его выполнения.
+
+        Raises:
+            JobRejected: engine остановлен или очередь заполнена (max_pending).
+        """
+        with self._lock:
+            if self._closed:
+                raise JobRejected("Исполнитель заданий остановлен.")
+            if self._pending >= self.max_pending:
+                raise JobRejected(f"Очередь заданий заполнена ({self.max_pending}).")
+            self._pending += 1
+        try:
+            asyncio.run_coroutine_threadsafe(self._run(job_id, args, on_done, on_error), self._loop)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self.logger.debug(f"Задание {job_id} поставлено в очередь.")
+
+    async def _run(self, job_id: str, args: Tuple,
+                   on_done: Callable[[str, Any], None],
+                   on_error: Callable[[str, BaseException], None]) -> None:
+        try:
+            async with self._semaphore:
+                self.logger.info(f"Задание {job_id}: начало обработки.")
+                job = asyncio.ensure_future(self._execute(args))
+                try:
+                    # shield: по таймауту отменяется только ожидание, а не слежение за заданием
+                    result = await asyncio.wait_for(asyncio.shield(job), self.job_timeout)
+                except asyncio.TimeoutError:
+                    self.logger.error(f"Задание {job_id}: превышено время обработки ({self.job_timeout} с).")
+                    self._report(on_error, job_id, TimeoutError(
+                        f"Превышено время обработки ({self.job_timeout} с)."))
+                    # запущенное задание в процессе не прервать: слот освобождается, только когда
+                    # процесс действительно его закончит, иначе пул получил бы больше заданий, чем max_workers
+                    await asyncio.gather(job, return_exceptions=True)
+                except Exception as e:
+                    self.logger.error(f"Задание {job_id}: ошибка обработки: {e}")
+                    self._report(on_error, job_id, e)
+                else:
+                    self.logger.info(f"Задание {job_id}: обработка завершена.")
+                    self._report(on_done, job_id, result)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def _execute(self, args: Tuple) -> Any:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = loop.run_in_executor(executor, self.job_fn, *args)
+        except BrokenProcessPool:
+            self._restart_executor(executor)
+            executor = self._executor
+            future = loop.run_in_executor(executor, self.job_fn, *args)
+        try:
+            return await future
+        except BrokenProcessPool:
+            # процесс упал посреди задания (например, нехватка памяти) - следующие задания
+            # пойдут в новый пул, это задание считается упавшим
+            self._restart_executor(executor)
+            raise
+
+    def _restart_executor(self, broken: Executor) -> None:
+        # все задания сломанного пула падают одновременно, пул пересоздаётся один раз
+        if not self._own_executor or broken is not self._executor:
+            return
+        self.logger.warning("Пул заданий сломан, перезапуск.")
+        self._executor = self._create_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _report(self, callback: Callable[[str, Any], None], job_id: str, value: Any) -> None:
+        try:
+            callback(job_id, value)
+        except Exception as e:
+            self.logger.error(f"Задание {job_id}: ошибка в обработчике результата: {e}", exc_info=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Останавливает приём заданий. wait=True - дожидается завершения принятых,
+        иначе незавершённые задания отменяются без вызова колбэков.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        asyncio.run_coroutine_threadsafe(self._drain(cancel=not wait), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        if self._own_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self._loop.close()
+
+    async def _drain(self, cancel: bool) -> None:
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if cancel:
+            for task in tasks:
+                task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __enter__(self) -> "JobEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
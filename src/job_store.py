@@ -0,0 +1,287 @@
+from abc import ABC, abstractmethod
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+
+class JobStore(ABC):
+    """
+    Хранилище заданий обработки актов: запись о задании (статус и данные результата,
+    словарь с ключом "status") и двоичные документы задания (исходный, заполненный).
+    Наследник задаёт способ хранения; сервис работает только через этот интерфейс.
+    """
+    # Статус заданий в обработке: они не вытесняются и восстанавливаются после перезапуска
+    ACTIVE_STATUS = 0
+    DOCUMENT_KINDS = ("original", "filled")
+
+    @abstractmethod
+    def create(self, process_id: str, record: Dict[str, Any], document: bytes) -> None:
+        """Сохраняет новое задание вместе с исходным документом."""
+
+    @abstractmethod
+    def get(self, process_id: str) -> Optional[Dict[str, Any]]:
+        """Запись задания или None."""
+
+    @abstractmethod
+    def transition(self, process_id: str, from_status: int, record: Dict[str, Any]) -> bool:
+        """
+        Атомарно заменяет запись, если задание в статусе from_status (новый статус - record["status"]).
+        Возвращает False, если задания нет или его статус уже другой.
+        """
+
+    @abstractmethod
+    def update(self, process_id: str, record: Dict[str, Any]) -> bool:
+        """Заменяет запись без проверки статуса. False - задания нет."""
+
+    @abstractmethod
+    def put_document(self, process_id: str, kind: str, data: bytes) -> None:
+        """Сохраняет документ задания (kind: "original", "filled")."""
+
+    @abstractmethod
+    def get_document(self, process_id: str, kind: str) -> Optional[bytes]:
+        """Документ задания или None, если его нет."""
+
+    def document_source(self, process_id: str, kind: str) -> Optional[Union[bytes, str]]:
+        """
+        Документ в виде, удобном для передачи в процесс обработки: путь к файлу, если
+        хранилище файловое (байты не копируются через память сервиса), иначе байты.
+        """
+        return self.get_document(process_id, kind)
+
+    @abstractmethod
+    def start_attempt(self, process_id: str) -> int:
+        """Отмечает запуск обработки задания; возвращает номер попытки."""
+
+    @abstractmethod
+    def active_jobs(self) -> List[str]:
+        """Задания в ACTIVE_STATUS (например, прерванные падением сервиса), от старых к новым."""
+
+    @abstractmethod
+    def delete(self, process_id: str) -> None:
+        """Удаляет задание и его документы; отсутствующее задание не ошибка."""
+
+    @abstractmethod
+    def evict(self) -> int:
+        """Удаляет устаревшие и лишние завершённые задания; возвращает их количество."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Локальное хранилище заданий: записи - в SQLite (поиск по process_id - по первичному ключу),
+    документы - файлами с исходными байтами в каталоге documents/.
+
+    Завершённые задания вытесняются по TTL (с последнего изменения) и по суммарному размеру
+    документов (сначала самые старые). Задания в обработке не вытесняются: после падения
+    сервиса они остаются в ACTIVE_STATUS и возвращаются active_jobs() для повторного запуска.
+    """
+    DB_NAME = "jobs.sqlite3"
+    DOCUMENTS_DIR = "documents"
+
+    def __init__(self,
+                 store_dir: str,
+                 ttl_seconds: Optional[float] = 24 * 3600,
+                 max_bytes: Optional[int] = 2 * 1024 * 1024 * 1024,
+                 evict_interval: float = 60.0):
+        """
+        Args:
+            store_dir: каталог хранилища (создаётся при необходимости).
+            ttl_seconds: время жизни завершённого задания (None - без ограничения).
+            max_bytes: предел суммарного размера документов на диске (None - без ограничения).
+            evict_interval: вытеснение запускается при создании заданий не чаще раза в столько секунд.
+        """
+        self.store_dir = store_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+        self.stats: Dict[str, int] = {"created": 0, "evicted": 0}
+        self._documents_dir = os.path.join(store_dir, self.DOCUMENTS_DIR)
+        os.makedirs(self._documents_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(store_dir, self.DB_NAME), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " process_id TEXT PRIMARY KEY,"
+            " status INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " doc_bytes INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at)")
+        self._last_evict = 0.0
+        self._remove_orphans()
+
+    # --- записи ---
+
+    def create(self, process_id: str, record: Dict[str, Any], document: bytes) -> None:
+        # документ пишется первым: запись без файла невозможна, файл без записи удаляется при запуске
+        self._write_file(self._document_path(process_id, "original"), document)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (process_id, status, data, doc_bytes, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (process_id, record["status"], self._dumps(record), len(document), now, now))
+            self.stats["created"] += 1
+            evict_due = now - self._last_evict >= self.evict_interval
+        if evict_due:
+            self.evict()
+
+    def get(self, process_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE process_id = ?", (process_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def transition(self, process_id: str, from_status: int, record: Dict[str, Any]) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, updated_at = ? WHERE process_id = ? AND status = ?",
+                (record["status"], self._dumps(record), time.time(), process_id, from_status))
+        return cur.rowcount == 1
+
+    def update(self, process_id: str, record: Dict[str, Any]) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, updated_at = ? WHERE process_id = ?",
+                (record["status"], self._dumps(record), time.time(), process_id))
+        return cur.rowcount == 1
+
+    def start_attempt(self, process_id: str) -> int:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET attempts = attempts + 1 WHERE process_id = ?", (process_id,))
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE process_id = ?", (process_id,)).fetchone()
+        return row[0] if row else 0
+
+    def active_jobs(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT process_id FROM jobs WHERE status = ? ORDER BY created_at",
+                                      (self.ACTIVE_STATUS,)).fetchall()
+        return [r[0] for r in rows]
+
+    def delete(self, process_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE process_id = ?", (process_id,))
+        self._remove_documents(process_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    # --- документы ---
+
+    def put_document(self, process_id: str, kind: str, data: bytes) -> None:
+        path = self._document_path(process_id, kind)
+        # данные пишутся вне блокировки; размер прежнего файла, подмена и учёт doc_bytes - под ней,
+        # иначе параллельные записи одного документа сбивают doc_bytes
+        tmp_path = self._write_temp(data)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._conn.execute("UPDATE jobs SET doc_bytes = doc_bytes + ?, updated_at = ? WHERE process_id = ?",
+                               (len(data) - old_size, time.time(), process_id))
+
+    def get_document(self, process_id: str, kind: str) -> Optional[bytes]:
+        try:
+            with open(self._document_path(process_id, kind), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def document_source(self, process_id: str, kind: str) -> Optional[str]:
+        path = self._document_path(process_id, kind)
+        return path if os.path.exists(path) else None
+
+    # --- вытеснение ---
+
+    def evict(self) -> int:
+        now = time.time()
+        with self._lock:
+            self._last_evict = now
+            victims: List[str] = []
+            if self.ttl_seconds is not None:
+                victims += [r[0] for r in self._conn.execute(
+                    "SELECT process_id FROM jobs WHERE status != ? AND updated_at < ?",
+                    (self.ACTIVE_STATUS, now - self.ttl_seconds))]
+            if self.max_bytes is not None:
+                total = self._conn.execute("SELECT COALESCE(SUM(doc_bytes), 0) FROM jobs").fetchone()[0]
+                expired = set(victims)
+                if total > self.max_bytes:
+                    for process_id, size in self._conn.execute(
+                            "SELECT process_id, doc_bytes FROM jobs WHERE status != ? ORDER BY updated_at",
+                            (self.ACTIVE_STATUS,)):
+                        if total <= self.max_bytes:
+                            break
+                        total -= size
+                        if process_id not in expired:
+                            victims.append(process_id)
+            if victims:
+                self._conn.executemany("DELETE FROM jobs WHERE process_id = ?", [(v,) for v in victims])
+                self.stats["evicted"] += len(victims)
+        for process_id in victims:
+            self._remove_documents(process_id)
+        if victims:
+            self.logger.info(f"Из хранилища заданий вытеснено {len(victims)} заданий.")
+        return len(victims)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- служебное ---
+
+    @staticmethod
+    def _dumps(record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False)
+
+    def _document_path(self, process_id: str, kind: str) -> str:
+        if kind not in self.DOCUMENT_KINDS:
+            raise ValueError(f"Неизвестный вид документа: {kind}.")
+        return os.path.join(self._documents_dir, f"{process_id}.{kind}")
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        # Временный файл и атомарная подмена, чтобы читатель не увидел половину документа
+        os.replace(self._write_temp(data), path)
+
+    def _write_temp(self, data: bytes) -> str:
+        """Пишет данные во временный файл каталога документов; возвращает его путь."""
+        fd, tmp_path = tempfile.mkstemp(dir=self._documents_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _remove_documents(self, process_id: str) -> None:
+        for kind in self.DOCUMENT_KINDS:
+            try:
+                os.remove(self._document_path(process_id, kind))
+            except FileNotFoundError:
+                pass
+
+    def _remove_orphans(self) -> None:
+        """Удаляет файлы без записи (падение между записью документа и записи задания, .tmp)."""
+        with self._lock:
+            known = {r[0] for r in self._conn.execute("SELECT process_id FROM jobs")}
+        removed = 0
+        for name in os.listdir(self._documents_dir):
+            if name.endswith(".tmp") or name.split(".", 1)[0] not in known:
+                os.remove(os.path.join(self._documents_dir, name))
+                removed += 1
+        if removed:
+            self.logger.info(f"Удалено {removed} файлов документов без заданий.")
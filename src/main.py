@@ -1,13 +1,20 @@
 # reconciliation_service.py
 
 import base64
+import binascii
+from datetime import datetime
+import logging
 import random
 import time
 import uuid
 from dataclasses import dataclass, field, asdict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 
+from src.job_engine import JobEngine, JobRejected
+from src.job_store import JobStore, SQLiteJobStore
+from src.reconciliation_job import init_reconciliation_worker, process_reconciliation_act
+
 # --- Вспомогательные классы и перечисления (Data Models and Enums) ---
 
 class ProcessStatusEnum(Enum):
@@ -63,9 +70,9 @@ class InternalProcessData:
     """
     Внутреннее представление данных процесса обработки акта сверки.
     Этот класс не является частью API, а используется сервисом для хранения состояния.
+    Документы (исходный и заполненный) хранятся отдельно, в JobStore, в виде байтов.
     """
     process_id: str
-    original_document_b64: str  # Исходный документ, полученный от пользователя
     status_enum: ProcessStatusEnum = ProcessStatusEnum.PROCESSING # Текущий статус обработки
     # Поля, заполняемые после успешного парсинга документа (этап process_status -> done)
     seller: Optional[str] = None
@@ -76,62 +83,185 @@ class InternalProcessData:
     # Поля, заполняемые на этапе fill_reconciliation_act (данные от покупателя)
     debit_buyer: List[ActEntry] = field(default_factory=list)
     credit_buyer: List[ActEntry] = field(default_factory=list)
-    # Заполненный документ (результат fill_reconciliation_act)
-    filled_document_b64: Optional[str] = None
     # Сообщение об ошибке, если status_enum == ERROR
     error_message_detail: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует объект в словарь для хранения в JobStore (статус - ключ 'status')."""
+        return {
+            "process_id": self.process_id,
+            "status": self.status_enum.value,
+            "seller": self.seller,
+            "buyer": self.buyer,
+            "period": self.period.to_dict() if self.period else None,
+            "debit_seller": [e.to_dict() for e in self.debit_seller],
+            "credit_seller": [e.to_dict() for e in self.credit_seller],
+            "debit_buyer": [e.to_dict() for e in self.debit_buyer],
+            "credit_buyer": [e.to_dict() for e in self.credit_buyer],
+            "error_message_detail": self.error_message_detail,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'InternalProcessData':
+        """Создает объект из словаря, сохраненного to_dict."""
+        return cls(
+            process_id=data["process_id"],
+            status_enum=ProcessStatusEnum(data["status"]),
+            seller=data.get("seller"),
+            buyer=data.get("buyer"),
+            period=Period.from_dict(data["period"]) if data.get("period") else None,
+            debit_seller=[ActEntry.from_dict(e) for e in data.get("debit_seller", [])],
+            credit_seller=[ActEntry.from_dict(e) for e in data.get("credit_seller", [])],
+            debit_buyer=[ActEntry.from_dict(e) for e in data.get("debit_buyer", [])],
+            credit_buyer=[ActEntry.from_dict(e) for e in data.get("credit_buyer", [])],
+            error_message_detail=data.get("error_message_detail"),
+        )
+
+# --- Преобразование результата разбора (Result Mapping) ---
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    """Сумма из строки вида "1 500,75"; None, если суммы нет или это не число."""
+    if not value:
+        return None
+    try:
+        return float(value.replace(" ", "").replace("\xa0", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+def build_act_entries(transactions: List[Dict[str, Any]]) -> Tuple[List[ActEntry], List[ActEntry], Optional[Period]]:
+    """
+    Строки акта по данным продавца (ReconciliationActExtractor) -> записи дебета и кредита
+    и период по крайним датам операций. Строки без суммы (заголовки, сальдо без значения) пропускаются.
+    """
+    debit: List[ActEntry] = []
+    credit: List[ActEntry] = []
+    dates: List[datetime] = []
+    for tr in transactions:
+        date = tr.get("date")
+        for amount, entries in ((_parse_amount(tr.get("debit")), debit), (_parse_amount(tr.get("credit")), credit)):
+            if amount:
+                entries.append(ActEntry(row_id=tr["row_idx"], record=tr.get("record") or "", value=amount, date=date))
+        if date:
+            try:
+                dates.append(datetime.strptime(date, "%d.%m.%Y"))
+            except ValueError:
+                pass
+    period = None
+    if dates:
+        period = Period(from_date=min(dates).strftime("%d.%m.%Y"), to_date=max(dates).strftime("%d.%m.%Y"))
+    return debit, credit, period
+
 # --- Основной класс сервиса (Service Class) ---
 
 class ReconciliationAPIService:
     """
     Сервис для обработки актов сверки согласно описанному API.
     Предоставляет методы, соответствующие эндпоинтам API.
+
+    Разбор документов выполняется в фоне (JobEngine: пул процессов с HybridExtractor и NERService).
+    Методы API только регистрируют задания и читают состояние, поэтому не блокируют поток запроса.
+    Состояние процессов и документы хранятся в JobStore, а не в памяти сервиса. Статус меняется
+    атомарно вместе с результатом (JobStore.transition), так что запрос статуса не видит
+    частично заполненных данных. Задания, прерванные падением сервиса, запускаются повторно
+    при следующем запуске.
     """
-    def __init__(self):
-        # Хранилище для текущих процессов обработки.
-        # Ключ - process_id (строка), значение - InternalProcessData.
-        self._active_processes: Dict[str, InternalProcessData] = {}
+    def __init__(self, engine: Optional[JobEngine] = None, store: Optional[JobStore] = None,
+                 store_dir: str = "./data/jobs", max_workers: int = 2, max_pending: int = 100,
+                 job_timeout: Optional[float] = 600.0, max_attempts: int = 2):
+        """
+        Args:
+            engine: исполнитель заданий разбора; по умолчанию - пул процессов с process_reconciliation_act.
+            store: хранилище заданий; по умолчанию - SQLiteJobStore в store_dir.
+            store_dir: каталог хранилища заданий (если store не передан).
+            max_workers: количество процессов разбора (если engine не передан).
+            max_pending: предел документов в обработке и в очереди (если engine не передан).
+            job_timeout: время разбора одного документа, с (если engine не передан).
+            max_attempts: сколько раз документ запускается в разбор с учетом перезапусков сервиса;
+                документ, на котором сервис падал столько раз, получает статус ошибки.
+        """
+        self.logger = logging.getLogger('app.' + __class__.__name__)
+        self.max_attempts = max_attempts
+        # Хранилище процессов обработки: запись - InternalProcessData.to_dict(), документы - байты.
+        self._store = store if store is not None else SQLiteJobStore(store_dir)
+        self._engine = engine if engine is not None else JobEngine(
+            process_reconciliation_act,
+            max_workers=max_workers,
+            max_pending=max_pending,
+            initializer=init_reconciliation_worker,
+            job_timeout=job_timeout,
+        )
+        self._recover_interrupted()
 
     def _generate_process_id(self) -> str:
         """Генерирует уникальный идентификатор процесса."""
         return str(uuid.uuid4())
 
-    def _simulate_document_initial_processing(self, process_data: InternalProcessData):
-        """
-        Имитирует первоначальную обработку (парсинг) PDF документа.
-        В реальном приложении здесь будет сложная логика работы с PDF и извлечения данных.
-        Эта функция вызывается асинхронно или в фоновом режиме после send_reconciliation_act.
-        """
-        # Имитация задержки на обработку
-        time.sleep(random.uniform(1.0, 3.0)) # Варьируем время обработки
-
-        # Случайным образом определяем исход обработки (успех/ошибка)
-        # Вероятности: 80% успех, 20% ошибка
-        if random.random() < 0.80:
-            process_data.status_enum = ProcessStatusEnum.DONE
-            process_data.seller = "ОАО \"Рога и Копыта\" (Имитация)"
-            process_data.buyer = "ИП \"Лучший Покупатель\" (Имитация)"
-            process_data.period = Period(from_date="01.05.2024", to_date="31.05.2024")
-            process_data.debit_seller = [
-                ActEntry(row_id=1, record="Продажа товара А", value=1500.75, date="05.05.2024"),
-                ActEntry(row_id=3, record="Услуга Б", value=750.00, date="15.05.2024")
-            ]
-            process_data.credit_seller = [
-                ActEntry(row_id=5, record="Возврат средств", value=100.00, date="20.05.2024")
-            ]
-            process_data.error_message_detail = None
-        else:
-            process_data.status_enum = ProcessStatusEnum.ERROR
-            process_data.error_message_detail = "Имитация: Ошибка при автоматическом разборе документа PDF."
-            # Остальные поля (seller, buyer и т.д.) остаются None или пустыми
+    def _load(self, process_id: str) -> Optional[InternalProcessData]:
+        record = self._store.get(process_id)
+        return InternalProcessData.from_dict(record) if record else None
+
+    def _start_processing(self, process_id: str) -> None:
+        """Запускает разбор сохраненного документа. Raises: JobRejected - очередь заполнена."""
+        self._store.start_attempt(process_id)
+        # в очередь передается путь к файлу, байты документа читает процесс разбора
+        source = self._store.document_source(process_id, "original")
+        self._engine.submit(process_id, source,
+                            on_done=self._on_document_processed, on_error=self._on_document_failed)
+
+    def _recover_interrupted(self) -> None:
+        """Повторно запускает задания, оставшиеся в обработке после падения сервиса."""
+        for process_id in self._store.active_jobs():
+            if self._store.start_attempt(process_id) > self.max_attempts:
+                self._fail(process_id, "Обработка документа прервана: превышено число попыток разбора.")
+                continue
+            self.logger.info(f"Процесс {process_id}: повторный запуск разбора после перезапуска сервиса.")
+            try:
+                source = self._store.document_source(process_id, "original")
+                if source is None:
+                    self._fail(process_id, "Исходный документ не найден.")
+                    continue
+                self._engine.submit(process_id, source,
+                                    on_done=self._on_document_processed, on_error=self._on_document_failed)
+            except JobRejected as e:
+                self._fail(process_id, f"Сервис перегружен, отправьте документ повторно. {e}")
+
+    def _fail(self, process_id: str, message: str) -> None:
+        failed = InternalProcessData(process_id=process_id, status_enum=ProcessStatusEnum.ERROR,
+                                     error_message_detail=message)
+        self._store.transition(process_id, ProcessStatusEnum.PROCESSING.value, failed.to_dict())
+
+    def _on_document_processed(self, process_id: str, result: Dict[str, Any]) -> None:
+        """Результат разбора (вызывается JobEngine в фоне): переход PROCESSING -> DONE."""
+        debit, credit, period = build_act_entries(result.get("transactions", []))
+        done = InternalProcessData(
+            process_id=process_id,
+            status_enum=ProcessStatusEnum.DONE,
+            seller=result.get("seller"),
+            buyer=result.get("buyer"),
+            period=period,
+            debit_seller=debit,
+            credit_seller=credit,
+        )
+        if self._store.transition(process_id, ProcessStatusEnum.PROCESSING.value, done.to_dict()):
+            self.logger.info(f"Процесс {process_id}: документ разобран, дебет {len(debit)}, кредит {len(credit)}.")
+
+    def _on_document_failed(self, process_id: str, error: BaseException) -> None:
+        """Ошибка разбора (вызывается JobEngine в фоне): переход PROCESSING -> ERROR."""
+        self._fail(process_id, str(error) or "Ошибка при автоматическом разборе документа PDF.")
+        self.logger.warning(f"Процесс {process_id}: ошибка разбора: {error}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает фоновую обработку (при wait=True - после завершения принятых документов)."""
+        self._engine.shutdown(wait=wait)
+        self._store.close()
 
     # --- Методы API ---
 
     def send_reconciliation_act(self, document_base64: str) -> Dict[str, Any]:
         """
         API: send_reconciliation_act
-        Принимает документ в base64, инициирует его обработку и возвращает process_id.
+        Принимает документ в base64, ставит его в очередь на разбор и сразу возвращает process_id.
 
         Args:
             document_base64 (str): Документ акта сверки в формате base64.
@@ -145,20 +275,22 @@ class ReconciliationAPIService:
             # Здесь мы просто возвращаем ошибку для демонстрации
             return {"error": "Некорректные входные данные: 'document' должен быть непустой строкой base64."}
 
+        try:
+            pdf_bytes = base64.b64decode(document_base64, validate=True)
+        except (binascii.Error, ValueError):
+            return {"error": "Некорректные входные данные: 'document' не является строкой base64."}
+
         process_id = self._generate_process_id()
-        process_data = InternalProcessData(
-            process_id=process_id,
-            original_document_b64=document_base64
-            # Статус по умолчанию PROCESSING
-        )
-        self._active_processes[process_id] = process_data
+        # Статус по умолчанию PROCESSING
+        self._store.create(process_id, InternalProcessData(process_id=process_id).to_dict(), pdf_bytes)
 
-        # В реальном приложении здесь запускается фоновая задача для _simulate_document_initial_processing
-        # Например, через Celery, RQ, или asyncio.create_task
-        # print(f"DEBUG: Запущена имитация обработки для process_id: {process_id}")
-        # Для простоты симуляции, можно вызвать ее здесь, но это сделает запрос синхронным.
-        # Оставим статус PROCESSING, чтобы get_process_status мог показать "wait".
-        # _simulate_document_initial_processing(process_data) # Если бы это было синхронно
+        try:
+            self._start_processing(process_id)
+        except JobRejected as e:
+            # HTTP статус: 503 Service Unavailable - клиент может повторить позже
+            self._store.delete(process_id)
+            self.logger.warning(f"Документ не принят в обработку: {e}")
+            return {"error": f"Сервис перегружен, повторите запрос позже. {e}"}
 
         return {"process_id": process_id}
 
@@ -166,6 +298,7 @@ class ReconciliationAPIService:
         """
         API: process_status
         Возвращает статус обработки документа по его process_id.
+        Только читает текущее состояние: разбор идёт в фоне.
 
         Args:
             process_id (str): Идентификатор процесса обработки.
@@ -174,22 +307,12 @@ class ReconciliationAPIService:
             Dict[str, Any]: JSON-ответ в соответствии с API.
                             HTTP статус зависит от результата (200, 201, 404, 500).
         """
-        process_data = self._active_processes.get(process_id)
+        process_data = self._load(process_id)
 
         if not process_data:
             # HTTP статус: 404 Not Found
             return {"status": ProcessStatusEnum.NOT_FOUND.value, "message": "not found"}
 
-        # Имитация того, что фоновая обработка могла завершиться к этому моменту
-        if process_data.status_enum == ProcessStatusEnum.PROCESSING:
-            # В реальной системе статус обновляется фоновым процессом.
-            # Здесь мы можем симулировать это, если прошло достаточно времени или по случайности.
-            # Для демонстрации, если процесс "висит" в обработке, есть шанс, что он завершится.
-            if random.random() < 0.6: # 60% шанс, что обработка завершилась (успешно или с ошибкой)
-                # print(f"DEBUG: Имитация завершения обработки для process_id: {process_id} при запросе статуса.")
-                self._simulate_document_initial_processing(process_data)
-
-
         # Формируем ответ в зависимости от текущего статуса
         current_status_enum = process_data.status_enum
 
@@ -216,7 +339,7 @@ class ReconciliationAPIService:
                 "status": current_status_enum.value,
                 "message": process_data.error_message_detail or "Произошла неизвестная ошибка при обработке."
             }
-        
+
         # Этот случай не должен достигаться при правильной логике
         return {"status": -99, "message": "Неизвестное состояние процесса."}
 
@@ -240,7 +363,7 @@ class ReconciliationAPIService:
             Dict[str, Any]: JSON-ответ с заполненным документом в base64 или сообщение об ошибке.
                             HTTP статус зависит от результата (200, 201, 404, 500).
         """
-        process_data = self._active_processes.get(process_id)
+        process_data = self._load(process_id)
 
         if not process_data:
             # HTTP статус: 404 Not Found
@@ -272,23 +395,29 @@ class ReconciliationAPIService:
             return {"message": f"Неверный формат данных для записей дебета/кредита: {e}",
                     "status_code_hint": 400}
 
+        original_document = self._store.get_document(process_id, "original")
+        if original_document is None:
+            return {"message": "Исходный документ не найден.", "status_code_hint": 404}
+
         # Имитация процесса заполнения документа данными покупателя
-        # В реальном приложении здесь будет логика модификации PDF (например, используя `original_document_b64`
-        # и данные `debit_buyer`, `credit_buyer`) и генерации нового base64.
+        # В реальном приложении здесь будет логика модификации PDF (например, используя исходный документ
+        # и данные `debit_buyer`, `credit_buyer`) и генерации нового документа.
         time.sleep(random.uniform(0.5, 1.5)) # Имитация работы
 
         # Создаем "заполненный" документ (простая имитация)
-        # Объединяем исходный документ с данными покупателя в текстовом виде и кодируем в base64
+        # Объединяем исходный документ с данными покупателя в текстовом виде
         filled_content_str = (
-            f"ИСХОДНЫЙ ДОКУМЕНТ:\n{base64.b64decode(process_data.original_document_b64).decode('utf-8', errors='ignore')}\n\n"
+            f"ИСХОДНЫЙ ДОКУМЕНТ:\n{original_document.decode('utf-8', errors='ignore')}\n\n"
             f"ДАННЫЕ ПОКУПАТЕЛЯ (ДЕБЕТ):\n{process_data.debit_buyer}\n\n"
             f"ДАННЫЕ ПОКУПАТЕЛЯ (КРЕДИТ):\n{process_data.credit_buyer}\n\n"
             f"--- КОНЕЦ ЗАПОЛНЕННОГО ДОКУМЕНТА ---"
         )
-        process_data.filled_document_b64 = base64.b64encode(filled_content_str.encode('utf-8')).decode('utf-8')
+        filled_document = filled_content_str.encode('utf-8')
+        self._store.put_document(process_id, "filled", filled_document)
+        self._store.update(process_id, process_data.to_dict())
 
         # HTTP статус: 200 OK
-        return {"document": process_data.filled_document_b64}
+        return {"document": base64.b64encode(filled_document).decode('utf-8')}
 
 # --- Пример использования сервиса (для демонстрации и тестирования) ---
 if __name__ == "__main__":
@@ -298,9 +427,11 @@ if __name__ == "__main__":
 
     # 1. Отправка акта на обработку (send_reconciliation_act)
     print("\nШаг 1: Отправка акта на обработку...")
-    # Генерируем простой base64 для примера
-    sample_pdf_content = "Это содержимое исходного PDF документа для акта сверки."
-    sample_pdf_base64 = base64.b64encode(sample_pdf_content.encode('utf-8')).decode('utf-8')
+    # Генерируем простой PDF для примера
+    import pymupdf
+    sample_pdf = pymupdf.open()
+    sample_pdf.new_page().insert_text((72, 72), "Akt sverki vzaimnyh raschetov")
+    sample_pdf_base64 = base64.b64encode(sample_pdf.tobytes()).decode('utf-8')
 
     send_response = service.send_reconciliation_act(document_base64=sample_pdf_base64)
     print(f"Ответ от send_reconciliation_act: {send_response}")
@@ -308,12 +439,13 @@ if __name__ == "__main__":
     process_id = send_response.get("process_id")
     if not process_id:
         print("Не удалось получить process_id, демонстрация прервана.")
+        service.shutdown()
         exit()
 
     # 2. Проверка статуса обработки (process_status) - несколько попыток
-    print(f"\nШаг 2: Проверка статуса для process_id: {process_id} (до 10 попыток)")
+    print(f"\nШаг 2: Проверка статуса для process_id: {process_id} (до 30 попыток)")
     status_response = None
-    for attempt in range(10):
+    for attempt in range(30):
         print(f"  Попытка {attempt + 1}...")
         status_response = service.get_process_status(process_id=process_id)
         print(f"  Ответ от get_process_status: {status_response}")
@@ -335,7 +467,7 @@ if __name__ == "__main__":
             print(f"  Неизвестный статус: {current_api_status}")
             break
     else: # Если цикл завершился без break (все попытки исчерпаны)
-        print("  Документ не перешел в состояние DONE или ERROR за 10 попыток.")
+        print("  Документ не перешел в состояние DONE или ERROR за 30 попыток.")
 
 
     # 3. Заполнение акта сверки (fill_reconciliation_act) - если предыдущий шаг успешен
@@ -382,3 +514,5 @@ if __name__ == "__main__":
     fill_non_existent = service.fill_reconciliation_act(non_existent_id, [], [])
     print(f"Заполнение для ID '{non_existent_id}': {fill_non_existent}")
 
+    service.shutdown()
+
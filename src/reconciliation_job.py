@@ -0,0 +1,64 @@
+"""
+Задание первичной обработки акта сверки для пула процессов JobEngine:
+распознавание PDF (HybridExtractor - NativeExtractor для страниц с текстовым слоем,
+ScanExtractor для сканов) и разбор организаций и строк акта (NERService).
+"""
+import logging
+from typing import Any, Dict, Optional, Union
+
+from src.NER.ner_service import NERService
+from src.NER.reconc_act_extractor import ReconciliationActExtractor
+from src.PDFExtractor.hybrid_extractor import HybridExtractor
+
+# Экстрактор, созданный в процессе пула (см. init_reconciliation_worker)
+_worker_extractor: Optional[HybridExtractor] = None
+
+
+def init_reconciliation_worker(extractor_kwargs: Optional[Dict[str, Any]] = None) -> None:
+    """Инициализирует процесс пула: один раз загружает Pullenti и создаёт экстрактор."""
+    global _worker_extractor
+    from pullenti.Sdk import Sdk
+    Sdk.initialize_all()
+    kwargs = {"column_selector": ReconciliationActExtractor.select_ocr_columns}
+    kwargs.update(extractor_kwargs or {})
+    _worker_extractor = HybridExtractor(**kwargs)
+
+
+def process_reconciliation_act(document: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    Разбирает акт сверки. Выполняется в процессе пула; результат - простые типы,
+    чтобы передаваться между процессами через pickle.
+    document - байты PDF или путь к файлу (тогда байты читаются уже в процессе пула).
+
+    Returns:
+        {"seller": str_repr продавца, "buyer": str_repr покупателя или None,
+         "transactions": строки акта по данным продавца (см. ReconciliationActExtractor)}
+
+    Raises:
+        ValueError: документ не удалось открыть или в нём не найден продавец.
+    """
+    if _worker_extractor is None:
+        init_reconciliation_worker()
+    logger = logging.getLogger('app.' + process_reconciliation_act.__name__)
+
+    try:
+        if isinstance(document, str):
+            with open(document, "rb") as f:
+                document = f.read()
+        pages = _worker_extractor.iter_pages(document)
+        ner = NERService()
+        organizations, transactions = ner.process_pages(pages)
+    except Exception as e:
+        # не все исключения pymupdf/OCR переживают pickle, в основной процесс уходит текст
+        logger.error(f"Ошибка разбора документа: {e}", exc_info=True)
+        raise ValueError(f"Ошибка при разборе документа PDF: {e}") from None
+
+    seller = next((org for org in organizations if org.get('role') == 'продавец'), None)
+    buyer = next((org for org in organizations if org.get('role') == 'покупатель'), None)
+    if seller is None:
+        raise ValueError("В документе не найден продавец.")
+    return {
+        "seller": seller.get('str_repr'),
+        "buyer": buyer.get('str_repr') if buyer else None,
+        "transactions": transactions,
+    }
@@ -0,0 +1,39 @@
+"""
+Синтетические PDF для тестов (и микробенчмарков): таблица-сетка, похожая на акт сверки.
+"""
+from typing import Sequence
+
+import numpy as np
+import pymupdf
+
+
+def make_table_pdf(pages: int = 2, rows: int = 40, cols: int = 7, empty_cols: Sequence[int] = ()) -> bytes:
+    """
+    PDF с таблицей-сеткой на каждой странице, похожей на акт сверки:
+    шапка с объединёнными ячейками, строки операций, текст в ячейках
+    (кроме столбцов empty_cols - как неиспользуемая сторона дебет/кредит).
+    """
+    pdf = pymupdf.open()
+    for _ in range(pages):
+        page = pdf.new_page()
+        page.insert_text((40, 40), "Акт сверки взаимных расчетов", fontname="helv", fontsize=12)
+        x0, y0, x1 = 30, 70, page.rect.width - 30
+        row_h = (page.rect.height - y0 - 40) / rows
+        xs = np.linspace(x0, x1, cols + 1)
+        shape = page.new_shape()
+        for r in range(rows + 1):
+            y = y0 + r * row_h
+            shape.draw_line((x0, y), (x1, y))
+        for c, x in enumerate(xs):
+            # в первой строке (шапке) внутренние разделители через один отсутствуют - colspan
+            top = y0 + row_h if 0 < c < cols and c % 2 == 0 else y0
+            shape.draw_line((x, top), (x, y0 + rows * row_h))
+        shape.finish(color=(0, 0, 0), width=0.8)
+        shape.commit()
+        for r in range(1, rows):
+            for c in range(cols):
+                if c in empty_cols:
+                    continue
+                page.insert_text((xs[c] + 3, y0 + (r + 0.7) * row_h), f"{r * 100 + c},00",
+                                 fontname="helv", fontsize=6)
+    return pdf.tobytes()
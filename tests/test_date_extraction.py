@@ -0,0 +1,162 @@
+import logging
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from pullenti.Sdk import Sdk
+
+from src.NER import utils
+from src.NER.utils import extract_date_from_text, extract_dates_from_texts, parse_numeric_date
+
+ROWS = [
+    "Сальдо начальное",
+    "Продажа (05.05.2024 № 12)",
+    "Оплата от 20 мая",
+    "с 01.01.2024",
+    "по 31.03.2024",
+    "",
+    "Сальдо за 2 квартал",
+    "за май",
+    "Оплата (05.05.2024 № 13)",
+    "третий квартал 2023",
+    "Счет-фактура 15 от 12.12.23",
+    "Оплата п/п 77 от 01/02/2024",
+    "Обороты за период",
+]
+
+
+def extract_one_by_one(texts, logger, context_year=None):
+    # построчный разбор с переносом года, как в ReconciliationActExtractor до пакетного API
+    result = []
+    for txt in texts:
+        date_info = extract_date_from_text(txt, logger, context_year=context_year)
+        if date_info and date_info.get('year'):
+            context_year = date_info['year']
+        result.append(date_info)
+    return result
+
+
+class Test_TestDateExtraction(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Sdk.initialize_all()
+
+    def setUp(self):
+        self.logger = logging.getLogger('test')
+        # ошибки Pullenti на отдельных строках логируются с трассировкой - в тестах не нужны
+        self.logger.disabled = True
+        self.addCleanup(setattr, self.logger, 'disabled', False)
+        utils.get_date_cache().clear()
+
+    def test_batch_matches_row_by_row(self):
+        batch = extract_dates_from_texts(ROWS, self.logger)
+        utils.get_date_cache().clear()
+        self.assertEqual(batch, extract_one_by_one(ROWS, self.logger))
+        utils.get_date_cache().clear()
+        self.assertEqual(extract_dates_from_texts(ROWS, self.logger, context_year=2022),
+                         extract_one_by_one(ROWS, self.logger, context_year=2022))
+
+    def test_year_is_carried_between_rows(self):
+        dates = [d and d['formatted_str'] for d in extract_dates_from_texts(ROWS, self.logger)]
+        self.assertEqual(dates[:3], [None, "05.05.2024", "20.05.2024"])
+        # квартал и месяц без года берут год предыдущей строки
+        self.assertEqual(dates[6:8], ["30.06.2024", "01.05.2024"])
+        self.assertIsNone(dates[5])
+        self.assertEqual(extract_dates_from_texts(["за май"], self.logger, context_year=2021)[0]["formatted_str"],
+                         "01.05.2021")
+
+    def test_rows_are_not_merged(self):
+        # без разделителя Pullenti собирает из двух строк период "с ... по ..."
+        self.assertEqual(extract_dates_from_texts(["с 01.01.2024", "по 31.03.2024"], self.logger),
+                         [extract_date_from_text("с 01.01.2024", self.logger),
+                          extract_date_from_text("по 31.03.2024", self.logger)])
+
+    def test_fragments_at_row_boundaries(self):
+        # части одной даты в соседних строках не склеиваются, каждая строка разбирается как отдельно
+        rows = ["Оплата от 20", "мая 2024", "Сальдо на 31", "декабря 2023 г.", "за 2", "квартал 2024",
+                "Оплата 05.05.", "2024", "Реализация 15", ".05.2024", "с 01.01.2024 по", "31.03.2024"]
+        batch = extract_dates_from_texts(rows, self.logger, context_year=2022)
+        utils.get_date_cache().clear()
+        self.assertEqual(batch, extract_one_by_one(rows, self.logger, context_year=2022))
+
+    def test_abbreviations_at_row_end(self):
+        # сокращение в конце строки не должно сливаться с разделителем строк
+        rows = ["Оплата от 5 мая 2024 г", "Продажа 12 декабря 2023 г.", "Акт 15 марта 2024г",
+                "Корректировка 31 дек", "Сальдо на 8 сент. 2023 г", "Реализация 6 мар", "за май"]
+        batch = extract_dates_from_texts(rows, self.logger, context_year=2022)
+        utils.get_date_cache().clear()
+        self.assertEqual(batch, extract_one_by_one(rows, self.logger, context_year=2022))
+        self.assertEqual([d and d["formatted_str"] for d in batch],
+                         ["05.05.2024", "12.12.2023", "15.03.2024", "31.12.2024", "08.09.2023", "06.03.2023",
+                          "01.05.2023"])
+
+    def test_numeric_dates_skip_pullenti(self):
+        rows = ["Продажа (05.05.2024 № 123)", "Оплата (5.5.24 № 12)", "Счет-фактура 15 от 12.12.23", "Сальдо на 31.12.2023г."]
+        with mock.patch.object(utils, "get_processor_pool", side_effect=AssertionError("Pullenti не нужен")):
+            dates = [d["formatted_str"] for d in extract_dates_from_texts(rows, self.logger)]
+            self.assertEqual(extract_date_from_text(rows[0], self.logger)["formatted_str"], "05.05.2024")
+        self.assertEqual(dates, ["05.05.2024", "05.05.2024", "12.12.2023", "31.12.2023"])
+        self.assertEqual(parse_numeric_date("от 05.05.99")["year"], 1999)
+        # порог двузначного года постоянный, от текущей даты не зависит
+        self.assertEqual(parse_numeric_date(f"от 05.05.{utils.TWO_DIGIT_YEAR_PIVOT}")["year"],
+                         2000 + utils.TWO_DIGIT_YEAR_PIVOT)
+        self.assertEqual(parse_numeric_date(f"от 05.05.{utils.TWO_DIGIT_YEAR_PIVOT + 1}")["year"],
+                         1901 + utils.TWO_DIGIT_YEAR_PIVOT)
+
+    def test_ambiguous_dates_fall_through(self):
+        for txt in ("Реализация 12 от 20 мая 2024 г.", "Сальдо за 2 кв. 01.04.2024", "по 31.03.2024",
+                    "05.05.2024 - 10.05.2024", "05.05.2024 12.06.2024", "31.02.2024", "05.13.2024", "12.05.0024",
+                    "1.234.56", "Оплата 05,05,2024", "Корректировка долга 12"):
+            self.assertIsNone(parse_numeric_date(txt), txt)
+        # неразобранная строка уходит в Pullenti
+        self.assertEqual(extract_date_from_text("Реализация 12 от 20 мая 2024 г.", self.logger)["formatted_str"],
+                         "20.05.2024")
+
+    def test_repeated_rows_are_cached(self):
+        cache = utils.get_date_cache()
+        first = extract_dates_from_texts(ROWS, self.logger)
+        misses = cache.stats["misses"]
+        with mock.patch.object(utils, "get_processor_pool", side_effect=AssertionError("Pullenti не нужен")):
+            self.assertEqual(extract_dates_from_texts(ROWS, self.logger), first)
+            # лишние пробелы нормализуются; год контекста - часть ключа
+            self.assertEqual(extract_date_from_text("  Оплата   от 20 мая ", self.logger, context_year=2024), first[2])
+        self.assertEqual(cache.stats["misses"], misses)
+        self.assertEqual(extract_date_from_text("Оплата от 20 мая", self.logger, context_year=2019)["formatted_str"],
+                         "20.05.2019")
+        self.assertEqual(cache.stats["misses"], misses + 1)
+        # год сменился на строке, которой не было в кэше: следующая строка из кэша пересчитывается
+        dates = extract_dates_from_texts(["Оплата от 20 мая 2023 г.", "за май"], self.logger, context_year=2024)
+        self.assertEqual([d["formatted_str"] for d in dates], ["20.05.2023", "01.05.2023"])
+        # изменение результата не портит запись в кэше
+        first[2]["day"] = 1
+        self.assertEqual(extract_date_from_text("Оплата от 20 мая", self.logger, context_year=2024)["day"], 20)
+
+    def test_pullenti_gets_original_text(self):
+        row = "Оплата  от\n20 мая"
+        with mock.patch.object(utils, "_extract_date_with_pullenti",
+                               wraps=utils._extract_date_with_pullenti) as single:
+            self.assertEqual(extract_date_from_text(row, self.logger, context_year=2024)["formatted_str"], "20.05.2024")
+            single.assert_called_once_with(row, self.logger, 2024)
+        utils.get_date_cache().clear()
+        with mock.patch.object(utils, "_entities_by_row", wraps=utils._entities_by_row) as batch:
+            extract_dates_from_texts(["Сальдо", row], self.logger, context_year=2024)
+            batch.assert_called_once_with(["Сальдо", row])
+        # нормализуются только ключи кэша
+        with mock.patch.object(utils, "get_processor_pool", side_effect=AssertionError("Pullenti не нужен")):
+            self.assertEqual(extract_date_from_text("Оплата от 20 мая", self.logger, context_year=2024)["formatted_str"],
+                             "20.05.2024")
+
+    def test_empty_input(self):
+        self.assertEqual(extract_dates_from_texts([], self.logger), [])
+        self.assertEqual(extract_dates_from_texts(["", "", "  "], self.logger), [None, None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import time
+import unittest
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pymupdf
+
+from src.PDFExtractor.base_extractor import BBox, Cell, ColumnarCells, Document, Page, Paragraph, ParagraphType, Table
+import numpy as np
+
+from src.PDFExtractor.document_cache import DocumentCache, PageCache
+from src.PDFExtractor.native_extractor import NativeExtractor
+from tests.pdf_fixtures import make_table_pdf
+
+
+def make_document(rows: int = 3) -> Document:
+    cells = [
+        Cell(bbox=BBox(10 * c, 10 * r, 10 * c + 9, 10 * r + 9), row=r, col=c, colspan=1, rowspan=1,
+             text=f"r{r}c{c}", blobs=[BBox(10 * c + 1, 10 * r + 1, 10 * c + 5, 10 * r + 5)])
+        for r in range(rows) for c in range(2)
+    ]
+    page = Page(
+        tables=[Table(bbox=BBox(0, 0, 20, 10 * rows), cells=cells)],
+        paragraphs=[Paragraph(bbox=BBox(0, 0, 100, 5), type=ParagraphType.HEADER, text="Акт сверки")],
+        num_page=0,
+    )
+    return Document(pdf_bytes=b"%PDF", pages=[page], page_count=1)
+
+
+class Test_TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DocumentCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        doc = make_document()
+        key = DocumentCache.make_key(b"%PDF", "ScanExtractor")
+        self.cache.put(key, doc)
+
+        restored = self.cache.get(key, pdf_bytes=b"%PDF")
+        self.assertEqual(restored.pages, doc.pages)
+        self.assertEqual(restored.pdf_bytes, b"%PDF")
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_miss_and_namespace(self):
+        self.cache.put(DocumentCache.make_key(b"%PDF", "ScanExtractor:ocr=TESSERACT"), make_document())
+        self.assertIsNone(self.cache.get(DocumentCache.make_key(b"%PDF", "ScanExtractor:ocr=EASYOCR")))
+        self.assertEqual(self.cache.stats["misses"], 1)
+
+    def test_lru_eviction(self):
+        self.cache.put("a", make_document())
+        entry_size = os.path.getsize(self.cache._path("a"))
+        self.cache.max_bytes = entry_size * 2
+        self.cache.put("b", make_document())
+        # "a" становится самой свежей записью
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("c", make_document())
+
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats["evictions"], 1)
+
+    def test_extractor_uses_cache(self):
+        pdf = pymupdf.open()
+        pdf.new_page().insert_text((72, 72), "Акт сверки взаимных расчетов", fontname="helv")
+        pdf_bytes = pdf.tobytes()
+
+        extractor = NativeExtractor(cache=self.cache)
+        first = extractor.extract(pdf_bytes)
+        second = extractor.extract(pdf_bytes)
+
+        self.assertEqual(first.pages, second.pages)
+        self.assertEqual(self.cache.stats["writes"], 1)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_cached_documents_are_compact(self):
+        pdf_bytes = make_table_pdf(pages=2, rows=5, cols=4)
+        extractor = NativeExtractor(cache=self.cache)
+        fresh = extractor.extract(pdf_bytes)
+        cached = extractor.extract(pdf_bytes)
+
+        self.assertTrue(all(p.tables for p in fresh.pages))
+        # и записанный, и прочитанный из кэша документ хранят ячейки по столбцам
+        for doc in (fresh, cached):
+            self.assertTrue(all(isinstance(t.cells, ColumnarCells) for p in doc.pages for t in p.tables))
+        self.assertEqual(cached.pages, fresh.pages)
+        self.assertEqual(len(cached.get_tables()), len(fresh.get_tables()))
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_page_cache_key_and_round_trip(self):
+        page_cache = PageCache(os.path.join(self.tmp.name, "pages"))
+        gray = np.full((40, 30), 255, dtype=np.uint8)
+        key = PageCache.make_key(gray, "ScanExtractor:dpi=300")
+        page = make_document().pages[0]
+        page_cache.put(key, page)
+
+        restored = page_cache.get(PageCache.make_key(gray.copy(), "ScanExtractor:dpi=300"))
+        self.assertEqual(restored.tables, page.tables)
+        self.assertEqual(restored.paragraphs, page.paragraphs)
+
+        gray[5, 5] = 0
+        self.assertNotEqual(PageCache.make_key(gray, "ScanExtractor:dpi=300"), key)
+        self.assertNotEqual(PageCache.make_key(gray.reshape(30, 40), "ScanExtractor:dpi=300"),
+                            PageCache.make_key(gray, "ScanExtractor:dpi=300"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import unittest
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import gc
+
+import numpy as np
+import pymupdf
+
+from src.PDFExtractor.image_processing import filter_small_and_isolated
+from src.PDFExtractor.page_context import PageContext
+from src.PDFExtractor.scan_extractor import ScanExtractor
+from src.PDFExtractor.utils import has_line, interval_max_runs, max_run_lengths, render_gray
+
+
+def reference_max_runs(region: np.ndarray, axis: int) -> list:
+    """Эталон: построчный подсчёт сегментов циклами Python."""
+    lines = region.T if axis == 0 else region
+    result = []
+    for line in lines:
+        run = max_run = 0
+        for value in line:
+            run = run + 1 if value else 0
+            max_run = max(max_run, run)
+        result.append(max_run)
+    return result
+
+
+class Test_TestImageUtils(unittest.TestCase):
+
+    def test_max_run_lengths_matches_reference(self):
+        rng = np.random.default_rng(7)
+        for _ in range(200):
+            h, w = rng.integers(1, 40, size=2)
+            region = (rng.random((h, w)) < rng.random()).astype(np.uint8) * 255
+            for axis in (0, 1):
+                self.assertEqual(max_run_lengths(region, axis).tolist(), reference_max_runs(region, axis))
+
+    def test_has_line(self):
+        region = np.zeros((20, 7), dtype=np.uint8)
+        region[2:14, 3] = 255
+        self.assertTrue(has_line(region, 12, axis=0))
+        self.assertFalse(has_line(region, 13, axis=0))
+        self.assertFalse(has_line(region, 2, axis=1))
+        # линии в соседних столбцах не склеиваются при развороте маски
+        region[18:, 2] = 255
+        region[:3, 3] = 255
+        self.assertFalse(has_line(region, 16, axis=0))
+
+    def test_has_line_degenerate(self):
+        self.assertFalse(has_line(np.zeros((0, 5), dtype=np.uint8), 1))
+        self.assertFalse(has_line(np.ones((5, 5), dtype=np.uint8), 0))
+        self.assertFalse(has_line(np.ones((5, 5), dtype=np.uint8), 6, axis=1))
+        self.assertTrue(has_line(np.ones((5, 5), dtype=bool), 5, axis=1))
+
+    def test_interval_max_runs_matches_slices(self):
+        rng = np.random.default_rng(11)
+        region = (rng.random((30, 7)) < 0.8).astype(np.uint8)
+        lo = np.array([0, 3, 10, 29, 5])
+        hi = np.array([30, 9, 10, 30, 25])
+        expected = [max_run_lengths(region[a:b], axis=0).max(initial=0) for a, b in zip(lo, hi)]
+        self.assertEqual(interval_max_runs(region, 0, lo, hi).tolist(), expected)
+        expected = [max_run_lengths(region.T[:, a:b], axis=1).max(initial=0) for a, b in zip(lo[:2], hi[:2])]
+        self.assertEqual(interval_max_runs(region.T, 1, lo[:2], hi[:2]).tolist(), expected)
+
+    def test_grid_table_spans(self):
+        # сетка 3x3: в первой строке нет разделителя x=100 (colspan), разделитель y=200
+        # отсутствует в первом столбце (rowspan во второй и третьей строках)
+        pure_v = np.zeros((301, 301), dtype=np.uint8)
+        pure_h = np.zeros((301, 301), dtype=np.uint8)
+        for x in (0, 200, 300):
+            pure_v[:, x] = 255
+        pure_v[100:, 100] = 255
+        for y in (0, 100, 300):
+            pure_h[y, :] = 255
+        pure_h[200, 100:] = 255
+
+        cells = ScanExtractor.__new__(ScanExtractor)._grid_table(10, 20, pure_v, pure_h, span_mode=0)
+        spans = {(c.row, c.col): (c.colspan, c.rowspan) for c in cells}
+        self.assertEqual(spans, {(0, 0): (2, 1), (0, 2): (1, 1), (1, 0): (1, 2),
+                                 (1, 1): (1, 1), (1, 2): (1, 1), (2, 1): (1, 1), (2, 2): (1, 1)})
+        self.assertEqual((cells[0].bbox.x1, cells[0].bbox.y1, cells[0].bbox.x2), (10, 20, 210))
+
+    def test_filter_small_and_isolated(self):
+        mask = np.zeros((60, 60), dtype=np.uint8)
+        intersec = np.zeros_like(mask)
+        mask[10, 5:55] = 255            # длинная линия с тремя пересечениями
+        intersec[10, [10, 11, 30, 50]] = 255
+        mask[30, 5:55] = 255            # длинная линия с одним пересечением
+        intersec[30, 20] = 255
+        mask[50, 5:8] = 255             # короткий штрих с двумя пересечениями
+        intersec[50, [5, 7]] = 255
+
+        result = filter_small_and_isolated(mask, intersec, min_length=10, min_intersections=1)
+        expected = np.zeros_like(mask)
+        expected[10, 5:55] = 255
+        self.assertTrue(np.array_equal(result, expected))
+        self.assertEqual(filter_small_and_isolated(mask, intersec, min_length=1, min_intersections=1)[50, 6], 255)
+        self.assertFalse(filter_small_and_isolated(mask, np.zeros_like(mask), min_length=1).any())
+
+    def test_render_gray_keeps_pixmap_alive(self):
+        with pymupdf.open() as doc:
+            page = doc.new_page(width=100, height=50)
+            page.draw_rect(pymupdf.Rect(10, 10, 20, 20), color=(0, 0, 0), fill=(0, 0, 0))
+            gray = render_gray(page, dpi=144)
+
+        self.assertEqual(gray.shape, (100, 200))
+        self.assertEqual(gray.dtype, np.uint8)
+        roi = gray[20:40, 20:40]
+        del gray
+        gc.collect()
+        self.assertTrue((roi[5:15, 5:15] == 0).all())
+        roi[0, 0] = 7  # страница модифицируется на месте при удалении линий таблиц
+        self.assertEqual(roi[0, 0], 7)
+
+    def test_page_context_caches_and_invalidates(self):
+        gray = np.full((60, 80), 255, dtype=np.uint8)
+        gray[30, :] = 0      # линия
+        gray[10:14, 10:20] = 0  # текст
+        ctx = PageContext(gray)
+
+        self.assertIs(ctx.binary_inv, ctx.binary_inv)
+        self.assertEqual(ctx.binary_inv[11, 15], 255)
+        cleaned = ctx.cleaned
+        self.assertIs(ctx.cleaned, cleaned)
+
+        mask = np.zeros((20, 80), dtype=np.uint8)
+        mask[10, :] = 255
+        ctx.remove_lines(0, 20, 80, 20, mask)
+        self.assertTrue((gray[29:32, :] == 255).all())
+        self.assertIsNot(ctx.cleaned, cleaned)
+        self.assertFalse(ctx.cleaned_binary_inv[29:32, :].any())
+        self.assertTrue(ctx.cleaned_binary_inv[10:14, 10:20].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.job_engine import JobEngine, JobRejected
+from src.job_store import SQLiteJobStore
+from src.main import ProcessStatusEnum, ReconciliationAPIService, build_act_entries
+from src.reconciliation_job import process_reconciliation_act
+
+TRANSACTIONS = [
+    {"table_idx": 0, "row_idx": 2, "record": "Сальдо начальное", "date": None, "debit": "", "credit": ""},
+    {"table_idx": 0, "row_idx": 3, "record": "Продажа 05.05.2024", "date": "05.05.2024", "debit": "1 500,75", "credit": ""},
+    {"table_idx": 0, "row_idx": 4, "record": "Оплата 20.05.2024", "date": "20.05.2024", "debit": "", "credit": "100,00"},
+    {"table_idx": 0, "row_idx": 5, "record": "Продажа 01.05.2024", "date": "01.05.2024", "debit": "750,00", "credit": ""},
+]
+
+
+class Collector:
+    """Собирает результаты колбэков JobEngine."""
+    def __init__(self, expected: int):
+        self.results = {}
+        self.errors = {}
+        self._left = expected
+        self._lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def on_done(self, job_id, result):
+        self._record(self.results, job_id, result)
+
+    def on_error(self, job_id, error):
+        self._record(self.errors, job_id, error)
+
+    def _record(self, target, job_id, value):
+        with self._lock:
+            target[job_id] = value
+            self._left -= 1
+            if self._left == 0:
+                self.finished.set()
+
+
+class Test_TestJobEngine(unittest.TestCase):
+
+    def test_process_pool_jobs(self):
+        collector = Collector(expected=6)
+        with JobEngine(math.factorial, max_workers=2) as engine:
+            for n in range(5):
+                engine.submit(f"job{n}", n, on_done=collector.on_done, on_error=collector.on_error)
+            engine.submit("bad", -1, on_done=collector.on_done, on_error=collector.on_error)
+            self.assertTrue(collector.finished.wait(60))
+        self.assertEqual(collector.results, {f"job{n}": math.factorial(n) for n in range(5)})
+        self.assertIsInstance(collector.errors["bad"], ValueError)
+
+    def test_submit_does_not_wait_and_bounds_concurrency(self):
+        release = threading.Event()
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def job(n):
+            with lock:
+                running.append(n)
+                peak.append(len(running))
+            release.wait(10)
+            with lock:
+                running.remove(n)
+            return n
+
+        collector = Collector(expected=8)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            engine = JobEngine(job, max_workers=3, max_pending=8, executor=executor)
+            started = time.perf_counter()
+            for n in range(8):
+                engine.submit(str(n), n, on_done=collector.on_done, on_error=collector.on_error)
+            self.assertLess(time.perf_counter() - started, 1.0)
+            with self.assertRaises(JobRejected):
+                engine.submit("overflow", 0, on_done=collector.on_done, on_error=collector.on_error)
+            self.assertEqual(engine.pending, 8)
+
+            release.set()
+            self.assertTrue(collector.finished.wait(10))
+            engine.shutdown()
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(collector.results, {str(n): n for n in range(8)})
+        with self.assertRaises(JobRejected):
+            engine.submit("closed", 0, on_done=collector.on_done, on_error=collector.on_error)
+
+    def test_timeout(self):
+        collector = Collector(expected=1)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            engine = JobEngine(time.sleep, job_timeout=0.1, executor=executor)
+            engine.submit("slow", 1.0, on_done=collector.on_done, on_error=collector.on_error)
+            self.assertTrue(collector.finished.wait(5))
+            engine.shutdown()
+        self.assertIsInstance(collector.errors["slow"], TimeoutError)
+
+    def test_timed_out_job_keeps_its_slot(self):
+        release = threading.Event()
+        started = []
+
+        def job(name):
+            started.append(name)
+            if name == "slow":
+                release.wait(10)
+            return name
+
+        collector = Collector(expected=2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            engine = JobEngine(job, max_workers=1, job_timeout=0.1, executor=executor)
+            engine.submit("slow", "slow", on_done=collector.on_done, on_error=collector.on_error)
+            engine.submit("fast", "fast", on_done=collector.on_done, on_error=collector.on_error)
+            deadline = time.monotonic() + 5
+            while "slow" not in collector.errors and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIsInstance(collector.errors["slow"], TimeoutError)
+            # ошибка уже сообщена, но задание ещё выполняется: следующее ждёт свободного слота
+            time.sleep(0.2)
+            self.assertEqual(started, ["slow"])
+
+            release.set()
+            self.assertTrue(collector.finished.wait(5))
+            engine.shutdown()
+        self.assertEqual(started, ["slow", "fast"])
+        self.assertEqual(collector.results, {"fast": "fast"})
+
+
+class Test_TestReconciliationService(unittest.TestCase):
+
+    def make_service(self, job, max_pending=100):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+        store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(store_dir.cleanup)
+        service = ReconciliationAPIService(
+            engine=JobEngine(job, max_workers=4, max_pending=max_pending, executor=self.executor),
+            store=SQLiteJobStore(store_dir.name))
+        self.addCleanup(service.shutdown)
+        return service
+
+    def wait_status(self, service, process_id, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = service.get_process_status(process_id)
+            if response["status"] != ProcessStatusEnum.PROCESSING.value:
+                return response
+            time.sleep(0.01)
+        self.fail(f"Процесс {process_id} не завершился за {timeout} с")
+
+    def test_build_act_entries(self):
+        debit, credit, period = build_act_entries(TRANSACTIONS)
+        self.assertEqual([(e.row_id, e.value, e.date) for e in debit], [(3, 1500.75, "05.05.2024"), (5, 750.0, "01.05.2024")])
+        self.assertEqual([(e.row_id, e.value) for e in credit], [(4, 100.0)])
+        self.assertEqual(period.to_dict(), {"from": "01.05.2024", "to": "20.05.2024"})
+
+    def test_status_poll_only_reads_state(self):
+        release = threading.Event()
+        calls = []
+
+        def job(path):
+            with open(path, "rb") as f:
+                calls.append(f.read())
+            release.wait(10)
+            return {"seller": "ООО «Продавец»", "buyer": "ООО «Покупатель»", "transactions": TRANSACTIONS}
+
+        service = self.make_service(job)
+        uploads = [service.send_reconciliation_act(base64.b64encode(f"%PDF {n}".encode()).decode())
+                   for n in range(20)]
+        ids = [u["process_id"] for u in uploads]
+        for _ in range(3):
+            for process_id in ids:
+                self.assertEqual(service.get_process_status(process_id), {"status": 0, "message": "wait"})
+        self.assertLessEqual(len(calls), 4)
+
+        release.set()
+        for process_id in ids:
+            response = self.wait_status(service, process_id)
+            self.assertEqual(response["status"], ProcessStatusEnum.DONE.value)
+            self.assertEqual(response["seller"], "ООО «Продавец»")
+            self.assertEqual([e["row_id"] for e in response["debit"]], [3, 5])
+            self.assertEqual(response["period"], {"from": "01.05.2024", "to": "20.05.2024"})
+        self.assertEqual(sorted(calls), sorted(f"%PDF {n}".encode() for n in range(20)))
+
+    def test_job_error_and_rejections(self):
+        def job(pdf_bytes):
+            raise ValueError("В документе не найден продавец.")
+
+        service = self.make_service(job, max_pending=1)
+        self.assertIn("error", service.send_reconciliation_act("не base64!"))
+        process_id = service.send_reconciliation_act(base64.b64encode(b"%PDF").decode())["process_id"]
+        response = self.wait_status(service, process_id)
+        self.assertEqual(response, {"status": ProcessStatusEnum.ERROR.value,
+                                    "message": "В документе не найден продавец."})
+        self.assertEqual(service.fill_reconciliation_act(process_id, [], [])["status_code_hint"], 500)
+        self.assertEqual(service.get_process_status("нет такого")["status"], ProcessStatusEnum.NOT_FOUND.value)
+
+    def test_not_a_pdf(self):
+        service = self.make_service(process_reconciliation_act)
+        process_id = service.send_reconciliation_act(base64.b64encode(b"not a pdf").decode())["process_id"]
+        response = self.wait_status(service, process_id, timeout=120)
+        self.assertEqual(response["status"], ProcessStatusEnum.ERROR.value)
+        self.assertIn("PDF", response["message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
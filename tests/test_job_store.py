@@ -0,0 +1,159 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.job_engine import JobEngine
+from src.job_store import JobStore, SQLiteJobStore
+from src.main import InternalProcessData, ProcessStatusEnum, ReconciliationAPIService
+
+PROCESSING, DONE, ERROR = (s.value for s in (ProcessStatusEnum.PROCESSING, ProcessStatusEnum.DONE,
+                                             ProcessStatusEnum.ERROR))
+
+
+def record(process_id: str, status: ProcessStatusEnum = ProcessStatusEnum.PROCESSING, **fields) -> dict:
+    return InternalProcessData(process_id=process_id, status_enum=status, **fields).to_dict()
+
+
+class Test_TestSQLiteJobStore(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.store_dir = self._dir.name
+
+    def open_store(self, **kwargs) -> SQLiteJobStore:
+        store = SQLiteJobStore(self.store_dir, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_documents_are_raw_bytes_on_disk(self):
+        store = self.open_store()
+        pdf = b"%PDF-1.7 " + bytes(range(256))
+        store.create("a", record("a"), pdf)
+        self.assertEqual(store.get_document("a", "original"), pdf)
+        path = store.document_source("a", "original")
+        self.assertEqual(os.path.getsize(path), len(pdf))
+        self.assertIsNone(store.get_document("a", "filled"))
+        self.assertNotIn("original", store.get("a"))
+        with self.assertRaises(ValueError):
+            store.put_document("a", "../escape", b"x")
+
+    def test_concurrent_document_writes_keep_size(self):
+        store = self.open_store()
+        store.create("a", record("a"), b"%PDF")
+
+        def put(n):
+            store.put_document("a", "filled", b"x" * (100 + n % 7 * 50))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(put, range(200)))
+        doc_bytes = store._conn.execute("SELECT doc_bytes FROM jobs WHERE process_id = 'a'").fetchone()[0]
+        self.assertEqual(doc_bytes, 4 + len(store.get_document("a", "filled")))
+        self.assertEqual([n for n in os.listdir(os.path.dirname(store.document_source("a", "filled")))
+                          if n.endswith(".tmp")], [])
+
+    def test_job_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            JobStore()
+
+    def test_transition_is_compare_and_set(self):
+        store = self.open_store()
+        store.create("a", record("a"), b"%PDF")
+        self.assertTrue(store.transition("a", PROCESSING, record("a", ProcessStatusEnum.DONE, seller="ООО «Ромашка»")))
+        self.assertFalse(store.transition("a", PROCESSING, record("a", ProcessStatusEnum.ERROR)))
+        self.assertFalse(store.transition("нет", PROCESSING, record("нет", ProcessStatusEnum.DONE)))
+        restored = InternalProcessData.from_dict(store.get("a"))
+        self.assertEqual(restored.status_enum, ProcessStatusEnum.DONE)
+        self.assertEqual(restored.seller, "ООО «Ромашка»")
+
+    def test_ttl_and_size_eviction_keep_active_jobs(self):
+        store = self.open_store(ttl_seconds=3600, max_bytes=250, evict_interval=3600)
+        for i in range(4):
+            store.create(f"done{i}", record(f"done{i}"), bytes(100))
+            store.transition(f"done{i}", PROCESSING, record(f"done{i}", ProcessStatusEnum.DONE))
+        store.create("active", record("active"), bytes(100))
+        # размер: 500 байт при пределе 250 - уходят самые старые завершённые
+        self.assertEqual(store.evict(), 3)
+        self.assertEqual(sorted(store._conn.execute("SELECT process_id FROM jobs").fetchall()),
+                         [("active",), ("done3",)])
+        self.assertIsNone(store.get_document("done0", "original"))
+
+        store.ttl_seconds = 0
+        time.sleep(0.01)
+        self.assertEqual(store.evict(), 1)
+        self.assertIsNotNone(store.get("active"))
+        self.assertEqual(store.stats["evicted"], 4)
+
+    def test_reopen_removes_orphans_and_lists_active_jobs(self):
+        store = self.open_store()
+        store.create("a", record("a"), b"%PDF a")
+        store.create("b", record("b"), b"%PDF b")
+        store.transition("b", PROCESSING, record("b", ProcessStatusEnum.DONE))
+        store.close()
+        orphan = os.path.join(self.store_dir, SQLiteJobStore.DOCUMENTS_DIR, "orphan.original")
+        with open(orphan, "wb") as f:
+            f.write(b"%PDF")
+
+        reopened = self.open_store()
+        self.assertEqual(reopened.active_jobs(), ["a"])
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(reopened.get_document("a", "original"), b"%PDF a")
+
+
+class Test_TestServiceRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+
+    def make_service(self, job, **kwargs) -> ReconciliationAPIService:
+        return ReconciliationAPIService(engine=JobEngine(job, executor=self.executor),
+                                        store=SQLiteJobStore(self._dir.name), **kwargs)
+
+    def test_interrupted_job_is_resumed_after_restart(self):
+        hang = threading.Event()
+        first = self.make_service(lambda path: hang.wait(10))
+        process_id = first.send_reconciliation_act(base64.b64encode(b"%PDF").decode())["process_id"]
+        # "падение": сервис остановлен, не дождавшись разбора
+        first.shutdown(wait=False)
+        hang.set()
+
+        second = self.make_service(lambda path: {"seller": "ООО «Продавец»", "buyer": None, "transactions": []})
+        self.addCleanup(second.shutdown)
+        deadline = time.monotonic() + 10
+        while second.get_process_status(process_id)["status"] == PROCESSING and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(second.get_process_status(process_id)["seller"], "ООО «Продавец»")
+
+        filled = second.fill_reconciliation_act(process_id, [{"row_id": 1, "record": "Оплата", "value": 10.0}], [])
+        self.assertIn(b"%PDF", base64.b64decode(filled["document"]))
+        self.assertEqual(second._store.get(process_id)["debit_buyer"][0]["record"], "Оплата")
+
+    def test_job_that_keeps_crashing_the_service_fails(self):
+        store = SQLiteJobStore(self._dir.name)
+        store.create("p", record("p"), b"%PDF")
+        store.start_attempt("p")
+        store.start_attempt("p")
+        store.close()
+
+        service = self.make_service(lambda path: self.fail("задание не должно запускаться"), max_attempts=2)
+        self.addCleanup(service.shutdown)
+        response = service.get_process_status("p")
+        self.assertEqual(response["status"], ERROR)
+        self.assertIn("попыток", response["message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
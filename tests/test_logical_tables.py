@@ -0,0 +1,205 @@
+import logging
+import os
+import pickle
+import tempfile
+import unittest
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from openpyxl import load_workbook
+
+from src.NER.reconc_act_extractor import ReconciliationActExtractor
+from src.PDFExtractor.base_extractor import (BBox, Cell, CellView, ColumnarCells, Document, LazyCell, Page,
+                                             Paragraph, ParagraphType, Table, TableGrid)
+from src.PDFExtractor.scan_extractor import HEADER_ROWS
+
+
+def make_page(num_page: int, rows: int = 2, y: int = 100, text_prefix: str = "") -> Page:
+    cells = [
+        Cell(bbox=BBox(10 * c, y + 10 * r, 10 * c + 9, y + 10 * r + 9), row=r, col=c, colspan=1, rowspan=1,
+             text=f"{text_prefix}r{r}c{c}")
+        for r in range(rows) for c in range(2)
+    ]
+    return Page(
+        tables=[Table(bbox=BBox(0, y, 20, y + 10 * rows), cells=cells)],
+        paragraphs=[Paragraph(bbox=BBox(0, 0, 100, 5), type=ParagraphType.HEADER, text="Акт сверки")],
+        num_page=num_page,
+    )
+
+
+class Test_TestLogicalTables(unittest.TestCase):
+
+    def test_continued_table_uses_row_offset_views(self):
+        doc = Document(pages=[make_page(0), make_page(1, text_prefix="p1")], page_count=2)
+        tables = doc.get_tables()
+
+        self.assertEqual(len(tables), 1)
+        cells = tables[0].cells
+        self.assertTrue(all(isinstance(c, CellView) for c in cells))
+        self.assertEqual([c.row for c in cells], [0, 0, 1, 1, 2, 2, 3, 3])
+        self.assertEqual(cells[4].text, "p1r0c0")
+        self.assertEqual(cells[4].original_page_num, 1)
+        self.assertIs(cells[4].source, doc.pages[1].tables[0].cells[0])
+        self.assertEqual(cells[4], Cell(bbox=cells[4].bbox, row=2, col=0, colspan=1, rowspan=1,
+                                        text="p1r0c0", original_page_num=1))
+
+    def test_assembled_once_per_version(self):
+        doc = Document(pages=[make_page(0)], page_count=1)
+        first = doc.get_tables()
+        self.assertIs(doc.get_tables()[0], first[0])
+
+        # текст ячеек читается через представления и не требует пересборки
+        doc.pages[0].tables[0].cells[0].text = "изменено"
+        self.assertIs(doc.get_tables()[0], first[0])
+        self.assertEqual(first[0].cells[0].text, "изменено")
+
+        # новая страница с параграфом меняет структуру
+        page = make_page(1)
+        page.paragraphs[0].type = ParagraphType.NONE
+        doc.pages.append(page)
+        tables = doc.get_tables()
+        self.assertEqual(len(tables), 2)
+        self.assertIsNot(tables[0], first[0])
+
+        doc.pages[1].tables[0].cells.pop()
+        self.assertEqual(len(doc.get_tables()[1].cells), 3)
+
+    def test_to_excel_writes_logical_tables(self):
+        doc = Document(pages=[make_page(0), make_page(1, text_prefix="p1")], page_count=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tables.xlsx")
+            doc.to_excel(path)
+            wb = load_workbook(path)
+
+        self.assertEqual(wb.sheetnames, ["Table_1"])
+        self.assertEqual(wb["Table_1"].cell(row=3, column=2).value, "p1r0c1")
+
+
+class Test_TestColumnarTable(unittest.TestCase):
+
+    def test_views_match_cells(self):
+        page = make_page(0)
+        page.tables[0].cells[1].blobs = [BBox(11, 101, 15, 105), BBox(16, 101, 18, 105)]
+        page.tables[0].cells[2].original_page_num = 3
+        columnar = page.tables[0].to_columnar()
+
+        self.assertIsInstance(columnar.cells, ColumnarCells)
+        self.assertEqual(columnar, page.tables[0])
+        self.assertEqual(columnar.cells[-1], page.tables[0].cells[-1])
+        self.assertEqual(columnar.cells[1].blobs, page.tables[0].cells[1].blobs)
+        self.assertEqual(columnar.cells[2].original_page_num, 3)
+        self.assertEqual(Table.from_dict(columnar.to_dict()), page.tables[0])
+        self.assertEqual(pickle.loads(pickle.dumps(columnar)), page.tables[0])
+
+    def test_text_writes_through(self):
+        doc = Document(pages=[make_page(0), make_page(1, text_prefix="p1")], page_count=2)
+        doc.compact()
+        cells = doc.pages[0].tables[0].cells
+        cells[0].text = "изменено"
+        cells[0].blobs = [BBox(0, 0, 1, 1)]
+
+        self.assertEqual(cells[0].text, "изменено")
+        self.assertEqual(cells[0].blobs, [BBox(0, 0, 1, 1)])
+        logical = doc.get_tables()[0]
+        self.assertEqual(logical.cells[0].text, "изменено")
+        self.assertEqual([c.row for c in logical.cells], [0, 0, 1, 1, 2, 2, 3, 3])
+
+    def test_slotted_geometry(self):
+        for obj in (BBox(0, 0, 1, 1), make_page(0).tables[0], make_page(0).tables[0].cells[0],
+                    make_page(0).paragraphs[0]):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+
+def make_act_table() -> Table:
+    def cell(row, col, text, colspan=1, rowspan=1):
+        return Cell(bbox=BBox(col, row, col + 1, row + 1), row=row, col=col,
+                    colspan=colspan, rowspan=rowspan, text=text)
+    return Table(bbox=BBox(0, 0, 6, 5), cells=[
+        cell(0, 0, "Дата", rowspan=2), cell(0, 1, " Документ ", rowspan=2),
+        cell(0, 2, "По данным ООО Ромашка", colspan=2), cell(0, 4, "По данным ООО Лютик", colspan=2),
+        cell(1, 2, "Дебет"), cell(1, 3, "Кредит"), cell(1, 4, "Дебет"), cell(1, 5, "Кредит"),
+        cell(2, 0, "01.02.2024"), cell(2, 1, "Продажа"), cell(2, 2, "1 000,00"), cell(2, 3, ""),
+        cell(2, 4, ""), cell(2, 5, "1 000,00"),
+    ])
+
+
+class Test_TestTableGrid(unittest.TestCase):
+
+    def test_lookups(self):
+        grid = TableGrid(make_act_table())
+        self.assertEqual(grid.rows, [0, 1, 2])
+        self.assertEqual((grid.n_rows, grid.n_cols), (3, 6))
+        self.assertEqual(grid.text_at(0, 1), "Документ")
+        self.assertIsNone(grid.cell_at(1, 1))
+        # объединённые ячейки покрывают свои позиции
+        self.assertEqual(grid.text(grid.covering(1, 1)), "Документ")
+        self.assertEqual(grid.lower(grid.covering(0, 3)), "по данным ооо ромашка")
+        self.assertEqual([c.col for c in grid.row_cells(1)], [2, 3, 4, 5])
+
+    def test_seller_and_buyer_in_one_pass(self):
+        doc = Document(pages=[Page(tables=[make_act_table()])], page_count=1)
+        extractor = ReconciliationActExtractor(doc, logging.getLogger('app.test'))
+        seller, buyer = extractor.extract_for_parties({"text": "ООО Ромашка"}, {"text": "ООО Лютик"})
+
+        self.assertEqual(len(seller), 1)
+        self.assertEqual(seller[0]["record"], "01.02.2024 Продажа")
+        self.assertEqual(buyer, [{"table": 0, "col_debit": 4, "col_credit": 5}])
+        self.assertEqual(extractor.extract_for_seller({"text": "ООО Ромашка"}), seller)
+        self.assertEqual(extractor.extract_for_buyer({"text": "ООО Лютик"}), buyer)
+
+    def test_missing_header_does_not_resolve_body_cells(self):
+        table = make_act_table()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "", []
+
+        # строки ниже шапки с отложенными столбцами покупателя (как после двухфазного OCR:
+        # первые HEADER_ROWS строк распознаются сразу)
+        for row in range(3, 7):
+            table.cells += [Cell(bbox=BBox(0, row, 1, row + 1), row=row, col=0, colspan=1, rowspan=1, text="Оплата"),
+                            Cell(bbox=BBox(2, row, 3, row + 1), row=row, col=2, colspan=1, rowspan=1, text="10,00")]
+            if row >= HEADER_ROWS:
+                table.cells += [LazyCell(bbox=BBox(col, row, col + 1, row + 1), row=row, col=col, colspan=1,
+                                         rowspan=1, loader=loader) for col in (4, 5)]
+        doc = Document(pages=[Page(tables=[table])], page_count=1)
+        extractor = ReconciliationActExtractor(doc, logging.getLogger('app.test'))
+        seller, buyer = extractor.extract_for_parties({"text": "ООО Ромашка"}, {"text": "ООО Василёк"})
+
+        self.assertEqual(len(seller), 5)
+        self.assertEqual(buyer, [])
+        self.assertEqual(calls, [])
+
+    def test_header_below_title_rows(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "", []
+
+        table = make_act_table()
+        for cell in table.cells:
+            cell.row += 6
+        # над шапкой - заголовок акта и реквизиты сторон
+        table.cells[:0] = [Cell(bbox=BBox(0, row, 6, row + 1), row=row, col=0, colspan=6, rowspan=1,
+                                text=f"Акт сверки, строка {row}") for row in range(6)]
+        table.cells += [LazyCell(bbox=BBox(0, 9, 1, 10), row=9, col=col, colspan=1, rowspan=1, loader=loader)
+                        for col in (4, 5)]
+        doc = Document(pages=[Page(tables=[table])], page_count=1)
+        extractor = ReconciliationActExtractor(doc, logging.getLogger('app.test'))
+        seller, buyer = extractor.extract_for_parties({"text": "ООО Ромашка"}, {"text": "ООО Василёк"})
+
+        self.assertEqual([t["row_idx"] for t in seller], [8, 9])
+        self.assertEqual(seller[0]["record"], "01.02.2024 Продажа")
+        self.assertEqual(buyer, [])
+        self.assertEqual(calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import unittest
+from unittest import mock
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pymupdf
+
+from src.PDFExtractor.hybrid_extractor import HybridExtractor
+from src.PDFExtractor.native_extractor import NativeExtractor
+from src.PDFExtractor.utils import get_pix_rect_page, is_native_page
+from tests.pdf_fixtures import make_table_pdf
+
+
+def make_scan_doc(source: pymupdf.Page) -> pymupdf.Document:
+    """Документ из одной страницы-картинки: растр исходной страницы без текстового слоя."""
+    doc = pymupdf.open()
+    page = doc.new_page(width=source.rect.width, height=source.rect.height)
+    page.insert_image(page.rect, pixmap=source.get_pixmap(dpi=72))
+    return doc
+
+
+class Test_TestNativeFastPath(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf_bytes = make_table_pdf(pages=1, rows=5, cols=5)
+        self.doc = pymupdf.open(stream=self.pdf_bytes, filetype="pdf")
+
+    def tearDown(self):
+        self.doc.close()
+
+    def test_scale_matches_rendered_pixmap(self):
+        page = self.doc.new_page(width=389.9, height=480.2)
+        for dpi in (72, 150, 300):
+            pix = page.get_pixmap(dpi=dpi)
+            self.assertEqual(get_pix_rect_page(page, dpi),
+                             (pix.width / page.rect.width, pix.height / page.rect.height))
+
+    def test_classifier(self):
+        self.assertTrue(is_native_page(self.doc[0]))
+        with make_scan_doc(self.doc[0]) as scan:
+            self.assertFalse(is_native_page(scan[0]))
+            self.assertFalse(is_native_page(scan.new_page()))
+
+    def test_native_spans(self):
+        doc = NativeExtractor().extract(self.pdf_bytes)
+        page = doc.pages[0]
+        self.assertIsNone(page.error)
+        header = [(c.col, c.colspan, c.rowspan) for c in page.tables[0].cells if c.row == 0]
+        self.assertEqual(header, [(0, 1, 1), (1, 2, 1), (3, 2, 1)])
+
+    def test_hybrid_skips_rasterisation_for_native_pages(self):
+        extractor = HybridExtractor()
+        with mock.patch.object(pymupdf.Page, "get_pixmap", autospec=True) as get_pixmap:
+            doc = extractor.extract(self.pdf_bytes)
+        get_pixmap.assert_not_called()
+        self.assertEqual(len(doc.pages[0].tables[0].cells), 23)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 
 import logging
 import unittest
+from unittest import mock
 
 import sys # Добавить этот импорт
 import os # Добавить этот импорт
@@ -16,7 +17,7 @@ from pullenti.Sdk import Sdk
 from src.initialize_api import logger_configure
 from src.NER.ner_service import NERService
 from src.PDFExtractor.scan_extractor import ScanExtractor
-from src.PDFExtractor.base_extractor import Document
+from src.PDFExtractor.base_extractor import BBox, Document, Page, Paragraph, ParagraphType
 
 class Test_TestNer(unittest.TestCase):
 
@@ -85,5 +86,71 @@ class Test_TestNer(unittest.TestCase):
         except Exception as e:
             self.logger.exception(f"Критическая ошибка в Program.main: {e}")
 
+
+SELLER = {"role": "продавец", "str_repr": "ООО «Продавец»"}
+
+
+class Test_TestProcessPages(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Sdk.initialize_all()
+
+    def setUp(self):
+        self.ner = NERService()
+        self.ner_texts = []
+        self.pulled = 0
+        self.pulled_before_tables = None
+        # организации "находятся" по маркеру в тексте, Pullenti не запускается
+        mock.patch.object(self.ner.organization_processor, "process_text", side_effect=self.fake_ner).start()
+        mock.patch.object(self.ner.reconciliation_extractor, "extract_for_seller",
+                          side_effect=self.fake_extract_for_seller).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def fake_ner(self, text):
+        self.ner_texts.append(text)
+        return [dict(SELLER)] if "Продавец" in text else [{"role": None, "str_repr": "ООО «Другое»"}]
+
+    def fake_extract_for_seller(self, seller, tables):
+        self.pulled_before_tables = self.pulled
+        list(tables)
+        return [{"seller": seller["str_repr"]}]
+
+    def pages(self, texts):
+        for i, text in enumerate(texts):
+            self.pulled += 1
+            paragraphs = [Paragraph(bbox=BBox(0, 0, 10, 10), type=ParagraphType.HEADER, text=text)] if text else []
+            yield Page(paragraphs=paragraphs, num_page=i)
+
+    def test_seller_on_first_pages(self):
+        organizations, transactions = self.ner.process_pages(
+            self.pages(["Продавец", "стр. 2", "стр. 3", "стр. 4"]))
+
+        self.assertEqual(organizations, [SELLER])
+        self.assertEqual(transactions, [{"seller": "ООО «Продавец»"}])
+        # NER один раз по первым двум страницам, таблицы разбираются до получения остальных
+        self.assertEqual(self.ner_texts, ["Продавец\nстр. 2"])
+        self.assertEqual(self.pulled_before_tables, 2)
+        self.assertEqual(self.ner.doc.page_count, 4)
+
+    def test_seller_found_in_whole_document(self):
+        organizations, transactions = self.ner.process_pages(
+            self.pages(["стр. 1", "стр. 2", "стр. 3", "Продавец"]))
+
+        self.assertEqual(organizations, [SELLER])
+        self.assertEqual(transactions, [{"seller": "ООО «Продавец»"}])
+        self.assertEqual(self.ner_texts, ["стр. 1\nстр. 2", "стр. 1\nстр. 2\nстр. 3\nПродавец"])
+        self.assertEqual(self.pulled_before_tables, 4)
+
+    def test_no_seller(self):
+        organizations, transactions = self.ner.process_pages(self.pages(["стр. 1", "стр. 2", "", ""]))
+
+        self.assertEqual(transactions, [])
+        self.assertIsNone(self.pulled_before_tables)
+        # на следующих страницах текста нет - повторный поиск не нужен
+        self.assertEqual(self.ner_texts, ["стр. 1\nстр. 2"])
+        self.assertEqual(self.ner.doc.page_count, 4)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
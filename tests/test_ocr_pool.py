@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from concurrent.futures.process import BrokenProcessPool
+
+from src.PDFExtractor.ocr_engine import OCR, OcrEngine
+from src.PDFExtractor.ocr_pool import OcrWorkerPool, _ping_job, get_ocr_pool, shutdown_ocr_pools
+
+# Пустой ROI распознаётся без запуска tesseract, поэтому задание проходит и без него
+EMPTY_ROI = np.zeros((0, 0), dtype=np.uint8)
+
+
+class Test_TestOcrWorkerPool(unittest.TestCase):
+
+    def make_pool(self, **kwargs) -> OcrWorkerPool:
+        pool = OcrWorkerPool(OcrEngine.TESSERACT, **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_submit_through_shared_pool(self):
+        self.addCleanup(shutdown_ocr_pools)
+        pool = get_ocr_pool(OcrEngine.TESSERACT, workers=1)
+        self.assertIs(get_ocr_pool(OcrEngine.TESSERACT), pool)
+
+        self.assertEqual(pool.submit_batch([EMPTY_ROI, EMPTY_ROI]).result(timeout=60), [('', []), ('', [])])
+        # тот же путь, что у ScanExtractor с ocr_pool
+        self.assertEqual(OCR(OcrEngine.TESSERACT, pool=pool).extract_batch([EMPTY_ROI]), [('', [])])
+
+    def test_recovers_after_broken_pool(self):
+        pool = self.make_pool(workers=1)
+        # процесс пула падает посреди задания
+        with self.assertRaises(BrokenProcessPool):
+            pool._submit(os._exit, 1).result(timeout=60)
+
+        self.assertEqual(pool.submit_batch([EMPTY_ROI]).result(timeout=60), [('', [])])
+
+    def test_health_check_restarts_broken_pool(self):
+        pool = self.make_pool(workers=1)
+        self.assertTrue(pool.health_check())
+        broken = pool._executor
+        with self.assertRaises(BrokenProcessPool):
+            pool._submit(os._exit, 1).result(timeout=60)
+
+        self.assertFalse(pool.health_check())
+        self.assertIsNot(pool._executor, broken)
+        self.assertTrue(pool.health_check())
+
+    def test_workers_are_recycled(self):
+        pool = self.make_pool(workers=1, max_jobs_per_worker=2)
+        pids = [pool._submit(_ping_job).result(timeout=60) for _ in range(4)]
+
+        # процесс пересоздаётся после каждых двух заданий, движок загружается заново
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[1], pids[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import unittest
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.PDFExtractor.native_extractor import NativeExtractor
+from tests.pdf_fixtures import make_table_pdf
+
+
+class FaultyExtractor(NativeExtractor):
+    """Первая страница обрабатывается дольше остальных, страница 2 падает, 3 - роняет процесс (crash=True)."""
+    def __init__(self, crash: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.crash = crash
+
+    def _worker_kwargs(self):
+        return dict(super()._worker_kwargs(), crash=self.crash)
+
+    def _process(self, page, doc_state):
+        if page.number == 0:
+            time.sleep(0.5)
+        if page.number == 2:
+            raise ValueError("битая страница")
+        if page.number == 3 and self.crash:
+            os._exit(1)
+        return super()._process(page, doc_state)
+
+
+class Test_TestParallelPages(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pdf_bytes = make_table_pdf(pages=5, rows=5, cols=4)
+
+    def test_pages_keep_order(self):
+        pages = list(FaultyExtractor(page_workers=3).iter_pages(self.pdf_bytes))
+        sequential = list(FaultyExtractor().iter_pages(self.pdf_bytes))
+
+        # первая страница готова последней, но выдаётся первой
+        self.assertEqual([p.num_page for p in pages], [0, 1, 2, 3, 4])
+        self.assertEqual(pages, sequential)
+
+    def test_failed_page_does_not_stop_document(self):
+        pages = list(FaultyExtractor(page_workers=2).iter_pages(self.pdf_bytes))
+
+        self.assertEqual([p.error for p in pages], [None, None, "битая страница", None, None])
+        self.assertEqual(pages[2].tables, [])
+        self.assertTrue(all(p.tables for p in pages if p.error is None))
+
+    def test_worker_crash(self):
+        pages = list(FaultyExtractor(crash=True, page_workers=2).iter_pages(self.pdf_bytes))
+
+        # страницы после падения процесса тоже становятся пустыми, но документ выдаётся целиком
+        self.assertEqual([p.num_page for p in pages], [0, 1, 2, 3, 4])
+        self.assertIsNotNone(pages[3].error)
+        self.assertEqual(pages[2].error, "битая страница")
+
+
+if __name__ == '__main__':
+    unittest.main()
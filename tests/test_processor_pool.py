@@ -0,0 +1,158 @@
+import logging
+import os
+import sys
+import threading
+import unittest
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from pullenti.Sdk import Sdk
+from pullenti.ner.ProcessorService import ProcessorService
+from pullenti.ner.SourceOfAnalysis import SourceOfAnalysis
+from pullenti.ner.date.DateAnalyzer import DateAnalyzer
+from pullenti.ner.org.OrganizationAnalyzer import OrganizationAnalyzer
+
+from src.NER.organization_processor import OrganizationProcessor
+from src.NER.processor_pool import (ProcessorPool, close_processor, create_minimal_processor,
+                                    resolve_analyzer_names)
+from src.NER.utils import extract_date_from_text
+
+ROWS = ["Продажа (05.05.2024 № 12)", "Оплата от 20 мая 2024 г.", "Сальдо за 2 квартал 2024", "Без даты"]
+
+
+ACT_HEADER = ("Акт сверки взаимных расчетов за 2 квартал 2024 г. между АО «РУСАЛ Новокузнецкий алюминиевый завод» "
+              "и ООО «Сибирская Дорожная Компания», г. Новокузнецк, ул. Ленина, д. 5, по договору № 15 от 01.02.2023")
+
+
+def entities(proc, text, types=None, ontology=None):
+    return [str(e) for e in proc.process(SourceOfAnalysis(text), ontology).entities
+            if types is None or e.type_name in types]
+
+
+class Test_TestProcessorPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Sdk.initialize_all()
+
+    def test_processor_is_reused_and_gives_same_results(self):
+        pool = ProcessorPool()
+        for text in ROWS:
+            with ProcessorService.create_specific_processor(DateAnalyzer.ANALYZER_NAME) as fresh:
+                expected = entities(fresh, text)
+            with pool.acquire(DateAnalyzer.ANALYZER_NAME) as proc:
+                self.assertEqual(entities(proc, text), expected)
+        self.assertEqual(pool.stats["created"], 1)
+        self.assertEqual(pool.stats["reused"], len(ROWS) - 1)
+
+    def test_analyzer_sets_are_pooled_separately(self):
+        pool = ProcessorPool()
+        with pool.acquire("DATE") as date_proc:
+            pass
+        with pool.acquire(OrganizationAnalyzer.ANALYZER_NAME) as org_proc:
+            self.assertIsNot(org_proc, date_proc)
+        with pool.acquire(" DATE; ") as again:
+            self.assertIs(again, date_proc)
+
+    def test_concurrent_users_get_distinct_processors(self):
+        pool = ProcessorPool(max_idle=2)
+        barrier = threading.Barrier(4)
+        seen = []
+
+        def work():
+            with pool.acquire(DateAnalyzer.ANALYZER_NAME) as proc:
+                barrier.wait(10)
+                seen.append(proc)
+                entities(proc, ROWS[0])
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(p) for p in seen}), 4)
+        # сверх max_idle процессоры закрываются
+        self.assertEqual(len(pool._idle[(False, frozenset({"DATE"}))]), 2)
+
+    def test_failed_processor_is_discarded_and_settings_reset(self):
+        pool = ProcessorPool()
+        with self.assertRaises(ValueError):
+            with pool.acquire("DATE") as broken:
+                raise ValueError("сбой")
+        with pool.acquire("DATE") as proc:
+            self.assertIsNot(proc, broken)
+            proc.timeout_seconds = 5
+        with pool.acquire("DATE") as proc:
+            self.assertEqual(proc.timeout_seconds, 0)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+    def test_dependencies_are_resolved_from_used_types(self):
+        self.assertEqual(resolve_analyzer_names(["DATE"]), ["PHONE", "DATE"])
+        self.assertEqual(resolve_analyzer_names(["ORGANIZATION"]), ["PHONE", "URI", "GEO", "ADDRESS", "ORGANIZATION"])
+        # MONEY зависит от GEO и DATE, а те - от PHONE; порядок - порядок регистрации
+        self.assertEqual(resolve_analyzer_names(["MONEY"]), ["PHONE", "DATE", "GEO", "MONEY"])
+        with self.assertRaises(ValueError):
+            resolve_analyzer_names(["НЕТ ТАКОГО"])
+
+    def test_minimal_processor_finds_same_entities(self):
+        lean = create_minimal_processor(DateAnalyzer.ANALYZER_NAME)
+        self.addCleanup(close_processor, lean)
+        self.assertEqual([a.name for a in lean.analyzers], ["PHONE", "DATE"])
+        with ProcessorService.create_specific_processor(DateAnalyzer.ANALYZER_NAME) as full:
+            for text in ROWS + [ACT_HEADER]:
+                self.assertEqual(entities(lean, text, ("DATE", "DATERANGE")),
+                                 entities(full, text, ("DATE", "DATERANGE")))
+
+        ontology = OrganizationProcessor(logging.getLogger('test')).org_ontos
+        lean = create_minimal_processor(OrganizationAnalyzer.ANALYZER_NAME)
+        self.addCleanup(close_processor, lean)
+        with ProcessorService.create_specific_processor(OrganizationAnalyzer.ANALYZER_NAME) as full:
+            expected = entities(full, ACT_HEADER, ("ORGANIZATION",), ontology)
+        self.assertEqual(len(expected), 3)
+        self.assertEqual(entities(lean, ACT_HEADER, ("ORGANIZATION",), ontology), expected)
+
+    def test_minimal_processor_does_not_grow(self):
+        ontology = OrganizationProcessor(logging.getLogger('test')).org_ontos
+        pool = ProcessorPool()
+        with pool.acquire(OrganizationAnalyzer.ANALYZER_NAME, minimal=True) as proc:
+            analyzers = [a.name for a in proc.analyzers]
+            entities(proc, ACT_HEADER, ontology=ontology)
+            entities(proc, "ПАО Сбербанк России, генеральный директор Петров П.П.", ontology=ontology)
+            self.assertEqual([a.name for a in proc.analyzers], analyzers)
+        with pool.acquire(OrganizationAnalyzer.ANALYZER_NAME, minimal=True) as again:
+            self.assertIs(again, proc)
+        with self.assertNoLogs('app', logging.WARNING):
+            pool.clear()
+
+    def test_grown_processor_is_discarded(self):
+        pool = ProcessorPool()
+        with self.assertLogs('app', logging.WARNING) as logs:
+            with pool.acquire(DateAnalyzer.ANALYZER_NAME, minimal=True) as grown:
+                # так анализаторы подгружает Processor.find_analyzer во время обработки
+                grown.find_analyzer("PERSON")
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("PERSON", logs.records[0].getMessage())
+        with pool.acquire(DateAnalyzer.ANALYZER_NAME, minimal=True) as proc:
+            self.assertIsNot(proc, grown)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+    def test_minimal_and_full_processors_are_pooled_separately(self):
+        pool = ProcessorPool()
+        with pool.acquire("DATE") as full:
+            pass
+        with pool.acquire("DATE", minimal=True) as lean:
+            self.assertIsNot(lean, full)
+            self.assertLess(len(lean.analyzers), len(full.analyzers))
+
+    def test_extract_date_uses_pool(self):
+        logger = logging.getLogger('test')
+        self.assertEqual(extract_date_from_text(ROWS[0], logger)["formatted_str"], "05.05.2024")
+        self.assertEqual(extract_date_from_text("оплата 20 мая", logger, context_year=2023)["formatted_str"],
+                         "20.05.2023")
+
+
+if __name__ == '__main__':
+    unittest.main()
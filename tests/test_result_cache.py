@@ -0,0 +1,94 @@
+import copy
+import logging
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from pullenti.Sdk import Sdk
+
+from src.NER import organization_processor
+from src.NER.organization_processor import OrganizationProcessor, get_organization_cache
+from src.NER.result_cache import LRUCache
+
+ACT_HEADER = ("Акт сверки взаимных расчетов за 2 квартал 2024 г. между ООО «Сибирская Дорожная Компания», "
+              "именуемое Продавец, и АО «РУСАЛ Новокузнецкий алюминиевый завод», именуемое Покупатель")
+
+
+class Test_TestLRUCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.stats, {"hits": 3, "misses": 1, "evictions": 1})
+
+        cache.capacity = 0
+        cache.put("d", 4)
+        self.assertEqual(len(cache), 0)
+
+    def test_values_are_copied(self):
+        cache = LRUCache(capacity=4, copy_fn=copy.deepcopy)
+        value = [{"role": None}]
+        cache.put("k", value)
+        value[0]["role"] = "продавец"
+        got = cache.get("k")
+        got[0]["role"] = "покупатель"
+        self.assertEqual(cache.get("k"), [{"role": None}])
+        self.assertEqual(cache.get("нет", "по умолчанию"), "по умолчанию")
+
+    def test_concurrent_access(self):
+        cache = LRUCache(capacity=50)
+
+        def work(n):
+            for i in range(2000):
+                key = (n * 7 + i) % 100
+                if cache.get(key) is None:
+                    cache.put(key, key)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.stats["hits"] + cache.stats["misses"], 8 * 2000)
+        self.assertTrue(all(cache.get(key) == key for key in list(cache._items)))
+
+
+class Test_TestOrganizationCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Sdk.initialize_all()
+
+    def setUp(self):
+        get_organization_cache().clear()
+        self.processor = OrganizationProcessor(logging.getLogger('test'))
+
+    def test_repeated_header_is_not_reanalyzed(self):
+        first = self.processor.process_text(ACT_HEADER)
+        self.assertEqual({org["role"] for org in first}, {"продавец", "покупатель"})
+        first[0]["role"] = None
+
+        # новый экземпляр (как в NERService для каждого документа) использует тот же кэш
+        other = OrganizationProcessor(logging.getLogger('test'))
+        with mock.patch.object(organization_processor, "get_processor_pool",
+                               side_effect=AssertionError("Pullenti не нужен")):
+            second = other.process_text(ACT_HEADER)
+        self.assertEqual({org["role"] for org in second}, {"продавец", "покупатель"})
+        self.assertEqual(get_organization_cache().stats["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
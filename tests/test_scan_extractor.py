@@ -0,0 +1,289 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pymupdf
+
+from src.NER.reconc_act_extractor import ReconciliationActExtractor
+from src.PDFExtractor.base_extractor import BBox, Cell, LazyCell, Page, Table, iter_logical_tables
+from src.PDFExtractor.document_cache import DocumentCache, PageCache
+from src.PDFExtractor.scan_extractor import ScanExtractor
+from tests.pdf_fixtures import make_table_pdf
+
+
+def make_scan_pdf(pdf_bytes: bytes, dpi: int = 200) -> bytes:
+    """Растеризует каждую страницу PDF в страницу-картинку (как у скана)."""
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as source, pymupdf.open() as scan:
+        for page in source:
+            scan_page = scan.new_page(width=page.rect.width, height=page.rect.height)
+            scan_page.insert_image(scan_page.rect, pixmap=page.get_pixmap(dpi=dpi))
+        return scan.tobytes()
+
+
+class Test_TestScanExtractor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 6 строк x 5 столбцов, шапка (3 ячейки) и столбцы 2 и 4 пустые
+        cls.pdf_bytes = make_scan_pdf(make_table_pdf(pages=1, rows=6, cols=5, empty_cols=(2, 4)))
+
+    def test_blank_cells_skip_ocr(self):
+        doc = ScanExtractor(max_workers=1).extract(self.pdf_bytes)
+        page = doc.pages[0]
+        cells = page.tables[0].cells
+
+        self.assertEqual(len(cells), 28)
+        self.assertEqual(page.stats["blank_cells_skipped"], 3 + 2 * 5)
+        self.assertEqual(doc.stats["blank_cells_skipped"], 13)
+        # пустые ячейки не попадают в OCR
+        self.assertEqual(page.stats["ocr_rois"], len(page.paragraphs) + 28 - 13)
+        for cell in cells:
+            if cell.row > 0 and cell.col in (2, 4):
+                self.assertEqual(cell.text, '')
+                self.assertEqual(cell.blobs, [])
+
+    def test_blank_cell_detection_disabled(self):
+        page = ScanExtractor(max_workers=1, blank_cell_min_ink=0).extract(self.pdf_bytes).pages[0]
+        self.assertEqual(page.stats["blank_cells_skipped"], 0)
+        self.assertEqual(page.stats["ocr_rois"], len(page.paragraphs) + 28)
+
+    def test_two_phase_defers_unselected_columns(self):
+        extractor = ScanExtractor(max_workers=1, column_selector=select_first_columns, header_rows=2)
+        page = extractor.extract(self.pdf_bytes).pages[0]
+        lazy = [c for c in page.tables[0].cells if isinstance(c, LazyCell)]
+
+        # строки 2..5: столбцы 0 и 1 распознаны сразу, 2 и 4 пустые, 3 - отложен
+        self.assertEqual(sorted((c.row, c.col) for c in lazy), [(r, 3) for r in range(2, 6)])
+        self.assertEqual(page.stats["lazy_cells"], 4)
+        self.assertEqual(page.stats["ocr_rois"], len(page.paragraphs) + 28 - 13 - 4)
+        self.assertTrue(all(c.pending for c in lazy))
+        self.assertEqual(lazy[0].text, '')
+        self.assertFalse(lazy[0].pending)
+        self.assertTrue(lazy[1].pending)
+
+    def test_caches_keep_cells_lazy(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        page_cache = PageCache(os.path.join(tmp.name, "pages"))
+        cache = DocumentCache(os.path.join(tmp.name, "docs"))
+        extractor = ScanExtractor(max_workers=1, column_selector=select_first_columns, header_rows=2,
+                                  page_cache=page_cache, cache=cache)
+        page = extractor.extract(self.pdf_bytes).pages[0]
+
+        # запись в кэш распознала бы отложенные ячейки, поэтому такие страницы не кэшируются
+        self.assertTrue(page.has_pending_cells)
+        self.assertEqual(page_cache.stats["writes"], 0)
+        self.assertEqual(cache.stats["writes"], 0)
+
+    def test_page_stats_with_shared_extractor(self):
+        other_pdf = make_scan_pdf(make_table_pdf(pages=1, rows=4, cols=3))
+        expected = [ScanExtractor(max_workers=1).extract(pdf).pages[0].stats for pdf in (self.pdf_bytes, other_pdf)]
+        self.assertNotEqual(expected[0], expected[1])
+
+        # обе страницы заканчивают обработку одновременно в одном экстракторе
+        barrier = threading.Barrier(2)
+
+        class SyncedExtractor(ScanExtractor):
+            def _process(self, page, doc_state):
+                result = super()._process(page, doc_state)
+                barrier.wait(30)
+                return result
+
+        extractor = SyncedExtractor(max_workers=1)
+        stats = [None, None]
+
+        def work(idx, pdf):
+            stats[idx] = extractor.extract(pdf).pages[0].stats
+
+        threads = [threading.Thread(target=work, args=args) for args in enumerate((self.pdf_bytes, other_pdf))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(stats, expected)
+
+    def test_parallel_pages_keep_carried_columns(self):
+        # на второй странице первый столбец пуст: шапка не находится, и столбцы
+        # продолжения таблицы берутся с первой страницы
+        with pymupdf.open(stream=make_table_pdf(pages=1, rows=6, cols=5), filetype="pdf") as pdf, \
+                pymupdf.open(stream=make_table_pdf(pages=1, rows=6, cols=5, empty_cols=(0,)), filetype="pdf") as second:
+            pdf.insert_pdf(second)
+            pdf_bytes = make_scan_pdf(pdf.tobytes())
+
+        def extract(page_workers):
+            extractor = ScanExtractor(max_workers=1, column_selector=select_if_first_column_filled,
+                                      header_rows=2, page_workers=page_workers)
+            return list(extractor.iter_pages(pdf_bytes))
+
+        with mock.patch("pytesseract.image_to_data", side_effect=fake_image_to_data):
+            sequential = extract(1)
+            parallel = extract(2)
+
+        self.assertEqual([p.stats["lazy_cells"] for p in sequential], [12, 12])
+        self.assertEqual([p.stats for p in parallel], [p.stats for p in sequential])
+        self.assertEqual(parallel, sequential)
+
+    def test_carried_columns_are_per_document(self):
+        extractor = ScanExtractor(max_workers=1, column_selector=select_by_header, header_rows=1)
+        first_doc, second_doc = {}, {}
+        self.assertEqual(extractor._select_columns(make_grid("Дата"), first_doc), {0, 1})
+        # продолжение таблицы без шапки берёт столбцы своего документа, но не чужого
+        self.assertEqual(extractor._select_columns(make_grid("100,00"), first_doc), {0, 1})
+        self.assertIsNone(extractor._select_columns(make_grid("100,00"), second_doc))
+        # другое число столбцов - не продолжение
+        self.assertIsNone(extractor._select_columns(make_grid("100,00", cols=4), first_doc))
+
+    def test_batch_ocr_matches_per_roi(self):
+        # вместо tesseract - "распознавание" каждой строки чернил по хэшу её пикселей:
+        # пакетный путь должен разложить слова по тем же ROI, что и вызовы по одному ROI
+        with mock.patch("pytesseract.image_to_data", side_effect=fake_image_to_data):
+            per_roi = ScanExtractor(max_workers=2).extract(self.pdf_bytes).pages[0]
+            batched = ScanExtractor(max_workers=2, batch_ocr=True).extract(self.pdf_bytes).pages[0]
+
+        self.assertTrue(any(c.text for c in per_roi.tables[0].cells))
+        self.assertEqual([p.text for p in batched.paragraphs], [p.text for p in per_roi.paragraphs])
+        self.assertEqual(batched.tables, per_roi.tables)
+
+    def test_page_cache_hit_carries_columns(self):
+        page_cache = mock.Mock()
+        page_cache.get.return_value = Page(tables=[make_grid("Дата")])
+        extractor = ScanExtractor(max_workers=1, column_selector=select_by_header, header_rows=1,
+                                  page_cache=page_cache)
+        doc_state = {}
+        with pymupdf.open(stream=self.pdf_bytes, filetype="pdf") as doc:
+            extractor._process(doc[0], doc_state)
+        self.assertEqual(doc_state["carry_columns"], (3, {0, 1}))
+
+
+def fake_image_to_data(image, config=None, output_type=None):
+    """image_to_data без tesseract: одно "слово" на каждую полосу строк с чернилами."""
+    ink = image < 128
+    rows = np.flatnonzero(ink.any(axis=1))
+    data = {'text': [], 'conf': [], 'top': [], 'height': []}
+    for band in np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1) if rows.size else []:
+        top, bottom = band[0], band[-1] + 1
+        cols = np.flatnonzero(ink[top:bottom].any(axis=0))
+        crop = np.ascontiguousarray(image[top:bottom, cols[0]:cols[-1] + 1])
+        data['text'].append(hashlib.md5(crop.tobytes() + bytes(str(crop.shape), 'ascii')).hexdigest()[:8])
+        data['conf'].append(90)
+        data['top'].append(int(top))
+        data['height'].append(int(bottom - top))
+    return data
+
+
+def select_first_columns(header: Table):
+    return {0, 1}
+
+
+def select_by_header(header: Table):
+    return {0, 1} if any(c.text == "Дата" for c in header.cells) else None
+
+
+def select_if_first_column_filled(header: Table):
+    return {0, 1} if any(c.row == 1 and c.col == 0 and c.text for c in header.cells) else None
+
+
+def make_grid(first_row_text: str, rows: int = 3, cols: int = 3) -> Table:
+    cells = [Cell(bbox=BBox(c * 10, r * 10, c * 10 + 10, r * 10 + 10), row=r, col=c, colspan=1, rowspan=1,
+                  text=first_row_text if r == 0 else f"{r}{c}")
+             for r in range(rows) for c in range(cols)]
+    return Table(bbox=BBox(0, 0, cols * 10, rows * 10), cells=cells)
+
+
+class Test_TestLazyCell(unittest.TestCase):
+
+    def make_cell(self, calls: list, row: int = 0) -> LazyCell:
+        def loader():
+            calls.append(1)
+            return "100,00", [BBox(1, 1, 5, 5)]
+        return LazyCell(bbox=BBox(0, 0, 10, 10), row=row, col=3, colspan=1, rowspan=1, loader=loader)
+
+    def test_resolves_once(self):
+        calls = []
+        cell = self.make_cell(calls)
+        self.assertTrue(cell.pending)
+        self.assertEqual(cell.blobs, [BBox(1, 1, 5, 5)])
+        self.assertEqual(cell.text, "100,00")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cell, Cell(bbox=BBox(0, 0, 10, 10), row=0, col=3, colspan=1, rowspan=1,
+                                    text="100,00", blobs=[BBox(1, 1, 5, 5)]))
+
+    def test_assignment_cancels_loader(self):
+        calls = []
+        cell = self.make_cell(calls)
+        cell.text = ''
+        self.assertEqual(cell.text, '')
+        self.assertEqual(calls, [])
+
+    def test_logical_table_keeps_cells_lazy(self):
+        calls = []
+        source = self.make_cell(calls, row=1)
+        page = Page(tables=[Table(bbox=BBox(0, 0, 10, 10), cells=[source])], num_page=2)
+        logical = next(iter_logical_tables([page]))
+        shifted = logical.cells[0]
+
+        self.assertIs(shifted.source, source)
+        self.assertEqual((shifted.row, shifted.original_page_num), (1, 2))
+        self.assertTrue(source.pending)
+        self.assertEqual(shifted.text, "100,00")
+        self.assertFalse(source.pending)
+        self.assertEqual(len(calls), 1)
+
+    def test_cells_resolve_concurrently(self):
+        # распознавание двух ячеек должно идти одновременно, а не по очереди
+        barrier = threading.Barrier(2, timeout=5)
+
+        def loader():
+            barrier.wait()
+            return "1", []
+
+        cells = [LazyCell(bbox=BBox(0, 0, 10, 10), row=r, col=0, colspan=1, rowspan=1, loader=loader)
+                 for r in range(2)]
+        threads = [threading.Thread(target=lambda c=c: c.text) for c in cells]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertFalse(barrier.broken)
+        self.assertEqual([c.text for c in cells], ["1", "1"])
+
+    def test_pickle_resolves_text(self):
+        calls = []
+        restored = pickle.loads(pickle.dumps(self.make_cell(calls)))
+        self.assertIs(type(restored), Cell)
+        self.assertEqual(restored.text, "100,00")
+        self.assertEqual(restored.blobs, [BBox(1, 1, 5, 5)])
+
+
+class Test_TestSelectOcrColumns(unittest.TestCase):
+
+    def test_columns_under_headers(self):
+        def cell(row, col, text, colspan=1):
+            return Cell(bbox=BBox(0, 0, 1, 1), row=row, col=col, colspan=colspan, rowspan=1, text=text)
+        header = Table(bbox=BBox(0, 0, 1, 1), cells=[
+            cell(0, 0, "Дата"), cell(0, 1, "Документ"),
+            cell(0, 2, "По данным ООО Ромашка", colspan=2), cell(0, 4, "Примечание"),
+            cell(0, 5, "По данным ООО Лютик", colspan=2),
+            cell(1, 2, "Дебет"), cell(1, 3, "Кредит"), cell(1, 5, "Дебет"), cell(1, 6, "Кредит"),
+        ])
+        # примечание (4) левее дебета покупателя попадает в описание, столбцы правее не нужны
+        self.assertEqual(ReconciliationActExtractor.select_ocr_columns(header), {0, 1, 2, 3, 4, 5, 6})
+        seller_only = Table(bbox=header.bbox, cells=header.cells[:4] + header.cells[5:7])
+        self.assertEqual(ReconciliationActExtractor.select_ocr_columns(seller_only), {0, 1, 2, 3})
+        self.assertIsNone(ReconciliationActExtractor.select_ocr_columns(Table(bbox=BBox(0, 0, 1, 1), cells=header.cells[:2])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+
+import sys
+
+# Добавить путь к корневой папке проекта
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.PDFExtractor.base_extractor import (BBox, Cell, ColumnarCells, Document, LazyCell, Page, Paragraph,
+                                             ParagraphType, Table)
+from src.PDFExtractor.native_extractor import NativeExtractor
+from src.PDFExtractor.serialization import dumps_document, dumps_page, loads_document, loads_page
+from tests.pdf_fixtures import make_table_pdf
+
+
+def make_document() -> Document:
+    cells = [
+        Cell(bbox=BBox(10 * c, 10 * r, 10 * c + 9, 10 * r + 9), row=r, col=c, colspan=1 + (r == 0), rowspan=1,
+             text=f"r{r}c{c}" if c else None, original_page_num=r if r else None,
+             blobs=[BBox(10 * c + b, 10 * r + 1, 10 * c + b + 2, 10 * r + 5) for b in range(c)])
+        for r in range(3) for c in range(3)
+    ]
+    cells.append(LazyCell(bbox=BBox(0, 40, 9, 49), row=3, col=0, colspan=1, rowspan=1,
+                          loader=lambda: ("отложено", [BBox(1, 41, 5, 45)])))
+    first = Page(
+        tables=[Table(bbox=BBox(0, 0, 30, 50), cells=cells, start_page_num=0),
+                Table(bbox=BBox(0, 60, 30, 70))],
+        paragraphs=[Paragraph(bbox=BBox(0, 0, 100, 5), type=ParagraphType.HEADER, text="Акт сверки «Ромашка»",
+                              blobs=[BBox(1, 1, 50, 4)]),
+                    Paragraph(bbox=BBox(0, 90, 100, 95), type=ParagraphType.FOOTER)],
+        num_page=0,
+        stats={"ocr_rois": 12, "blank_cells_skipped": 3},
+    )
+    failed = Page(num_page=1, error="ошибка OCR")
+    return Document(pdf_bytes=b"%PDF-1.7 test", pages=[first, failed], page_count=2)
+
+
+class Test_TestSerialization(unittest.TestCase):
+
+    def test_document_round_trip(self):
+        doc = make_document()
+        restored = loads_document(dumps_document(doc))
+
+        self.assertEqual(restored.pages, doc.pages)
+        self.assertEqual(restored.page_count, 2)
+        self.assertIsNone(restored.pdf_bytes)
+        self.assertEqual(restored.pages[1].error, "ошибка OCR")
+        self.assertEqual(restored.pages[0].stats, doc.pages[0].stats)
+        self.assertIsNone(restored.pages[0].tables[0].cells[0].text)
+
+    def test_pdf_bytes_optional(self):
+        doc = make_document()
+        self.assertEqual(loads_document(dumps_document(doc, include_pdf=True)).pdf_bytes, b"%PDF-1.7 test")
+        self.assertEqual(loads_document(dumps_document(doc), pdf_bytes=b"%PDF").pdf_bytes, b"%PDF")
+        self.assertLess(len(dumps_document(doc)), len(dumps_document(doc, include_pdf=True)))
+
+    def test_columnar_load_and_dump(self):
+        doc = make_document()
+        restored = loads_document(dumps_document(doc), columnar=True)
+        self.assertIsInstance(restored.pages[0].tables[0].cells, ColumnarCells)
+        self.assertEqual(restored.pages, doc.pages)
+
+        doc.compact()
+        self.assertEqual(dumps_document(doc), dumps_document(restored))
+
+    def test_page_round_trip(self):
+        page = make_document().pages[0]
+        self.assertEqual(loads_page(dumps_page(page)), page)
+
+    def test_rejects_foreign_data(self):
+        data = dumps_document(make_document())
+        with self.assertRaises(ValueError):
+            loads_document(b"\x80\x04" + data)
+        with self.assertRaises(ValueError):
+            loads_document(data[:-10])
+        with self.assertRaises(ValueError):
+            loads_page(data)
+
+    def test_pages_from_worker_processes(self):
+        # страницы из процессов пула передаются в двоичном формате
+        pdf_bytes = make_table_pdf(pages=3, rows=5, cols=4)
+        parallel = NativeExtractor(page_workers=2).extract(pdf_bytes)
+        self.assertEqual(parallel.pages, NativeExtractor().extract(pdf_bytes).pages)
+
+
+if __name__ == '__main__':
+    unittest.main()